@@ -16,7 +16,7 @@ class BoardGameView(SearchFormMixin, ListView):
     paginate_by = 15
 
     def get_queryset(self):
-        return self.filter_data(BoardGame.objects.get_all_in_possession())
+        return self.filter_data(BoardGame.objects.get_all_in_possession()).with_ownership_flags(self.request.member)
 
     def get_context_data(self, **kwargs):
         context = super(BoardGameView, self).get_context_data()
@@ -1,28 +1,69 @@
-from django.contrib.auth.models import Permission
+from django.contrib.auth.models import Group, Permission
 from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 
+from committees.models import AssociationGroup, AssociationGroupMembership
 from membership_file.util import get_member_from_user
 
+# Incremented whenever association group permissions or memberships change, invalidating
+#   all permission caches computed before that change
+_perm_cache_version = 0
+
 
 class AssociationGroupAuthBackend:
-    def has_perm(self, user_obj, perm, obj=None):
-        if not user_obj.is_authenticated:
-            return False
+    """
+    Grants users the permissions of the association groups their member is part of; both those
+    assigned to the association group directly and those assigned to its site group.
+    Similar to Django's ModelBackend, the permissions are loaded once and cached on the user object.
+    """
+
+    def get_user_permissions(self, user_obj, obj=None):
+        # Permissions are never assigned to individual users through this backend
+        return set()
 
-        member = get_member_from_user(user_obj)
-        if member is None:
-            return False
-        if not user_obj.is_active:
-            return False
+    def get_group_permissions(self, user_obj, obj=None):
+        """Returns the set of "app_label.codename" permissions the user has through its association groups"""
+        if not user_obj.is_active or not user_obj.is_authenticated:
+            return set()
 
-        app_label, codename = perm.split(".")
+        version, perms = getattr(user_obj, "_association_group_perm_cache", (None, None))
+        if version != _perm_cache_version:
+            # Store the version before querying, so that changes made during the query invalidate the result
+            version = _perm_cache_version
+            member = get_member_from_user(user_obj)
+            if member is None:
+                perms = set()
+            else:
+                perms = Permission.objects.filter(
+                    Q(group__associationgroup__members=member) | Q(associationgroup__members=member),
+                ).values_list("content_type__app_label", "codename")
+                perms = {f"{app_label}.{codename}" for app_label, codename in perms}
+            user_obj._association_group_perm_cache = (version, perms)
+        return perms
 
-        return Permission.objects.filter(
-            Q(group__associationgroup__members__in=[member]) | Q(associationgroup__members__in=[member]),
-            content_type__app_label=app_label,
-            codename=codename,
-        ).exists()
+    def get_all_permissions(self, user_obj, obj=None):
+        return self.get_group_permissions(user_obj, obj=obj)
+
+    def has_perm(self, user_obj, perm, obj=None):
+        return perm in self.get_all_permissions(user_obj, obj=obj)
 
     def authenticate(self, *args, **kwargs):
         # This backend does not support authentication, but this method is called regardless, so return None instead
         return None
+
+
+def invalidate_perm_cache():
+    """Invalidates all cached association group permissions"""
+    global _perm_cache_version
+    _perm_cache_version += 1
+
+
+@receiver(post_save, sender=AssociationGroupMembership)
+@receiver(post_delete, sender=AssociationGroupMembership)
+@receiver(m2m_changed, sender=AssociationGroupMembership)
+@receiver(post_save, sender=AssociationGroup)
+@receiver(m2m_changed, sender=AssociationGroup.permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_perm_cache_on_change(sender, **kwargs):
+    invalidate_perm_cache()
@@ -2,7 +2,7 @@ from django.contrib.auth.models import User, Permission, AnonymousUser
 from django.test import TestCase
 
 from committees.backends import AssociationGroupAuthBackend
-from committees.models import AssociationGroup
+from committees.models import AssociationGroup, AssociationGroupMembership
 
 
 class TestAssociationGroupBackend(TestCase):
@@ -36,6 +36,49 @@ class TestAssociationGroupBackend(TestCase):
         user_has_perm = AssociationGroupAuthBackend().has_perm(user, "committees.change_associationgroup")
         self.assertTrue(user_has_perm)
 
+    def test_get_all_permissions(self):
+        """Tests that all association group permissions of the member are returned"""
+        user, assoc_group = self.prep_group()
+        perms = AssociationGroupAuthBackend().get_all_permissions(user)
+        self.assertIn("committees.add_associationgroup", perms)
+        self.assertIn("committees.change_associationgroup", perms)
+        self.assertNotIn("committees.delete_associationgroup", perms)
+        self.assertSetEqual(AssociationGroupAuthBackend().get_user_permissions(user), set())
+
+    def test_permissions_cached(self):
+        """Tests that permissions are only queried once per user object"""
+        user, assoc_group = self.prep_group()
+        backend = AssociationGroupAuthBackend()
+        backend.has_perm(user, "committees.add_associationgroup")
+        with self.assertNumQueries(0):
+            self.assertTrue(backend.has_perm(user, "committees.add_associationgroup"))
+            self.assertTrue(backend.has_perm(user, "committees.change_associationgroup"))
+            self.assertFalse(backend.has_perm(user, "committees.delete_associationgroup"))
+
+    def test_cache_invalidated_on_membership_change(self):
+        """Tests that cached permissions are invalidated when association group memberships change"""
+        user, assoc_group = self.prep_group()
+        backend = AssociationGroupAuthBackend()
+        self.assertTrue(backend.has_perm(user, "committees.change_associationgroup"))
+
+        AssociationGroupMembership.objects.filter(member__user=user, group=assoc_group).delete()
+        self.assertFalse(backend.has_perm(user, "committees.change_associationgroup"))
+
+        assoc_group.members.add(user.member)
+        self.assertTrue(backend.has_perm(user, "committees.change_associationgroup"))
+
+    def test_cache_invalidated_on_permission_change(self):
+        """Tests that cached permissions are invalidated when association group permissions change"""
+        user, assoc_group = self.prep_group()
+        backend = AssociationGroupAuthBackend()
+        self.assertFalse(backend.has_perm(user, "committees.delete_associationgroup"))
+
+        assoc_group.permissions.add(Permission.objects.get(codename="delete_associationgroup"))
+        self.assertTrue(backend.has_perm(user, "committees.delete_associationgroup"))
+
+        assoc_group.site_group.permissions.clear()
+        self.assertFalse(backend.has_perm(user, "committees.add_associationgroup"))
+
     def test_has_perm_anonymous_user(self):
         user_has_perm = AssociationGroupAuthBackend().has_perm(AnonymousUser(), "committees.add_associationgroup")
         self.assertFalse(user_has_perm)
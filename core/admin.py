@@ -4,8 +4,10 @@ from django.contrib.auth.models import Group, User
 from django.contrib.auth.admin import GroupAdmin, UserAdmin
 from django.contrib.contenttypes.admin import GenericTabularInline
 from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
 from django.db.models import CharField, Q, Value
 from django.db.models.functions import Concat
+from django.forms.models import BaseInlineFormSet
 from django.urls import reverse
 from django.utils.html import escape, format_html
 from django.utils.safestring import mark_safe
@@ -49,6 +51,41 @@ class URLLinkInlineAdminMixin:
     get_url.short_description = "Details"
 
 
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset that only contains the objects of a single page. See PaginatedInlineAdminMixin"""
+
+    per_page = 25
+    page_param = "page"
+    page_number = None
+
+    def get_queryset(self):
+        if not hasattr(self, "page"):
+            paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page = paginator.get_page(self.page_number)
+            self._queryset = self.page.object_list
+        return self._queryset
+
+
+class PaginatedInlineAdminMixin:
+    """
+    Mixin that paginates the objects of a (read-only) Inline, so pages of objects with many
+    related objects stay fast. The page is selected through the `page_param` GET-parameter.
+    Should not be used for Inlines that allow adding or changing objects.
+    """
+
+    formset = PaginatedInlineFormSet
+    template = "admin/edit_inline/paginated_tabular.html"
+    per_page = 25
+    page_param = "page"
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_param = self.page_param
+        formset.page_number = request.GET.get(self.page_param)
+        return formset
+
+
 ###################################################
 
 
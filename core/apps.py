@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.core import checks
+
+
+class CoreConfig(AppConfig):
+    name = "core"
+
+    def ready(self):
+        from core.checks import check_cache_tables
+
+        checks.register(check_cache_tables, checks.Tags.caches, checks.Tags.database)
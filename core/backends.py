@@ -1,7 +1,7 @@
 from django.contrib.auth.backends import ModelBackend
 from membership_file.util import get_member_from_user
 
-from dynamic_preferences.registries import global_preferences_registry
+from core.dynamic_preferences_registry import get_compiled_permissions
 
 # #####################################################################################
 # Backend that provides default permissions for everyone, logged in users, and members
@@ -12,32 +12,21 @@ from dynamic_preferences.registries import global_preferences_registry
 
 
 class BaseUserBackend(ModelBackend):
-    # We instantiate a manager for our global preferences
-    global_preferences = global_preferences_registry.manager()
-
-    def _in_perm_group(self, app_label, codename, group):
-        return any(perm.content_type.app_label == app_label and perm.codename == codename for perm in group)
-
+    # Permission preferences are compiled into sets of "app_label.codename" strings,
+    #   which remain cached until the preference changes
     def has_perm(self, user, perm, obj=None):
-        app_label, codename = perm.split(".")
-
         # Permissions for everyone
-        if self._in_perm_group(app_label, codename, self.global_preferences["permissions__base_permissions"]):
+        if perm in get_compiled_permissions("base_permissions"):
             return True
 
         # Permissions for logged in users
-        if user.is_authenticated and self._in_perm_group(
-            app_label, codename, self.global_preferences["permissions__user_permissions"]
-        ):
+        if user.is_authenticated and perm in get_compiled_permissions("user_permissions"):
             return True
 
         # Permissions for members
-        member = get_member_from_user(user)
-        if (
-            member is not None
-            and member.is_active
-            and self._in_perm_group(app_label, codename, self.global_preferences["permissions__member_permissions"])
-        ):
-            return True
+        #   Membership is only checked if the permission would be granted, as that requires queries
+        if perm in get_compiled_permissions("member_permissions"):
+            member = get_member_from_user(user)
+            return member is not None and member.is_active
 
         return False
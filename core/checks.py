@@ -0,0 +1,28 @@
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.db import BaseDatabaseCache
+from django.db import connections, router
+
+
+def check_cache_tables(app_configs=None, databases=None, **kwargs):
+    """Checks that the tables of database caches exist, as every cache access fails otherwise"""
+    errors = []
+    if not databases:
+        return errors
+
+    for alias in caches:
+        cache = caches[alias]
+        if not isinstance(cache, BaseDatabaseCache):
+            continue
+        db = router.db_for_write(cache.cache_model_class)
+        if db not in databases:
+            continue
+        if cache._table not in connections[db].introspection.table_names():
+            errors.append(
+                checks.Error(
+                    f"The table '{cache._table}' of cache '{alias}' does not exist.",
+                    hint="Run `python manage.py createcachetable`.",
+                    id="core.E001",
+                )
+            )
+    return errors
@@ -1,9 +1,16 @@
+from typing import FrozenSet
+
 from core.util import get_permission_objects_from_string
 from django.contrib.admin.widgets import FilteredSelectMultiple
 from django.contrib.auth.models import Permission
+from django.core.cache import caches
 from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from dynamic_preferences.models import GlobalPreferenceModel
+from dynamic_preferences.settings import preferences_settings
 from dynamic_preferences.types import (
     BooleanPreference,
     LongStringPreference,
@@ -159,3 +166,35 @@ class MemberPermissions(AbstractUserTypePermission):
     name = "member_permissions"
     verbose_name = "Member Permissions"
     description = "Permissions granted to all users that are in the membership file."
+
+
+def _get_compiled_permissions_cache_key(name):
+    return f"core_compiled_permissions_{name}"
+
+
+def get_compiled_permissions(name) -> FrozenSet[str]:
+    """
+    Obtains the value of the permission preference with the given name as a frozenset of
+    `app_label.codename` strings. The compiled set is cached alongside the preferences themselves, until the
+    preference is changed or the cache's default timeout passes (processes that did not see the change, e.g. with
+    a per-process cache, pick it up at the latter point).
+    """
+    cache = caches[preferences_settings.CACHE_NAME]
+    key = _get_compiled_permissions_cache_key(name)
+    perms = cache.get(key) if preferences_settings.ENABLE_CACHE else None
+    if perms is None:
+        value = global_preferences_registry.manager()[f"{permissions.name}__{name}"]
+        perms = frozenset(
+            f"{app_label}.{codename}"
+            for app_label, codename in value.values_list("content_type__app_label", "codename")
+        )
+        if preferences_settings.ENABLE_CACHE:
+            cache.set(key, perms)
+    return perms
+
+
+@receiver(post_save, sender=GlobalPreferenceModel)
+def invalidate_compiled_permissions(sender, instance, **kwargs):
+    """Clears the compiled permission set of a permission preference when it changes"""
+    if instance.section == permissions.name:
+        caches[preferences_settings.CACHE_NAME].delete(_get_compiled_permissions_cache_key(instance.name))
@@ -5,6 +5,7 @@ from django.contrib.auth.models import Permission, AnonymousUser
 
 from dynamic_preferences.registries import global_preferences_registry
 
+from core.backends import BaseUserBackend
 from membership_file.models import Member
 
 User = get_user_model()
@@ -64,3 +65,38 @@ class BaseBackendTest(TestCase):
         self.assertTrue(user.has_perm("core.change_presetimage"))
         self.assertTrue(user.has_perm("core.change_presetimage"))
         self.assertTrue(user.has_perm("core.delete_presetimage"))
+
+    def test_compiled_permissions_cached(self):
+        """Tests that permission checks do not query the database once the permission preferences are compiled"""
+        global_preferences = global_preferences_registry.manager()
+        global_preferences["permissions__base_permissions"] = Permission.objects.filter(
+            content_type__app_label="core", codename="add_presetimage"
+        )
+        user = AnonymousUser()
+        self.assertTrue(user.has_perm("core.add_presetimage"))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("core.add_presetimage"))
+            self.assertFalse(user.has_perm("core.change_presetimage"))
+
+        # Compiled permissions are invalidated when the preference changes
+        global_preferences["permissions__base_permissions"] = Permission.objects.filter(
+            content_type__app_label="core", codename="change_presetimage"
+        )
+        self.assertFalse(user.has_perm("core.add_presetimage"))
+        self.assertTrue(user.has_perm("core.change_presetimage"))
+
+    def test_member_status_only_checked_for_member_permissions(self):
+        """Tests that a member's active status is not queried for permissions that members would not get anyway"""
+        global_preferences = global_preferences_registry.manager()
+        global_preferences["permissions__member_permissions"] = Permission.objects.filter(
+            content_type__app_label="core", codename="delete_presetimage"
+        )
+        user = User.objects.create_user(username="user", password="password")
+        Member.objects.create(user=user, first_name="User", last_name="Member", email="usermember@example.com")
+        user = User.objects.select_related("member").get(id=user.id)
+        # Warm the permission caches
+        user.has_perm("core.delete_presetimage")
+
+        with self.assertNumQueries(0):
+            self.assertFalse(BaseUserBackend().has_perm(user, "core.view_presetimage"))
@@ -0,0 +1,25 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.checks import check_cache_tables
+
+
+class CacheTableCheckTest(TestCase):
+    """Tests the system check for database cache tables"""
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_cache"}}
+    )
+    def test_missing_table(self):
+        errors = check_cache_tables(databases=["default"])
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].id, "core.E001")
+
+        # Checks without database access are skipped
+        self.assertListEqual(check_cache_tables(), [])
+
+        call_command("createcachetable", verbosity=0)
+        self.assertListEqual(check_cache_tables(databases=["default"]), [])
+
+    def test_non_database_cache(self):
+        self.assertListEqual(check_cache_tables(databases=["default"]), [])
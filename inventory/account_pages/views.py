@@ -21,13 +21,19 @@ class MemberItemsOverview(AccountViewMixin, ListView):
     context_object_name = "ownerships"
 
     def get_queryset(self):
-        return Ownership.objects.filter(member=self.request.member).filter(is_active=True)
+        return (
+            Ownership.objects.filter(member=self.request.member)
+            .filter(is_active=True)
+            .prefetch_related("content_type", "content_object")
+        )
 
     def get_context_data(self, *args, **kwargs):
         context = super(MemberItemsOverview, self).get_context_data(*args, **kwargs)
         # Get items previously stored at the associatoin
-        context[self.context_object_name + "_history"] = Ownership.objects.filter(member=self.request.member).filter(
-            is_active=False
+        context[self.context_object_name + "_history"] = (
+            Ownership.objects.filter(member=self.request.member)
+            .filter(is_active=False)
+            .prefetch_related("content_type", "content_object")
         )
         return context
 
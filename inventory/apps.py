@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class InventoryConfig(AppConfig):
+    name = "inventory"
+
+    def ready(self):
+        from inventory.search import register_signals
+
+        # Keep the catalogue search index up to date
+        register_signals()
@@ -19,6 +19,8 @@ class AssociationGroupInventoryView(AssociationGroupMixin, SearchFormMixin, List
 
     def get_queryset(self):
         ownerships = Ownership.objects.filter(group=self.association_group.site_group).filter(is_active=True)
+        # Items of all types are fetched in one query per type, rather than one query per ownership
+        ownerships = ownerships.prefetch_related("content_type", "content_object")
         return self.filter_data(ownerships)
 
     def get_context_data(self, **kwargs):
@@ -8,6 +8,7 @@ from django.utils import timezone
 
 from membership_file.models import Member
 from inventory.models import *
+from inventory.search import search_items
 from utils.forms import FilterForm
 
 __all__ = [
@@ -21,6 +22,7 @@ __all__ = [
     "DeleteItemForm",
     "DeleteOwnershipForm",
     "FilterCatalogueForm",
+    "CatalogueSearchForm",
 ]
 
 
@@ -175,6 +177,20 @@ class FilterCatalogueForm(FilterForm):
         return queryset.order_by("name")
 
 
+class CatalogueSearchForm(forms.Form):
+    """Searches items of all types at once. See inventory/search.py"""
+
+    search = forms.CharField(max_length=100, required=False)
+
+    def get_search_results(self, content_types, owner_content_types=()):
+        """Returns the ranked search results for the given item types. See search_items"""
+        if not self.cleaned_data["search"]:
+            return ItemSearchToken.objects.none().values("content_type", "object_id")
+        return search_items(
+            self.cleaned_data["search"], content_types=content_types, owner_content_types=owner_content_types
+        )
+
+
 class FilterOwnershipThroughRelatedItems(FilterForm):
     search_field = forms.CharField(max_length=100, required=False)
 
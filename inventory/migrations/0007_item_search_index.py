@@ -0,0 +1,98 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:59
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Item types at the time of this migration
+ITEM_MODELS = [("inventory", "miscellaneousitem"), ("boardgames", "boardgame"), ("roleplaying", "roleplayingitem")]
+
+# Copied from inventory.search as it was when this migration was written, so that later changes to the
+#   tokenizer do not change what this migration does. Tokens are rebuilt whenever an item is saved.
+FIELD_NAME = "name"
+FIELD_DESCRIPTION = "description"
+FIELD_OWNER = "owner"
+TOKEN_MAX_LENGTH = 255
+
+_WORD_REGEX = re.compile(r"[^\W_]+")
+
+
+def tokenize_search_text(text):
+    """Lower-cases, accent-folds, and splits text into its alphanumerical words"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    normalized = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return _WORD_REGEX.findall(normalized)
+
+
+def get_item_search_tokens(name, description, owner_names):
+    """Obtains the set of (field, token) pairs for an item with the given name, description, and owner names"""
+    tokens = set()
+    for field, texts in ((FIELD_NAME, [name]), (FIELD_DESCRIPTION, [description]), (FIELD_OWNER, owner_names)):
+        for text in texts:
+            if text:
+                tokens.update((field, token) for token in tokenize_search_text(text))
+    return {(field, token[:TOKEN_MAX_LENGTH]) for field, token in tokens if token}
+
+
+def build_search_index(apps, schema_editor):
+    """Builds the search index for all existing items"""
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Ownership = apps.get_model("inventory", "Ownership")
+    ItemSearchToken = apps.get_model("inventory", "ItemSearchToken")
+
+    search_tokens = []
+    for app_label, model_name in ITEM_MODELS:
+        content_type, _ = ContentType.objects.get_or_create(app_label=app_label, model=model_name)
+        owner_names = {}
+        ownerships = Ownership.objects.filter(content_type=content_type, is_active=True)
+        for ownership in ownerships.select_related("member", "group"):
+            if ownership.member is not None:
+                member = ownership.member
+                name = " ".join(filter(None, [member.first_name, member.tussenvoegsel, member.last_name]))
+            else:
+                name = ownership.group.name if ownership.group is not None else ""
+            owner_names.setdefault(ownership.object_id, []).append(name)
+
+        for item in apps.get_model(app_label, model_name).objects.all():
+            search_tokens.extend(
+                ItemSearchToken(content_type=content_type, object_id=item.id, field=field, token=token)
+                for field, token in get_item_search_tokens(item.name, item.description, owner_names.get(item.id, []))
+            )
+    ItemSearchToken.objects.bulk_create(search_tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("inventory", "0006_auto_20211219_1234"),
+        ("boardgames", "0003_verbose_name"),
+        ("roleplaying", "0002_auto_20210822_1937"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemSearchToken",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("object_id", models.PositiveIntegerField()),
+                (
+                    "field",
+                    models.CharField(
+                        choices=[("name", "Name"), ("description", "Description"), ("owner", "Owner")], max_length=16
+                    ),
+                ),
+                ("token", models.CharField(db_index=True, max_length=255)),
+                (
+                    "content_type",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="contenttypes.contenttype"),
+                ),
+            ],
+            options={
+                "unique_together": {("content_type", "object_id", "field", "token")},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 import os
 
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import Group, User
 from django.contrib.contenttypes.models import ContentType
@@ -10,11 +11,39 @@ from django.utils.text import slugify
 
 from membership_file.models import Member
 
+__all__ = ["valid_item_class_ids", "Ownership", "Item", "MiscellaneousItem", "ItemSearchToken"]
 
-__all__ = ["valid_item_class_ids", "Ownership", "Item", "MiscellaneousItem"]
 
+class ItemQuerySet(models.QuerySet):
+    """QuerySet for any object related to Item"""
 
-class ItemManager(models.Manager):
+    def with_ownership_flags(self, member=None):
+        """
+        Annotates whether each item is currently in possession of the given member (is_owner), of another
+        member (is_owned_by_other_member), or of the association (is_owned_by_knights). Each flag is computed
+        in the same query as the items themselves.
+        :param member: The member viewing the items, if any
+        """
+        ownerships = Ownership.objects.filter(
+            content_type=ContentType.objects.get_for_model(self.model),
+            object_id=OuterRef("pk"),
+            is_active=True,
+        )
+        member_ownerships = ownerships.filter(member__isnull=False)
+        if member:
+            is_owner = Exists(member_ownerships.filter(member=member))
+            member_ownerships = member_ownerships.exclude(member=member)
+        else:
+            is_owner = Value(False, output_field=models.BooleanField())
+
+        return self.annotate(
+            is_owner=is_owner,
+            is_owned_by_other_member=Exists(member_ownerships),
+            is_owned_by_knights=Exists(ownerships.filter(group__isnull=False)),
+        )
+
+
+class ItemManager(models.Manager.from_queryset(ItemQuerySet)):
     """Manager for any object related to Item. Replaces standard manager in <Item>.objects"""
 
     def get_all_in_possession(self):
@@ -82,6 +111,8 @@ class Item(models.Model):
     ownerships = GenericRelation("inventory.Ownership")
     # An achievement can also apply to roleplay items
     achievements = GenericRelation("achievements.AchievementItemLink")
+    # Tokens used to find this item in the catalogue search. See inventory/search.py
+    search_tokens = GenericRelation("inventory.ItemSearchToken")
 
     objects = ItemManager()
 
@@ -202,3 +233,31 @@ class Ownership(models.Model):
 
 class MiscellaneousItem(Item):
     icon_class = "fas fa-box"
+
+
+class ItemSearchToken(models.Model):
+    """
+    A lower-cased, accent-folded token derived from an item's name, description or current owners.
+    Maintained automatically whenever an item or its ownerships are saved, and used to search items
+    of all types at once using (indexed) prefix matching. See inventory/search.py
+    """
+
+    FIELD_NAME = "name"
+    FIELD_DESCRIPTION = "description"
+    FIELD_OWNER = "owner"
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    item = GenericForeignKey("content_type", "object_id")
+    # The field the token was derived from, which determines its weight when ranking results
+    field = models.CharField(
+        max_length=16,
+        choices=[(FIELD_NAME, "Name"), (FIELD_DESCRIPTION, "Description"), (FIELD_OWNER, "Owner")],
+    )
+    token = models.CharField(max_length=255, db_index=True)
+
+    class Meta:
+        unique_together = [["content_type", "object_id", "field", "token"]]
+
+    def __str__(self):
+        return f"{self.token} ({self.content_type_id}-{self.object_id})"
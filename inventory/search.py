@@ -0,0 +1,188 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, F, IntegerField, Max, Q, QuerySet, Value, When
+from django.db.models.signals import post_delete, post_save
+
+from membership_file.models import Member
+from membership_file.search import get_search_terms, tokenize_search_text
+
+from inventory.models import Item, ItemSearchToken, Ownership
+
+##################################################################################
+# Indexed catalogue search
+# Items of all types are searched at once by prefix-matching normalised tokens
+# stored in the ItemSearchToken table, rather than running icontains on each
+# item table separately.
+##################################################################################
+
+# Weight of a token when ranking search results, based on the field it was derived from
+FIELD_WEIGHTS = {
+    ItemSearchToken.FIELD_NAME: 4,
+    ItemSearchToken.FIELD_OWNER: 2,
+    ItemSearchToken.FIELD_DESCRIPTION: 1,
+}
+# Terms that match a token exactly weigh more than terms that only match the start of a token
+EXACT_MATCH_FACTOR = 2
+
+
+def get_item_search_tokens(name: str, description: str, owner_names: Iterable[str]) -> Set[Tuple[str, str]]:
+    """
+    Obtains the set of (field, token) pairs for an item with the given name, description, and names of its
+    current owners.
+    """
+    tokens = set()
+    for field, texts in (
+        (ItemSearchToken.FIELD_NAME, [name]),
+        (ItemSearchToken.FIELD_DESCRIPTION, [description]),
+        (ItemSearchToken.FIELD_OWNER, owner_names),
+    ):
+        for text in texts:
+            if text:
+                tokens.update((field, token) for token in tokenize_search_text(text))
+
+    # Tokens longer than the indexed column are truncated; prefix matching still works for those
+    max_length = ItemSearchToken._meta.get_field("token").max_length
+    return {(field, token[:max_length]) for field, token in tokens if token}
+
+
+def get_owner_name(ownership: Ownership) -> str:
+    """Returns the indexed name of an ownership's owner. Spoofed member names are not indexed."""
+    if ownership.member is not None:
+        member = ownership.member
+        return " ".join(filter(None, [member.first_name, member.tussenvoegsel, member.last_name]))
+    return ownership.group.name if ownership.group is not None else ""
+
+
+def update_item_search_index(item: Item):
+    """Synchronises the search tokens of the given item with its current values and owners"""
+    ownerships = item.ownerships.filter(is_active=True).select_related("member", "group")
+    new_tokens = get_item_search_tokens(
+        item.name, item.description, [get_owner_name(ownership) for ownership in ownerships]
+    )
+    old_tokens = set(item.search_tokens.values_list("field", "token"))
+
+    removed_tokens = old_tokens - new_tokens
+    if removed_tokens:
+        removed_query = Q()
+        for field, token in removed_tokens:
+            removed_query |= Q(field=field, token=token)
+        item.search_tokens.filter(removed_query).delete()
+    if new_tokens - old_tokens:
+        content_type = ContentType.objects.get_for_model(item)
+        ItemSearchToken.objects.bulk_create(
+            [
+                ItemSearchToken(content_type=content_type, object_id=item.id, field=field, token=token)
+                for field, token in new_tokens - old_tokens
+            ]
+        )
+
+
+def search_items(
+    search_term: str, content_types: Iterable[ContentType] = None, owner_content_types: Iterable[ContentType] = ()
+) -> QuerySet:
+    """
+    Searches items of all (or the given) types. Each search term must be a prefix of at least one of the item's
+    search tokens. Results are ranked by the fields the terms occur in, favouring exact matches.
+    :param search_term: The search query
+    :param content_types: The item types to search, defaults to all types
+    :param owner_content_types: The item types that can be found through the names of their current owners
+    :return: A values-queryset of dicts with the content_type (id), object_id, and rank of each matching item,
+    best matches first. Use `get_search_result_items` to obtain the items themselves.
+    """
+    terms = list(dict.fromkeys(get_search_terms(search_term)))
+    if not terms:
+        return ItemSearchToken.objects.none().values("content_type", "object_id")
+
+    tokens = ItemSearchToken.objects.all()
+    if content_types is not None:
+        tokens = tokens.filter(content_type__in=content_types)
+    tokens = tokens.exclude(Q(field=ItemSearchToken.FIELD_OWNER) & ~Q(content_type__in=owner_content_types))
+    match_any = Q()
+    for term in terms:
+        match_any |= Q(token__startswith=term)
+    tokens = tokens.filter(match_any)
+
+    field_weight = Case(
+        *[When(field=field, then=Value(weight)) for field, weight in FIELD_WEIGHTS.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    # Score of each term is the best score among the tokens it matches (0 if it matches none)
+    term_scores = {
+        f"term_{i}": Max(
+            Case(
+                When(token=term, then=field_weight * EXACT_MATCH_FACTOR),
+                When(token__startswith=term, then=field_weight),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+        for i, term in enumerate(terms)
+    }
+    results = tokens.values("content_type", "object_id").annotate(**term_scores)
+    # Items must match every term
+    results = results.filter(**{f"{name}__gt": 0 for name in term_scores})
+    rank = sum((F(name) for name in term_scores), Value(0))
+    return results.annotate(rank=rank).order_by("-rank", "content_type", "object_id")
+
+
+def get_search_result_items(results: Iterable[Dict], member: Member = None) -> List[Item]:
+    """
+    Obtains the items of (a page of) search results, in the same order, using a single query per item type.
+    The items are annotated with their ownership flags (see ItemQuerySet.with_ownership_flags) and their
+    content type (item_type).
+    :param results: The search results, as returned by `search_items`
+    :param member: The member viewing the results
+    """
+    results = list(results)
+    ids_per_type = {}
+    for result in results:
+        ids_per_type.setdefault(result["content_type"], []).append(result["object_id"])
+
+    items = {}
+    for content_type_id, ids in ids_per_type.items():
+        content_type = ContentType.objects.get_for_id(content_type_id)
+        for item in content_type.model_class().objects.with_ownership_flags(member).filter(id__in=ids):
+            item.item_type = content_type
+            items[(content_type_id, item.id)] = item
+
+    # Items deleted in the meantime are left out
+    return [
+        items[(result["content_type"], result["object_id"])]
+        for result in results
+        if (result["content_type"], result["object_id"]) in items
+    ]
+
+
+def _update_item_on_save(sender, instance, **kwargs):
+    update_item_search_index(instance)
+
+
+def _update_owned_item_on_ownership_change(sender, instance, **kwargs):
+    item = instance.content_object
+    if item is not None:
+        update_item_search_index(item)
+
+
+def _update_owned_items_on_owner_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        # Ownerships in fixtures are indexed when they are loaded themselves
+        return
+    owner_field = "member" if isinstance(instance, Member) else "group"
+    ownerships = Ownership.objects.filter(is_active=True, **{owner_field: instance})
+    for ownership in ownerships.prefetch_related("content_object"):
+        if ownership.content_object is not None:
+            update_item_search_index(ownership.content_object)
+
+
+def register_signals():
+    """Keeps the search index up to date. Also fires for raw saves (e.g. fixtures)."""
+    for item_class in Item.__subclasses__():
+        post_save.connect(_update_item_on_save, sender=item_class)
+    post_save.connect(_update_owned_item_on_ownership_change, sender=Ownership)
+    post_delete.connect(_update_owned_item_on_ownership_change, sender=Ownership)
+    # Owner names are indexed as well
+    post_save.connect(_update_owned_items_on_owner_save, sender=Member)
+    post_save.connect(_update_owned_items_on_owner_save, sender=Group)
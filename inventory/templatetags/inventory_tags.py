@@ -23,8 +23,15 @@ def get_owned_by(item, owner):
 
 @register.inclusion_tag("inventory/snippets/ownership_tags.html", takes_context=True)
 def render_ownership_tags(context, item):
-    member = context["request"].member
+    if hasattr(item, "is_owned_by_knights"):
+        # Flags were already computed through ItemQuerySet.with_ownership_flags
+        return {
+            "is_owner": item.is_owner,
+            "is_owned_by_member": item.is_owned_by_other_member,
+            "is_owned_by_knights": item.is_owned_by_knights,
+        }
 
+    member = context["request"].member
     if member:
         is_owner = item.ownerships.filter(member=member, is_active=True).exists()
         is_owned_by_other_member = (
@@ -160,3 +160,30 @@ class TestItemManager(TestCase):
         self.assertEqual(0, self.manager.get_all_owned_by(group=group).count())
         group = Group.objects.get(id=2)
         self.assertEqual(2, self.manager.get_all_owned_by(group=group).count())
+
+    def test_with_ownership_flags(self):
+        member = Member.objects.get(id=1)
+        # Another member also stores item 2
+        Ownership.objects.create(member_id=3, content_object=MiscellaneousItem.objects.get(id=2), is_active=True)
+        # Inactive ownerships are ignored
+        Ownership.objects.create(member_id=3, content_object=MiscellaneousItem.objects.get(id=4), is_active=False)
+
+        flags = {
+            item.id: (item.is_owner, item.is_owned_by_other_member, item.is_owned_by_knights)
+            for item in MiscellaneousItem.objects.with_ownership_flags(member)
+        }
+        self.assertEqual(flags[1], (True, False, True))
+        self.assertEqual(flags[2], (False, True, True))
+        self.assertEqual(flags[4], (False, False, False))
+
+        # Without a member, no item is owned by the viewer
+        flags = {
+            item.id: (item.is_owner, item.is_owned_by_other_member, item.is_owned_by_knights)
+            for item in MiscellaneousItem.objects.with_ownership_flags(None)
+        }
+        self.assertEqual(flags[1], (False, True, True))
+        self.assertEqual(flags[2], (False, True, True))
+
+        # Flags are computed in the same query
+        with self.assertNumQueries(1):
+            list(MiscellaneousItem.objects.get_all_in_possession().with_ownership_flags(member))
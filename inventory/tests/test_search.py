@@ -0,0 +1,142 @@
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from boardgames.models import BoardGame
+from membership_file.models import Member
+
+from inventory.models import ItemSearchToken, MiscellaneousItem, Ownership
+from inventory.search import get_item_search_tokens, get_search_result_items, search_items
+
+
+class ItemSearchIndexTest(TestCase):
+    """Tests maintenance of the item search index"""
+
+    fixtures = ["test_users", "test_groups", "test_members.json", "inventory/test_ownership"]
+
+    def _get_tokens(self, item):
+        return set(item.search_tokens.values_list("field", "token"))
+
+    def test_tokens(self):
+        tokens = get_item_search_tokens("Gezond verstand", "In róód jasje", ["ZG"])
+        self.assertSetEqual(
+            tokens,
+            {
+                (ItemSearchToken.FIELD_NAME, "gezond"),
+                (ItemSearchToken.FIELD_NAME, "verstand"),
+                (ItemSearchToken.FIELD_DESCRIPTION, "in"),
+                (ItemSearchToken.FIELD_DESCRIPTION, "rood"),
+                (ItemSearchToken.FIELD_DESCRIPTION, "jasje"),
+                (ItemSearchToken.FIELD_OWNER, "zg"),
+            },
+        )
+
+    def test_fixture_items_indexed(self):
+        """Items and ownerships loaded through fixtures are indexed as well"""
+        tokens = self._get_tokens(MiscellaneousItem.objects.get(id=1))
+        self.assertIn((ItemSearchToken.FIELD_NAME, "flyers"), tokens)
+        self.assertIn((ItemSearchToken.FIELD_OWNER, "charlie"), tokens)
+        self.assertIn((ItemSearchToken.FIELD_OWNER, "zg"), tokens)
+
+    def test_index_updated_on_save(self):
+        item = MiscellaneousItem.objects.get(id=4)
+        item.name = "Nagelschaar"
+        item.save()
+        tokens = self._get_tokens(item)
+        self.assertIn((ItemSearchToken.FIELD_NAME, "nagelschaar"), tokens)
+        self.assertNotIn((ItemSearchToken.FIELD_NAME, "schaar"), tokens)
+
+    def test_index_removed_on_delete(self):
+        item = MiscellaneousItem.objects.get(id=4)
+        item.delete()
+        self.assertFalse(ItemSearchToken.objects.filter(object_id=4, token="schaar").exists())
+
+    def test_index_updated_on_ownership_change(self):
+        item = MiscellaneousItem.objects.get(id=2)
+        ownership = Ownership.objects.create(member_id=2, content_object=item, is_active=True)
+        self.assertIn((ItemSearchToken.FIELD_OWNER, "wolf"), self._get_tokens(item))
+
+        ownership.is_active = False
+        ownership.save()
+        self.assertNotIn((ItemSearchToken.FIELD_OWNER, "wolf"), self._get_tokens(item))
+
+        Ownership.objects.filter(group_id=2, object_id=2).delete()
+        self.assertNotIn((ItemSearchToken.FIELD_OWNER, "zg"), self._get_tokens(item))
+
+    def test_index_updated_on_owner_rename(self):
+        member = Member.objects.get(id=1)
+        member.first_name = "Charlotte"
+        member.save()
+        group = Group.objects.get(id=2)
+        group.name = "Zeldzame Gasten"
+        group.save()
+
+        tokens = self._get_tokens(MiscellaneousItem.objects.get(id=1))
+        self.assertIn((ItemSearchToken.FIELD_OWNER, "charlotte"), tokens)
+        self.assertNotIn((ItemSearchToken.FIELD_OWNER, "charlie"), tokens)
+        self.assertIn((ItemSearchToken.FIELD_OWNER, "zeldzame"), tokens)
+        self.assertNotIn((ItemSearchToken.FIELD_OWNER, "zg"), tokens)
+
+
+class SearchItemsTest(TestCase):
+    """Tests searching through items"""
+
+    fixtures = ["test_users", "test_groups", "test_members.json", "inventory/test_ownership"]
+
+    def setUp(self):
+        self.misc_type = ContentType.objects.get_for_model(MiscellaneousItem)
+        self.boardgame_type = ContentType.objects.get_for_model(BoardGame)
+
+    def _search(self, search_term, **kwargs):
+        return [(result["content_type"], result["object_id"]) for result in search_items(search_term, **kwargs)]
+
+    def test_search_prefix(self):
+        self.assertListEqual(self._search("scha"), [(self.misc_type.id, 4)])
+        self.assertListEqual(self._search("VERSTAND GEZ"), [(self.misc_type.id, 3)])
+        self.assertListEqual(self._search("verstand schaar"), [])
+        self.assertListEqual(self._search("   "), [])
+
+    def test_search_description(self):
+        self.assertListEqual(self._search("jasje"), [(self.misc_type.id, 3)])
+
+    def test_search_ranking(self):
+        """Name matches rank above description matches, and exact matches above prefix matches"""
+        MiscellaneousItem.objects.create(name="Rode jas")
+        jasje = MiscellaneousItem.objects.create(name="Jasje")
+        results = self._search("jas")
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[2], (self.misc_type.id, 3))
+
+        results = self._search("jasje")
+        self.assertListEqual(results, [(self.misc_type.id, jasje.id), (self.misc_type.id, 3)])
+
+    def test_search_content_types(self):
+        boardgame = BoardGame.objects.create(name="Schaakspel")
+        self.assertListEqual(self._search("schaak"), [(self.boardgame_type.id, boardgame.id)])
+        self.assertListEqual(self._search("schaak", content_types=[self.misc_type]), [])
+
+    def test_search_owners(self):
+        """Owner names can only be searched for the given item types"""
+        self.assertListEqual(self._search("zg"), [])
+        self.assertListEqual(
+            self._search("zg", owner_content_types=[self.misc_type]), [(self.misc_type.id, 1), (self.misc_type.id, 2)]
+        )
+
+    def test_get_search_result_items(self):
+        """Items are retrieved in order, with a single query per item type"""
+        boardgame = BoardGame.objects.create(name="Gezelschapsspel")
+        results = list(search_items("ge"))
+        self.assertEqual(len(results), 2)
+
+        member = Member.objects.get(id=1)
+        with CaptureQueriesContext(connection) as context:
+            items = get_search_result_items(results, member)
+        self.assertEqual(len(context.captured_queries), 2)
+        self.assertListEqual(
+            [(item.item_type, item.id) for item in items],
+            [(ContentType.objects.get_for_id(result["content_type"]), result["object_id"]) for result in results],
+        )
+        self.assertIn(boardgame, items)
+        self.assertFalse(items[0].is_owner)
@@ -50,6 +50,15 @@ class RenderOwnershipTemplatetagTest(TestCase):
         self.assertEqual(results["is_owned_by_member"], True)
         self.assertEqual(results["is_owned_by_knights"], True)
 
+    def test_annotated(self):
+        """Tests that flags annotated through with_ownership_flags are used when present"""
+        item = MiscellaneousItem.objects.with_ownership_flags(self.request.member).get(id=1)
+        with self.assertNumQueries(0):
+            results = render_ownership_tags(self.context, item)
+        self.assertEqual(results["is_owner"], True)
+        self.assertEqual(results["is_owned_by_member"], False)
+        self.assertEqual(results["is_owned_by_knights"], True)
+
     def test_notn_owned(self):
         item = MiscellaneousItem.objects.get(id=4)
         results = render_ownership_tags(self.context, item)
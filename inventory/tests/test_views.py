@@ -2,8 +2,10 @@ from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.contrib.auth.models import Group, User, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.db.models import QuerySet
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.views.generic import DetailView, FormView, UpdateView, CreateView, ListView
 
@@ -95,17 +97,22 @@ class TestCatalogueMixin(TestMixinMixin, TestCase):
     def test_tabs(self):
         self._build_get_response(save_view=True)
         tabs = self.view.get_tabs()
-        self.assertEqual(len(tabs), 2)
+        self.assertEqual(len(tabs), 3)
         self.assertEqual(tabs[0]["verbose"], "Miscellaneous Items")
         self.assertEqual(tabs[0]["icon_class"], MiscellaneousItem.icon_class)
         self.assertIn("url", tabs[0].keys())
         self.assertTrue(tabs[0]["selected"])
 
-        self.assertEqual(tabs[1]["verbose"], "Instructions")
-        self.assertEqual(tabs[1]["icon_class"], "fas fa-info")
-        self.assertEqual(tabs[1]["url"], reverse("inventory:catalogue_info"))
+        self.assertEqual(tabs[1]["verbose"], "Search")
+        self.assertEqual(tabs[1]["icon_class"], "fas fa-search")
+        self.assertEqual(tabs[1]["url"], reverse("inventory:catalogue_search"))
         self.assertFalse(tabs[1]["selected"])
 
+        self.assertEqual(tabs[2]["verbose"], "Instructions")
+        self.assertEqual(tabs[2]["icon_class"], "fas fa-info")
+        self.assertEqual(tabs[2]["url"], reverse("inventory:catalogue_info"))
+        self.assertFalse(tabs[2]["selected"])
+
 
 class TestItemMixin(TestMixinMixin, TestCase):
     fixtures = ["test_users", "test_groups", "test_members.json", "inventory/test_ownership"]
@@ -151,7 +158,7 @@ class TestCatalogueInstructions(ViewValidityMixin, TestCase):
         response = self.client.get(reverse("inventory:catalogue_info"), data={})
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "inventory/inventory_instructions.html")
-        self.assertTrue(response.context["tabs"][1]["selected"])
+        self.assertTrue(response.context["tabs"][2]["selected"])
 
 
 class TestTypeCatalogue(ViewValidityMixin, TestCase):
@@ -205,6 +212,80 @@ class TestTypeCatalogue(ViewValidityMixin, TestCase):
         self.assertTrue(context["can_add_to_group"])
         self.assertTrue(context["can_add_to_member"])
 
+    def test_ownership_flags(self):
+        """Tests that the ownership status of the listed items does not cost queries per item"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.get_base_url(), data={})
+        num_queries = len(context.captured_queries)
+        item = next(item for item in response.context["object_list"] if item.id == 1)
+        self.assertTrue(item.is_owner)
+        self.assertTrue(item.is_owned_by_knights)
+
+        for i in range(5):
+            item = MiscellaneousItem.objects.create(name=f"Extra item {i}")
+            Ownership.objects.create(member_id=3, content_object=item, is_active=True)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.get_base_url(), data={})
+        self.assertEqual(len(context.captured_queries), num_queries)
+
+
+class TestCatalogueSearchView(ViewValidityMixin, TestCase):
+    fixtures = ["test_users", "test_groups", "test_members.json", "inventory/test_ownership"]
+    base_user_id = 100
+
+    def get_base_url(self):
+        return reverse("inventory:catalogue_search")
+
+    def _get_results(self, search_term):
+        response = self.client.get(self.get_base_url(), data={"search": search_term})
+        self.assertEqual(response.status_code, 200)
+        return [(result["item_type"].model, result["item"].id) for result in response.context["object_list"]]
+
+    def test_class(self):
+        self.assertTrue(issubclass(CatalogueSearchView, MembershipRequiredMixin))
+        self.assertTrue(issubclass(CatalogueSearchView, CatalogueMixin))
+        self.assertTrue(issubclass(CatalogueSearchView, SearchFormMixin))
+        self.assertTrue(issubclass(CatalogueSearchView, ListView))
+        self.assertEqual(CatalogueSearchView.template_name, "inventory/catalogue_search.html")
+        self.assertEqual(CatalogueSearchView.search_form_class, CatalogueSearchForm)
+
+    def test_successful_get(self):
+        response = self.client.get(self.get_base_url(), data={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["object_list"]), 0)
+        self.assertTrue(response.context["tabs"][1]["selected"])
+
+    def test_search(self):
+        self.assertListEqual(self._get_results("scha"), [("miscellaneousitem", 4)])
+        self.assertListEqual(self._get_results("rood"), [("miscellaneousitem", 3)])
+        self.assertListEqual(self._get_results("nonexistent"), [])
+
+    def test_search_viewable_types_only(self):
+        """Items of types the user cannot view are not found"""
+        self.user.user_permissions.remove(Permission.objects.get(codename="view_miscellaneousitem"))
+        self.assertListEqual(self._get_results("scha"), [])
+
+    def test_search_owners(self):
+        """Owners can only be searched by those that can maintain the ownerships"""
+        self.assertListEqual(self._get_results("zg"), [])
+        self.user.user_permissions.add(Permission.objects.get(codename="maintain_ownerships_for_miscellaneousitem"))
+        self.assertListEqual(self._get_results("zg"), [("miscellaneousitem", 1), ("miscellaneousitem", 2)])
+
+    def test_constant_queries(self):
+        """The number of queries does not depend on the number of results"""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.get_base_url(), data={"search": "extra"})
+        num_queries = len(context.captured_queries)
+
+        for i in range(5):
+            item = MiscellaneousItem.objects.create(name=f"Extra item {i}")
+            Ownership.objects.create(member_id=3, content_object=item, is_active=True)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.get_base_url(), data={"search": "extra"})
+        self.assertEqual(len(response.context["object_list"]), 5)
+        # Fetching the (non-empty) page of results, and the items of the single item type on it
+        self.assertEqual(len(context.captured_queries), num_queries + 2)
+
 
 class TestAddLinkCommitteeView(ViewValidityMixin, TestCase):
     fixtures = ["test_users", "test_groups", "test_members.json", "inventory/test_ownership"]
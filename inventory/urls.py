@@ -38,6 +38,7 @@ app_name = "inventory"
 # fmt: off
 urlpatterns = [
     path('catalogue/info/', CatalogueInstructionsView.as_view(), name='catalogue_info'),
+    path('catalogue/search/', CatalogueSearchView.as_view(), name='catalogue_search'),
     path('catalogue/<cat_item:type_id>/', include([
         path('', TypeCatalogue.as_view(), name="catalogue"),
         path('add_new/', CreateItemView.as_view(), name='catalogue_add_new_item'),
@@ -12,12 +12,14 @@ from committees.utils import user_in_association_group
 from membership_file.util import MembershipRequiredMixin
 from utils.views import SearchFormMixin, RedirectMixin
 
-from inventory.models import Ownership, Item
+from inventory.models import Ownership, Item, ItemSearchToken
 from inventory.forms import *
+from inventory.search import get_search_result_items
 
 
 __all__ = [
     "TypeCatalogue",
+    "CatalogueSearchView",
     "CatalogueInstructionsView",
     "AddLinkCommitteeView",
     "AddLinkMemberView",
@@ -101,6 +103,15 @@ class CatalogueMixin:
                         "selected": item_type == self.item_type,
                     }
                 )
+        # Add search tab
+        tabs.append(
+            {
+                "verbose": "Search",
+                "icon_class": "fas fa-search",
+                "url": reverse("inventory:catalogue_search"),
+                "selected": isinstance(self, CatalogueSearchView),
+            }
+        )
         # Add instructions tab
         tabs.append(
             {
@@ -112,6 +123,24 @@ class CatalogueMixin:
         )
         return tabs
 
+    def get_catalogue_permissions(self, item_type):
+        """Returns the actions the user can perform on items of the given type in the catalogue"""
+        item_class_name = item_type.model
+        item_app_label = item_type.app_label
+        return {
+            "can_add_to_group": self.request.user.has_perm(
+                f"{item_app_label}.add_group_ownership_for_{item_class_name}"
+            ),
+            "can_add_to_member": self.request.user.has_perm(
+                f"{item_app_label}.add_member_ownership_for_{item_class_name}"
+            ),
+            "can_add_items": self.request.user.has_perm(f"{item_app_label}.add_{item_class_name}"),
+            "can_change_items": self.request.user.has_perm(f"{item_app_label}.change_{item_class_name}"),
+            "can_maintain_ownerships": self.request.user.has_perm(
+                f"{item_app_label}.maintain_ownerships_for_{item_class_name}"
+            ),
+        }
+
 
 class CatalogueInstructionsView(MembershipRequiredMixin, CatalogueMixin, TemplateView):
     template_name = "inventory/inventory_instructions.html"
@@ -152,6 +181,9 @@ class TypeCatalogue(MembershipRequiredMixin, CatalogueMixin, SearchFormMixin, Li
         # This patch is needed to let listview catalogue and searchform work
         return self.item_type.model_class()
 
+    def get_queryset(self):
+        return super(TypeCatalogue, self).get_queryset().with_ownership_flags(self.request.member)
+
     def get_filter_form_kwargs(self, **kwargs):
         item_class_name = self.item_type.model
         item_app_label = self.item_type.app_label
@@ -163,25 +195,50 @@ class TypeCatalogue(MembershipRequiredMixin, CatalogueMixin, SearchFormMixin, Li
 
     def get_context_data(self, *args, **kwargs):
         context = super(TypeCatalogue, self).get_context_data(*args, **kwargs)
+        context.update(self.get_catalogue_permissions(self.item_type))
+        return context
 
-        item_class_name = self.item_type.model
-        item_app_label = self.item_type.app_label
-        context.update(
-            {
-                "can_add_to_group": self.request.user.has_perm(
-                    f"{item_app_label}.add_group_ownership_for_{item_class_name}"
-                ),
-                "can_add_to_member": self.request.user.has_perm(
-                    f"{item_app_label}.add_member_ownership_for_{item_class_name}"
-                ),
-                "can_add_items": self.request.user.has_perm(f"{item_app_label}.add_{item_class_name}"),
-                "can_change_items": self.request.user.has_perm(f"{item_app_label}.change_{item_class_name}"),
-                "can_maintain_ownerships": self.request.user.has_perm(
-                    f"{item_app_label}.maintain_ownerships_for_{item_class_name}"
-                ),
-            }
+
+class CatalogueSearchView(MembershipRequiredMixin, CatalogueMixin, SearchFormMixin, ListView):
+    """Searches the catalogues of all item types the user can view at once"""
+
+    template_name = "inventory/catalogue_search.html"
+    search_form_class = CatalogueSearchForm
+
+    paginate_by = 15
+
+    def setup(self, request, *args, **kwargs):
+        super(CatalogueSearchView, self).setup(request, *args, **kwargs)
+        # Catalogue permissions of each item type the user can view
+        self.catalogue_permissions = {
+            item_type: self.get_catalogue_permissions(item_type)
+            for item_type in Item.get_item_contenttypes()
+            if self.request.user.has_perm(f"{item_type.app_label}.view_{item_type.model}")
+        }
+
+    def get_queryset(self):
+        if not self.search_form.is_valid():
+            return ItemSearchToken.objects.none().values("content_type", "object_id")
+        return self.search_form.get_search_results(
+            content_types=list(self.catalogue_permissions.keys()),
+            # Owners are only shown to those maintaining the ownerships, so only they can search for them
+            owner_content_types=[
+                item_type
+                for item_type, permissions in self.catalogue_permissions.items()
+                if permissions["can_maintain_ownerships"]
+            ],
         )
-        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, object_list, is_paginated = super(CatalogueSearchView, self).paginate_queryset(
+            queryset, page_size
+        )
+        # Fetch the items on this page, along with what the user can do with them
+        results = [
+            {"item": item, "item_type": item.item_type, **self.catalogue_permissions[item.item_type]}
+            for item in get_search_result_items(page.object_list, member=self.request.member)
+        ]
+        return paginator, page, results, is_paginated
 
 
 class AddLinkFormMixin:
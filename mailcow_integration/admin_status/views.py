@@ -1,11 +1,15 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
-from typing import Dict, List, Optional, Tuple, TypedDict
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypedDict
 
 from django.conf import settings
 from django.db.models import QuerySet
 from django.contrib import messages
+from django.db import connections
 from django.http import HttpResponseBadRequest, HttpResponseRedirect
 from django.urls import reverse
 from django.utils.html import format_html
@@ -72,6 +76,60 @@ class AliasInfos:
     archive_addresses: List[str] = field(default_factory=list)
 
 
+class AliasExposureGraph:
+    """Graph of aliases and the addresses they forward to, used to find routes through which
+    an internal address can be emailed from outside. Edges are stored in reverse (goto address ->
+    aliases forwarding to it), so that routes can be found by walking back from an internal address.
+    Routes are memoized per address, so each alias is visited at most once per graph.
+    """
+
+    def __init__(self, aliases: List[MailcowAlias], member_aliases: Dict[str, Dict]):
+        self._forwarders: Dict[str, List[str]] = defaultdict(list)
+        for alias in aliases:
+            for goto_address in dict.fromkeys(alias.goto):
+                self._forwarders[goto_address].append(alias.address)
+        self._internal_addresses: Set[str] = {
+            address for address, config in member_aliases.items() if config["internal"]
+        }
+        self._routes: Dict[str, List[List[str]]] = {}
+
+    def get_exposure_routes(self, address: str) -> List[List[str]]:
+        """Gets the routes through which an address is exposed, sorted alphabetically. Each route starts at a
+        public alias, followed by the internal member aliases it passes through (excluding `address` itself).
+        """
+        return [list(route) for route in self._get_routes(address, set())[0]]
+
+    def _get_routes(self, address: str, visiting: Set[str]) -> Tuple[List[List[str]], bool]:
+        """Returns the exposure routes of an address, and whether a cycle was cut off while finding them.
+        Results that were cut off depend on the path taken to reach the address, and are therefore not memoized.
+        """
+        if address in self._routes:
+            return self._routes[address], False
+
+        visiting.add(address)
+        routes: List[List[str]] = []
+        cut_off = False
+        for alias_address in self._forwarders.get(address, []):
+            if alias_address not in self._internal_addresses:
+                # Exposed: The alias is a public (non-internal) alias
+                routes.append([alias_address])
+            elif alias_address in visiting:
+                # Cycle of internal aliases; cannot lead to a new public alias
+                cut_off = True
+            else:
+                # The alias is an internal member alias, but it _might_ be exposed.
+                sub_routes, sub_cut_off = self._get_routes(alias_address, visiting)
+                cut_off = cut_off or sub_cut_off
+                routes += [route + [alias_address] for route in sub_routes]
+        visiting.remove(address)
+
+        # Sort routes alphabetically
+        routes.sort(key=lambda route: route[0])
+        if not cut_off:
+            self._routes[address] = routes
+        return routes, cut_off
+
+
 class MailcowStatusView(TemplateView):
     """An overview of aliases managed by Squire. Connects to the Mailcow API to determine whether
     such aliases are considered up-to-date. Also allows forced updates of each alias.
@@ -83,6 +141,7 @@ class MailcowStatusView(TemplateView):
         super().__init__(*args, **kwargs)
         self.mailcow_manager: SquireMailcowManager = get_mailcow_manager()
         self._committee_addresses = AssociationGroup.objects.values_list("contact_email", flat=True)
+        self._exposure_graph: Optional[Tuple[List[MailcowAlias], Dict[str, Dict], AliasExposureGraph]] = None
 
     # TODO: A lot of this logic should be moved to SquireMailcowManager in case these kind of checks
     #   were to be used in forms and such. Right now, this is the only view that does something with this logic.
@@ -142,27 +201,14 @@ class MailcowStatusView(TemplateView):
     ) -> List[List[str]]:
         """Gets addresses through which an internal alias is exposed. That is, public addresses
         with the internal alias in their goto-addresses."""
-        routes: List[List[str]] = []
-        for alias in aliases:
-            if address in alias.goto:
-                # Address appears in the alias's goto
-                if not next(
-                    (
-                        config["internal"]
-                        for member_address, config in member_aliases.items()
-                        if member_address == alias.address
-                    ),
-                    False,
-                ):
-                    # Exposed: The alias is a public (non-internal) member alias
-                    routes.append([alias.address])
-                else:
-                    # The alias is an internal member alias, but it _might_ be exposed.
-                    for route in self._get_alias_exposure_routes(alias.address, aliases, mailboxes, member_aliases):
-                        route.append(alias.address)
-                        routes.append(route)
-        # Sort routes alphabetically
-        return sorted(routes, key=lambda route: route[0])
+        # The graph is built once per request, and reused for all addresses
+        if (
+            self._exposure_graph is None
+            or self._exposure_graph[0] is not aliases
+            or self._exposure_graph[1] is not member_aliases
+        ):
+            self._exposure_graph = (aliases, member_aliases, AliasExposureGraph(aliases, member_aliases))
+        return self._exposure_graph[2].get_exposure_routes(address)
 
     def _get_subscriberinfos_by_status(
         self,
@@ -221,7 +267,9 @@ class MailcowStatusView(TemplateView):
             if config["internal"]:
                 if not self.mailcow_manager.is_address_internal(address):
                     exposure_routes.append([address, "Alias not located in Rspamd settings map."])
-                exposure_routes += self._get_alias_exposure_routes(address, aliases, mailboxes, config)
+                exposure_routes += self._get_alias_exposure_routes(
+                    address, aliases, mailboxes, settings.MEMBER_ALIASES
+                )
 
             subscribers = self._get_subscriberinfos_by_status(status, subscribers, alias)
             info = AliasInfos(
@@ -359,6 +407,35 @@ class MailcowStatusView(TemplateView):
             for alias in aliases
         ]
 
+    def _fetch_mailcow_state(self) -> Tuple[List[MailcowAlias], List[MailcowMailbox], Dict[str, float]]:
+        """Fetches the aliases, mailboxes, and Rspamd settings from Mailcow concurrently. Data fetched less than
+        `settings.MAILCOW_STATUS_MAX_AGE` seconds ago is reused. Also returns the time (in ms) each fetch took.
+        Raises the first exception encountered (if any).
+        As the fetches use the cache (which may be stored in the database), each worker closes the database
+        connections it opened; those are not cleaned up at the end of the request like the request thread's.
+        """
+        max_age = settings.MAILCOW_STATUS_MAX_AGE
+        fetches: Dict[str, Callable] = {
+            "aliases": lambda: list(self.mailcow_manager.get_alias_all(max_age=max_age)),
+            "mailboxes": lambda: list(self.mailcow_manager.get_mailbox_all(max_age=max_age)),
+            "rspamd_settings": lambda: self.mailcow_manager.get_internal_alias_rspamd_settings(max_age=max_age),
+        }
+
+        def timed_fetch(fetch: Callable):
+            start = time.perf_counter()
+            try:
+                result = fetch()
+            finally:
+                connections.close_all()
+            return result, (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(max_workers=len(fetches)) as executor:
+            futures = {name: executor.submit(timed_fetch, fetch) for name, fetch in fetches.items()}
+        # Re-raises exceptions that occurred in the worker threads
+        results = {name: future.result() for name, future in futures.items()}
+        timings = {name: duration for name, (_, duration) in results.items()}
+        return results["aliases"][0], results["mailboxes"][0], timings
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.mailcow_manager is None:
@@ -366,10 +443,7 @@ class MailcowStatusView(TemplateView):
 
         context["mailcow_host"] = self.mailcow_manager.mailcow_host
         try:
-            aliases = list(self.mailcow_manager.get_alias_all(use_cache=False))
-            mailboxes = list(self.mailcow_manager.get_mailbox_all(use_cache=False))
-            # Force cache update; we don't care about the result
-            self.mailcow_manager.get_internal_alias_rspamd_settings(use_cache=False)
+            aliases, mailboxes, context["fetch_timings"] = self._fetch_mailcow_state()
         except MailcowAuthException as e:
             context["error"] = "No valid API key set."
         except MailcowAPIReadWriteAccessDenied as e:
@@ -427,7 +501,7 @@ class MailcowStatusView(TemplateView):
         elif request.POST.get("alias_type", None) == "internal_alias":
             # Update Rspamd rule for internal aliases
             try:
-                self.mailcow_manager.update_internal_addresses()
+                self.mailcow_manager.update_internal_addresses(use_cache=False)
             except MailcowException as e:
                 pass
         else:
@@ -1,8 +1,13 @@
+import codecs
 from enum import Enum
+import itertools
 import json
 import logging
+import time
 import requests
-from typing import Generator, List, Optional, Union
+from requests.adapters import HTTPAdapter
+from typing import Any, Generator, Iterable, List, Optional, Tuple, Union
+from urllib3.util.retry import Retry
 
 from mailcow_integration.api.exceptions import *
 from mailcow_integration.api.interface.alias import AliasType, MailcowAlias
@@ -10,6 +15,68 @@ from mailcow_integration.api.interface.mailbox import MailcowMailbox
 from mailcow_integration.api.interface.rspamd import RspamdSettings
 
 logger = logging.getLogger(__name__)
+api_logger = logging.getLogger("mailcow_api")
+
+
+def iter_json_list(chunks: Iterable[str]) -> Generator[Any, None, None]:
+    """Incrementally decodes a JSON list that is received in chunks, yielding each of its items as soon as
+    it is complete. This prevents holding both the entire response and all its decoded items in memory.
+    Raises a `json.JSONDecodeError` if the chunks do not form a valid JSON list.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    exhausted = False
+    # What is expected next: "[", an item (or "]" for an empty list), or a delimiter
+    expecting = "["
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expecting == "[":
+                if char != "[":
+                    raise json.JSONDecodeError("Expecting '['", buffer, pos)
+                pos += 1
+                expecting = "first item"
+                continue
+            elif expecting == "delimiter":
+                if char == "]":
+                    return
+                elif char != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+                pos += 1
+                expecting = "item"
+                continue
+            elif expecting == "first item" and char == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The item may not have been received completely
+                if exhausted:
+                    raise
+            else:
+                # Items ending at the end of the buffer (e.g. numbers) may continue in the next chunk
+                if end < len(buffer) or exhausted:
+                    yield item
+                    pos = end
+                    expecting = "delimiter"
+                    continue
+
+        if exhausted:
+            raise json.JSONDecodeError("Unterminated list", buffer, pos)
+        # Read more data, dropping what was already decoded
+        buffer = buffer[pos:]
+        pos = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+        else:
+            buffer += chunk
 
 
 class RequestType(Enum):
@@ -33,10 +100,48 @@ class MailcowAPIClient:
     """
 
     API_FORMAT = "%(host)s/api/v1/"
-
-    def __init__(self, host: str, api_key: str):
+    # HTTP statuses for which idempotent requests are retried
+    RETRY_STATUSES = (429, 502, 503, 504)
+    # Number of bytes of large list responses that are decoded at once
+    LIST_CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        host: str,
+        api_key: str,
+        timeout: Tuple[float, float] = (5, 30),
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_size: int = 10,
+    ):
         self.host = host
         self.api_key = api_key
+        # (connect, read) timeout in seconds
+        self.timeout = timeout
+        self._session = self._create_session(max_retries, backoff_factor, pool_size)
+
+    def _create_session(self, max_retries: int, backoff_factor: float, pool_size: int) -> requests.Session:
+        """Creates a session that keeps connections to the Mailcow server alive between requests.
+        GET requests are retried (with exponential backoff) on connection errors and on specific
+        HTTP statuses. Other requests are not idempotent, and are only retried if no connection
+        could be made at all.
+        """
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=pool_size)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self) -> None:
+        """Closes all pooled connections"""
+        self._session.close()
 
     def _get_headers(self) -> dict:
         """Retrieves the headers required to fetch info from the Mailcow API."""
@@ -72,13 +177,43 @@ class MailcowAPIClient:
             # API returned an empty response
             raise MailcowIDNotFoundException(f"{request_url} returned an empty response.")
 
+    def _send_request(
+        self,
+        url: str,
+        request_type: RequestType = RequestType.GET,
+        params: dict = None,
+        data: dict = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """Sends a request to the endpoint specified by `url`, with some parameters `params` and some `data`."""
+        logger.info(f"Request made to: {url}")
+        start_time = time.perf_counter()
+        try:
+            res = self._session.request(
+                request_type.value,
+                url,
+                params=params,
+                data=data,
+                headers=self._get_headers(),
+                timeout=self.timeout,
+                stream=stream,
+            )
+        except requests.RequestException as e:
+            api_logger.warning(
+                f"{request_type.name} {url} failed after {(time.perf_counter() - start_time) * 1000:.0f}ms: {e}"
+            )
+            raise MailcowConnectionException(f"{url}: {e}") from e
+        api_logger.info(
+            f"{request_type.name} {url} returned {res.status_code} in {(time.perf_counter() - start_time) * 1000:.0f}ms"
+        )
+        return res
+
     def _make_request(
         self, url: str, request_type: RequestType = RequestType.GET, params: dict = None, data: dict = None
     ) -> Union[dict, list]:
         """Makes a request to the endpoint specified by `url`, with some parameters `params` and some `data`."""
         url = self.API_FORMAT % {"host": self.host} + url
-        logger.info(f"Request made to: {url}")
-        res = requests.request(request_type.value, url, params=params, data=data, headers=self._get_headers())
+        res = self._send_request(url, request_type, params=params, data=data)
 
         try:
             content = res.json()
@@ -95,13 +230,64 @@ class MailcowAPIClient:
 
         return content
 
+    def _make_list_request(self, url: str) -> Generator[dict, None, None]:
+        """Makes a GET request to an endpoint that returns a (potentially large) list. Its items are
+        decoded and yielded while the response is being received (see `iter_json_list`).
+        """
+        url = self.API_FORMAT % {"host": self.host} + url
+        res = self._send_request(url, stream=True)
+
+        # Decode the response ourselves, as the API does not specify a charset
+        decoder = codecs.getincrementaldecoder(res.encoding or "utf-8")(errors="replace")
+        chunks = (decoder.decode(chunk) for chunk in res.iter_content(chunk_size=self.LIST_CHUNK_SIZE))
+        first_chunk = ""
+        try:
+            for first_chunk in chunks:
+                if first_chunk.strip():
+                    break
+
+            if not first_chunk.lstrip().startswith("["):
+                # Not a list; e.g. an error message
+                content = first_chunk + "".join(chunks)
+                res.close()
+        except requests.RequestException as e:
+            res.close()
+            api_logger.warning(f"GET {url} failed while receiving the response: {e}")
+            raise MailcowConnectionException(f"{url}: {e}") from e
+
+        if not first_chunk.lstrip().startswith("["):
+            try:
+                content = json.loads(content)
+            except json.JSONDecodeError:
+                raise MailcowException(f"Unexpected response for {url}: {content}")
+            if isinstance(content, dict):
+                self._verify_response_content(content, url)
+            raise MailcowException(f"Unexpected response for {url}: {content}")
+
+        return self._iter_list_response(res, url, itertools.chain([first_chunk], chunks))
+
+    def _iter_list_response(
+        self, res: requests.Response, url: str, chunks: Iterable[str]
+    ) -> Generator[dict, None, None]:
+        """Yields the items of a list response as they are decoded. Closes the response afterwards"""
+        try:
+            for item in iter_json_list(chunks):
+                self._verify_response_content(item, url)
+                yield item
+        except json.JSONDecodeError as e:
+            raise MailcowException(f"Unexpected response for {url}: {e}")
+        except requests.RequestException as e:
+            api_logger.warning(f"GET {url} failed while receiving the response: {e}")
+            raise MailcowConnectionException(f"{url}: {e}") from e
+        finally:
+            res.close()
+
     ################
     # ALIASES
     ################
     def get_alias_all(self) -> Generator[Optional[MailcowAlias], None, None]:
         """Gets a list of all email aliases"""
-        content = self._make_request(f"get/alias/all")
-        return map(lambda alias: MailcowAlias.from_json(alias), content)
+        return MailcowAlias.from_json_list(self._make_list_request("get/alias/all"))
 
     def get_alias(self, id: int) -> Optional[MailcowAlias]:
         """Gets an email alias with a specific id"""
@@ -178,16 +364,14 @@ class MailcowAPIClient:
     ################
     def get_mailbox_all(self) -> Generator[Optional[MailcowMailbox], None, None]:
         """Gets a list of all mailboxes"""
-        content = self._make_request(f"get/mailbox/all")
-        return map(lambda mailbox: MailcowMailbox.from_json(mailbox), content)
+        return MailcowMailbox.from_json_list(self._make_list_request("get/mailbox/all"))
 
     ################
     # RSPAMD SETTINGS (undocumented API)
     ################
     def get_rspamd_setting_all(self) -> Generator[Optional[RspamdSettings], None, None]:
         """Gets all Rspamd settings maps"""
-        content = self._make_request("get/rsetting/all")
-        return map(lambda rspamdsetting: RspamdSettings.from_json(rspamdsetting), content)
+        return RspamdSettings.from_json_list(self._make_list_request("get/rsetting/all"))
 
     def get_rspamd_setting(self, id: int) -> Optional[RspamdSettings]:
         """Gets an Rspamd settings map with a specific id"""
@@ -2,6 +2,10 @@ class MailcowException(Exception):
     """General exception class for errors raised by the Mailcow API"""
 
 
+class MailcowConnectionException(MailcowException):
+    """Raised if the Mailcow server could not be reached, or did not respond in time"""
+
+
 class MailcowAuthException(MailcowException):
     """Raised if authentication with the Mailcow server fails (invalid API key)"""
 
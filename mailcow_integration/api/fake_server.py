@@ -0,0 +1,323 @@
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from socketserver import ThreadingMixIn
+from typing import Callable, Dict, List, Optional, Tuple
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+##################################################################################
+# A fake, in-memory Mailcow server implementing the (subset of the) API used by the
+#   MailcowAPIClient. Can be used to load test Squire's alias synchronisation
+#   without touching a real Mailcow instance.
+##################################################################################
+
+
+class FakeMailcowAPI:
+    """A WSGI application mimicking the alias, mailbox, and Rspamd settings routes of the Mailcow API (v1).
+    Every request waits for `latency` seconds, after which a fraction (`error_rate`) of the requests fail
+    with an HTTP 503. Keeps track of the number of requests made and the number of bytes transferred.
+    """
+
+    def __init__(self, api_key: str, latency: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.api_key = api_key
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.aliases: Dict[int, dict] = {}
+        self.mailboxes: Dict[str, dict] = {}
+        self.rspamd_settings: Dict[int, dict] = {}
+        self._next_id = 1
+
+        self.request_count = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.requests: List[Tuple[str, str]] = []
+
+        self._routes: List[Tuple[str, re.Pattern, Callable]] = [
+            ("GET", re.compile(r"get/alias/all"), self._get_alias_all),
+            ("GET", re.compile(r"get/alias/(?P<id>\d+)"), self._get_alias),
+            ("POST", re.compile(r"add/alias"), self._add_alias),
+            ("POST", re.compile(r"edit/alias/(?P<id>\d+)"), self._edit_alias),
+            ("POST", re.compile(r"delete/alias"), self._delete_alias),
+            ("GET", re.compile(r"get/mailbox/all"), self._get_mailbox_all),
+            ("GET", re.compile(r"get/rsetting/all"), self._get_rspamd_setting_all),
+            ("GET", re.compile(r"get/rsetting/(?P<id>\d+)"), self._get_rspamd_setting),
+            ("POST", re.compile(r"add/rsetting"), self._add_rspamd_setting),
+            ("POST", re.compile(r"edit/rsetting"), self._edit_rspamd_setting),
+        ]
+
+    ################
+    # State
+    ################
+    def _get_id(self) -> int:
+        new_id = self._next_id
+        self._next_id += 1
+        return new_id
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def add_alias(self, address: str, goto: List[str], public_comment: str = "", active: bool = True) -> dict:
+        """Adds an alias to the server's state"""
+        with self._lock:
+            alias_id = self._get_id()
+            self.aliases[alias_id] = {
+                "in_primary_domain": "",
+                "id": alias_id,
+                "domain": address.rpartition("@")[2],
+                "public_comment": public_comment,
+                "private_comment": None,
+                "goto": ",".join(goto),
+                "address": address,
+                "is_catch_all": 0,
+                "active": int(active),
+                "active_int": int(active),
+                "sogo_visible": 1,
+                "sogo_visible_int": 1,
+                "created": self._now(),
+                "modified": None,
+            }
+            return self.aliases[alias_id]
+
+    def add_mailbox(self, username: str, name: str) -> dict:
+        """Adds a mailbox to the server's state"""
+        local_part, _, domain = username.partition("@")
+        with self._lock:
+            self.mailboxes[username] = {
+                "max_new_quota": 10737418240,
+                "username": username,
+                "rl": False,
+                "rl_scope": "domain",
+                "is_relayed": 0,
+                "name": name,
+                "last_imap_login": 0,
+                "last_smtp_login": 0,
+                "last_pop3_login": 0,
+                "active": 1,
+                "active_int": 1,
+                "domain": domain,
+                "local_part": local_part,
+                "quota": 3221225472,
+                "created": self._now(),
+                "modified": self._now(),
+                "custom_attributes": [],
+                "attributes": {
+                    "force_pw_update": "0",
+                    "tls_enforce_in": "0",
+                    "tls_enforce_out": "0",
+                    "sogo_access": "1",
+                    "mailbox_format": "maildir:",
+                    "quarantine_notification": "never",
+                    "xmpp_access": "0",
+                    "xmpp_admin": "0",
+                    "imap_access": "1",
+                    "pop3_access": "1",
+                    "smtp_access": "1",
+                    "quarantine_category": "reject",
+                    "relayhost": "0",
+                    "sieve_access": "1",
+                    "passwd_update": self._now(),
+                },
+                "quota_used": 0,
+                "percent_in_use": 0,
+                "messages": 0,
+                "spam_aliases": 0,
+                "pushover_active": 0,
+                "percent_class": "success",
+            }
+            return self.mailboxes[username]
+
+    def get_alias_by_address(self, address: str) -> Optional[dict]:
+        """Gets the alias with the given address, if it exists"""
+        with self._lock:
+            return next((alias for alias in self.aliases.values() if alias["address"] == address), None)
+
+    def reset_stats(self) -> None:
+        """Resets the request count and the number of transferred bytes"""
+        with self._lock:
+            self.request_count = 0
+            self.bytes_received = 0
+            self.bytes_sent = 0
+            self.requests = []
+
+    ################
+    # Routes
+    ################
+    @staticmethod
+    def _success(msg: list) -> list:
+        return [{"type": "success", "log": [], "msg": msg}]
+
+    def _get_alias_all(self, data) -> list:
+        with self._lock:
+            return list(self.aliases.values())
+
+    def _get_alias(self, data, id) -> dict:
+        return self.aliases.get(int(id), {})
+
+    @staticmethod
+    def _parse_goto(attrs: dict) -> Optional[str]:
+        if attrs.get("goto_null"):
+            return "null@localhost"
+        elif attrs.get("goto_spam"):
+            return "spam@localhost"
+        elif attrs.get("goto_ham"):
+            return "ham@localhost"
+        return attrs.get("goto")
+
+    def _add_alias(self, data: dict) -> list:
+        if self.get_alias_by_address(data["address"]) is not None:
+            return [{"type": "danger", "log": [], "msg": ["is_alias_or_mailbox", data["address"]]}]
+        alias = self.add_alias(
+            data["address"], self._parse_goto(data).split(","), data.get("public_comment") or "", data.get("active", 1)
+        )
+        alias["private_comment"] = data.get("private_comment")
+        alias["sogo_visible"] = alias["sogo_visible_int"] = int(data.get("sogo_visible", 1))
+        return self._success(["alias_added", alias["address"], alias["id"]])
+
+    def _edit_alias(self, data: dict, id) -> list:
+        alias = self.aliases.get(int(id))
+        if alias is None:
+            return [{"type": "danger", "log": [], "msg": "access_denied"}]
+        attrs = data["attr"]
+        with self._lock:
+            for key in ("address", "public_comment", "private_comment"):
+                if key in attrs:
+                    alias[key] = attrs[key]
+            for key in ("active", "sogo_visible"):
+                if key in attrs:
+                    alias[key] = alias[f"{key}_int"] = int(attrs[key])
+            goto = self._parse_goto(attrs)
+            if goto is not None:
+                alias["goto"] = goto
+            alias["modified"] = self._now()
+        return self._success(["alias_modified", alias["address"]])
+
+    def _delete_alias(self, data: list) -> list:
+        result = []
+        with self._lock:
+            for alias_id in data:
+                alias = self.aliases.pop(int(alias_id), None)
+                if alias is not None:
+                    result += self._success(["alias_removed", alias["address"]])
+        return result
+
+    def _get_mailbox_all(self, data) -> list:
+        with self._lock:
+            return list(self.mailboxes.values())
+
+    def _get_rspamd_setting_all(self, data) -> list:
+        with self._lock:
+            return list(self.rspamd_settings.values())
+
+    def _get_rspamd_setting(self, data, id) -> dict:
+        return self.rspamd_settings.get(int(id), {})
+
+    def _add_rspamd_setting(self, data: dict) -> list:
+        with self._lock:
+            setting_id = self._get_id()
+            self.rspamd_settings[setting_id] = {
+                "id": setting_id,
+                "desc": data["desc"],
+                "content": data["content"],
+                "active": int(data.get("active", 1)),
+            }
+        return self._success(["rsetting_added", data["desc"]])
+
+    def _edit_rspamd_setting(self, data: dict) -> list:
+        with self._lock:
+            for setting_id in data["items"]:
+                setting = self.rspamd_settings.get(int(setting_id))
+                if setting is not None:
+                    setting.update(data["attr"])
+        return self._success(["rsetting_modified", ", ".join(map(str, data["items"]))])
+
+    ################
+    # WSGI
+    ################
+    def _handle(self, method: str, path: str, environ: dict, body: bytes) -> Tuple[str, object]:
+        """Determines the status and JSON content for a request"""
+        if environ.get("HTTP_X_API_KEY") != self.api_key:
+            return "401 Unauthorized", {"type": "error", "msg": "authentication failed"}
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            return "503 Service Unavailable", {"type": "error", "msg": "service unavailable (injected error)"}
+
+        route = path.removeprefix("/api/v1/")
+        for route_method, pattern, view in self._routes:
+            match = pattern.fullmatch(route)
+            if route_method == method and match is not None:
+                try:
+                    data = json.loads(body) if body else None
+                except json.JSONDecodeError:
+                    return "200 OK", {"type": "danger", "msg": "Cannot find attributes in post data"}
+                return "200 OK", view(data, **match.groupdict())
+        return "200 OK", {"type": "error", "msg": "route not found"}
+
+    def __call__(self, environ, start_response):
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        body = environ["wsgi.input"].read(length) if length else b""
+        method, path = environ["REQUEST_METHOD"], environ["PATH_INFO"]
+
+        if self.latency:
+            time.sleep(self.latency)
+        status, content = self._handle(method, path, environ, body)
+        response = json.dumps(content).encode()
+
+        with self._lock:
+            self.request_count += 1
+            self.bytes_received += length
+            self.bytes_sent += len(response)
+            self.requests.append((method, path))
+
+        start_response(status, [("Content-Type", "application/json"), ("Content-Length", str(len(response)))])
+        return [response]
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        # Do not spam stderr with a line per request
+        pass
+
+
+class FakeMailcowServer:
+    """Serves a `FakeMailcowAPI` on a local port in a background thread. Can be used as a context manager."""
+
+    def __init__(self, api: FakeMailcowAPI, host: str = "127.0.0.1", port: int = 0):
+        self.api = api
+        self._server = make_server(
+            host, port, api, server_class=_ThreadingWSGIServer, handler_class=_QuietWSGIRequestHandler
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """The host to pass to the MailcowAPIClient"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeMailcowServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeMailcowServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
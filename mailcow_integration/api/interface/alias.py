@@ -14,7 +14,7 @@ class AliasType(Enum):
     SPAM = "spam@localhost"
 
 
-@dataclass
+@dataclass(slots=True)
 class MailcowAlias(MailcowAPIResponse):
     """Mailcow Alias"""
 
@@ -97,5 +97,6 @@ class MailcowAlias(MailcowAPIResponse):
             new_json["private_comment"] = str(json.get("private_comment") or "")
 
         extra_keys = extra_keys or set()
-        new_json.update(**super().clean(json, extra_keys=new_json.keys() | extra_keys))
+        # dataclass(slots=True) recreates the class, which breaks the zero-argument form of super()
+        new_json.update(**super(MailcowAlias, cls).clean(json, extra_keys=new_json.keys() | extra_keys))
         return new_json
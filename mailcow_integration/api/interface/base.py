@@ -1,32 +1,70 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from datetime import datetime
 from enum import Enum
 import logging
-from typing import Any, Optional, Set, Tuple
+import threading
+from typing import Any, Dict, Generator, Iterable, List, Optional, Set, Tuple
 
 logger = logging.getLogger("mailcow_api")
 
+# Parsing warnings collected for the object that is currently being parsed as part of a list
+_parse_state = threading.local()
+
+
+@contextmanager
+def collect_parse_warnings(warnings: Dict[str, List]):
+    """Collects parsing warnings in `warnings` instead of logging them directly. Maps each
+    warning (without the offending value) to its number of occurrences and the first offending value.
+    """
+    previous_warnings = getattr(_parse_state, "warnings", None)
+    _parse_state.warnings = warnings
+    try:
+        yield warnings
+    finally:
+        _parse_state.warnings = previous_warnings
+
 
 class MailcowAPIResponse(ABC):
     """Abstract base class for Mailcow API responses"""
 
+    __slots__ = ()
+
     _cleanable_bools: Tuple[str, ...] = ()
     _cleanable_strings: Tuple[str, ...] = ()
     _cleanable_ints: Tuple[str, ...] = ()
     _cleanable_datetimes: Tuple[str, ...] = ()
 
+    @classmethod
+    def _log_warning(cls, msg: str, value_msg: str = "") -> None:
+        """Logs a warning, or collects it if a list of objects is being parsed (see `from_json_list`).
+        `value_msg` describes the offending value, and is only included for the first such warning in a list.
+        """
+        warnings = getattr(_parse_state, "warnings", None)
+        if warnings is None:
+            logger.warning(msg + value_msg)
+        elif msg in warnings:
+            warnings[msg][0] += 1
+        else:
+            warnings[msg] = [1, value_msg]
+
     @classmethod
     def _issue_warning(cls, fieldname: str, value, parse_value=""):
         """Writes a warning about field parsing"""
-        msg = f"JSONParseError in {cls.__name__}: Missing required field <{fieldname}>"
-        if value is not None:
-            msg = f"JSONParseError in {cls.__name__}: Field <{fieldname}> value could not be parsed as {parse_value}: <{value}>"
-        logger.warning(msg)
+        if value is None:
+            cls._log_warning(f"JSONParseError in {cls.__name__}: Missing required field <{fieldname}>")
+        else:
+            cls._log_warning(
+                f"JSONParseError in {cls.__name__}: Field <{fieldname}> value could not be parsed as {parse_value}",
+                f": <{value}>",
+            )
 
     @classmethod
     def _issue_extra_warning(cls, fieldname: str, value):
         """Writes a warning about extra fields"""
-        logger.warning(f"JSONParseError in {cls.__name__}: Found extra field <{fieldname}> with value <{value}>")
+        cls._log_warning(
+            f"JSONParseError in {cls.__name__}: Found extra field <{fieldname}>", f" with value <{value}>"
+        )
 
     @classmethod
     def _parse_as_bool(cls, fieldname: str, json: dict, default=None) -> Optional[bool]:
@@ -142,3 +180,28 @@ class MailcowAPIResponse(ABC):
         except AttributeError:
             return None
         return cls(**json)
+
+    @classmethod
+    def _from_json_fast(cls, json: dict):
+        """Creates an instance from a JSON response as part of a list. Subclasses can override this to
+        postpone parsing fields that are rarely used. Defaults to `from_json`.
+        """
+        return cls.from_json(json)
+
+    @classmethod
+    def from_json_list(cls, json_list: Iterable[dict]) -> Generator[Optional["MailcowAPIResponse"], None, None]:
+        """Lazily creates instances from a list of JSON responses, or `None` for those where this was not
+        possible. Rather than once per object, each distinct parsing warning is logged once after the list
+        has been consumed (or consumption stopped early), along with the number of objects it applied to.
+        """
+        warnings: Dict[str, List] = {}
+        total = 0
+        try:
+            for json in json_list:
+                total += 1
+                with collect_parse_warnings(warnings):
+                    instance = cls._from_json_fast(json)
+                yield instance
+        finally:
+            for msg, (count, value_msg) in warnings.items():
+                logger.warning(f"{msg}{value_msg} ({count} of {total} objects)")
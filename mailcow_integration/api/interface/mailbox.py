@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from enum import Enum
 import logging
@@ -32,7 +32,7 @@ class QuarantaineNotificationCategory(Enum):
     ALL = "all"  # All categories
 
 
-@dataclass
+@dataclass(slots=True)
 class MailboxAttributes(MailcowAPIResponse):
     """Additional Mailcow Mailbox attributes"""
 
@@ -88,12 +88,13 @@ class MailboxAttributes(MailcowAPIResponse):
             new_json["recovery_email"] = str(rec)
 
         extra_keys = extra_keys or set()
-        new_json.update(**super().clean(json, extra_keys=new_json.keys() | extra_keys))
+        # dataclass(slots=True) recreates the class, which breaks the zero-argument form of super()
+        new_json.update(**super(MailboxAttributes, cls).clean(json, extra_keys=new_json.keys() | extra_keys))
 
         return new_json
 
 
-@dataclass
+@dataclass(slots=True)
 class MailcowMailbox(MailcowAPIResponse):
     """Mailcow Mailbox"""
 
@@ -129,6 +130,9 @@ class MailcowMailbox(MailcowAPIResponse):
     custom_attributes: Dict[str, str] = field(default_factory=dict)
     tags: List[str] = field(default_factory=list)
 
+    # JSON of which the remaining fields are not yet parsed (see _from_json_fast)
+    _unparsed_json: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+
     _cleanable_bools = ("rl", "is_relayed", "pushover_active")
     _cleanable_strings = ("local_part", "domain", "rl_scope", "percent_class")
     _cleanable_ints = (
@@ -152,6 +156,49 @@ class MailcowMailbox(MailcowAPIResponse):
         if self.active_int is None:
             self.active_int = self.active.value
 
+    @classmethod
+    def _from_json_fast(cls, json: dict):
+        """Only parses the username and name; the other fields are parsed when one of them is first accessed.
+        Warnings about those other fields are therefore logged at that time, rather than for the entire list.
+        """
+        if not isinstance(json.get("username"), str) or not isinstance(json.get("name"), str):
+            # Let the full parser issue warnings
+            return cls.from_json(json)
+
+        mailbox = cls.__new__(cls)
+        mailbox.username = json["username"]
+        mailbox.name = json["name"]
+        mailbox._unparsed_json = json
+        return mailbox
+
+    def __getattr__(self, name: str):
+        # Only called for fields that are not set yet, i.e. for mailboxes created by _from_json_fast
+        if name not in _LAZY_MAILBOX_FIELDS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        json = self._unparsed_json
+        if json is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        parsed = MailcowMailbox(**self.clean(json))
+        for field_name in _LAZY_MAILBOX_FIELDS:
+            setattr(self, field_name, getattr(parsed, field_name))
+        self._unparsed_json = None
+        return getattr(self, name)
+
+    def __getstate__(self):
+        # Do not parse remaining fields when pickling (e.g. when storing mailboxes in the cache)
+        state = {}
+        for slot in self.__slots__:
+            try:
+                state[slot] = object.__getattribute__(self, slot)
+            except AttributeError:
+                pass
+        return state
+
+    def __setstate__(self, state: dict):
+        for slot, value in state.items():
+            object.__setattr__(self, slot, value)
+
     @classmethod
     def clean(cls, json: dict, extra_keys: Set[str] = None):
         username = json.get("username", None)
@@ -204,6 +251,9 @@ class MailcowMailbox(MailcowAPIResponse):
             new_json["percent_in_use"] = percent
 
         extra_keys = extra_keys or set()
-        new_json.update(**super().clean(json, extra_keys=new_json.keys() | extra_keys))
+        new_json.update(**super(MailcowMailbox, cls).clean(json, extra_keys=new_json.keys() | extra_keys))
 
         return new_json
+
+
+_LAZY_MAILBOX_FIELDS = frozenset(f.name for f in fields(MailcowMailbox)) - {"username", "name", "_unparsed_json"}
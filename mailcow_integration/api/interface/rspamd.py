@@ -4,7 +4,7 @@ from typing import Optional, Set
 from mailcow_integration.api.interface.base import MailcowAPIResponse
 
 
-@dataclass
+@dataclass(slots=True)
 class RspamdSettings(MailcowAPIResponse):
     """Rspamd Settings"""
 
@@ -0,0 +1,152 @@
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from committees.models import AssociationGroup, AssociationGroupMembership
+from mailcow_integration.api.fake_server import FakeMailcowAPI, FakeMailcowServer
+from mailcow_integration.squire_mailcow import SquireMailcowManager
+from membership_file.models import Member, MemberYear, Membership
+
+API_KEY = "benchmark-api-key"
+
+MEMBER_ALIASES = {
+    "benchmark-members@example.com": {
+        "title": "Benchmark Members",
+        "description": "All members",
+        "internal": True,
+        "allow_opt_out": False,
+        "default_opt": True,
+        "archive_addresses": ["benchmark-archive@example.com"],
+    },
+    "benchmark-activities@example.com": {
+        "title": "Benchmark Activities",
+        "description": "Members who opted in",
+        "internal": False,
+        "allow_opt_out": True,
+        "default_opt": False,
+        "archive_addresses": ["benchmark-archive@example.com"],
+    },
+}
+COMMITTEE_CONFIGS = {
+    "archive_addresses": ["benchmark-archive@example.com"],
+    "global_addresses": ["benchmark-committees@example.com"],
+    "global_archive_addresses": ["benchmark-archive@example.com"],
+}
+
+SYNC_METHODS = ["update_member_aliases", "update_committee_aliases", "update_global_committee_aliases"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks synchronising aliases against a local fake Mailcow server, using generated members and "
+        "committees. Generated data is rolled back afterwards, and no real Mailcow server is contacted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=2000, help="Number of active members to generate.")
+        parser.add_argument("--committees", type=int, default=100, help="Number of committees to generate.")
+        parser.add_argument("--committee-size", type=int, default=10, help="Number of members per committee.")
+        parser.add_argument(
+            "--aliases", type=int, default=1000, help="Number of unrelated aliases that already exist in Mailcow."
+        )
+        parser.add_argument("--mailboxes", type=int, default=200, help="Number of mailboxes that exist in Mailcow.")
+        parser.add_argument("--latency", type=float, default=5, help="Latency of each API request, in ms.")
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="Fraction of API requests that fail with an HTTP 503."
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Seed for generated data and injected errors.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        api = FakeMailcowAPI(
+            API_KEY, latency=options["latency"] / 1000, error_rate=options["error_rate"], seed=options["seed"]
+        )
+        for i in range(options["aliases"]):
+            api.add_alias(f"benchmark-other-{i}@example.com", [f"benchmark-target-{i}@example.com"], "Not Squire's")
+        for i in range(options["mailboxes"]):
+            api.add_mailbox(f"benchmark-mailbox-{i}@example.com", f"Mailbox {i}")
+
+        # Logging each request would dominate the measurements
+        app_logger = logging.getLogger("mailcow_integration")
+        previous_logging_level = app_logger.level
+        if options["verbosity"] < 2:
+            app_logger.setLevel(logging.WARNING)
+
+        try:
+            with override_settings(
+                MEMBER_ALIASES=MEMBER_ALIASES, COMMITTEE_CONFIGS=COMMITTEE_CONFIGS
+            ), FakeMailcowServer(api) as server, transaction.atomic():
+                self._seed_database(rng, options["members"], options["committees"], options["committee_size"])
+                manager = SquireMailcowManager(server.url, API_KEY)
+
+                self._run_phase("Full sync", manager, api)
+                self._run_phase("Incremental sync (unchanged)", manager, api)
+
+                # Members leave committees and the association
+                memberships = list(AssociationGroupMembership.objects.values_list("id", flat=True))
+                AssociationGroupMembership.objects.filter(
+                    id__in=rng.sample(memberships, len(memberships) // 10)
+                ).delete()
+                members = list(Member.objects.values_list("id", flat=True))
+                Member.objects.filter(id__in=rng.sample(members, len(members) // 10)).update(is_deregistered=True)
+                self._run_phase("Incremental sync (10% changed)", manager, api)
+
+                manager._client.close()
+                # Do not keep any generated data
+                transaction.set_rollback(True)
+        finally:
+            app_logger.setLevel(previous_logging_level)
+
+    def _seed_database(self, rng: random.Random, num_members: int, num_committees: int, committee_size: int):
+        """Creates active members, committees, and committee memberships. Signals are not sent."""
+        year = MemberYear.objects.create(name="Benchmark", is_active=True)
+        members = Member.objects.bulk_create(
+            [
+                Member(
+                    first_name="Member",
+                    last_name=str(i),
+                    legal_name=f"Member {i}",
+                    email=f"benchmark-member-{i}@example.com",
+                )
+                for i in range(num_members)
+            ]
+        )
+        Membership.objects.bulk_create([Membership(member=member, year=year) for member in members])
+
+        committees = AssociationGroup.objects.bulk_create(
+            [
+                AssociationGroup(
+                    name=f"Benchmark Committee {i}",
+                    type=AssociationGroup.COMMITTEE,
+                    contact_email=f"benchmark-committee-{i}@example.com",
+                )
+                for i in range(num_committees)
+            ]
+        )
+        AssociationGroupMembership.objects.bulk_create(
+            [
+                AssociationGroupMembership(group=committee, member=member)
+                for committee in committees
+                for member in rng.sample(members, min(committee_size, len(members)))
+            ]
+        )
+
+    def _run_phase(self, title: str, manager: SquireMailcowManager, api: FakeMailcowAPI):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(
+            f"  {'method':<32} {'time (s)':>9} {'requests':>9} {'sent (kB)':>10} {'recv (kB)':>10} errors"
+        )
+        for method in SYNC_METHODS:
+            api.reset_stats()
+            start_time = time.perf_counter()
+            errors = getattr(manager, method)()
+            duration = time.perf_counter() - start_time
+            # Bytes are seen from the client's perspective
+            self.stdout.write(
+                f"  {method:<32} {duration:>9.3f} {api.request_count:>9} "
+                f"{api.bytes_received / 1000:>10.1f} {api.bytes_sent / 1000:>10.1f} {len(errors)}"
+            )
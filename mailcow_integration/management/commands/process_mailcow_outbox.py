@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mailcow_integration.outbox import drain_alias_outbox
+from mailcow_integration.squire_mailcow import get_mailcow_manager
+
+
+class Command(BaseCommand):
+    help = "Pushes aliases marked as dirty in the alias outbox to Mailcow."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep running, processing the outbox every INTERVAL seconds. Processes the outbox once if omitted.",
+        )
+
+    def handle(self, *args, **options):
+        mailcow_manager = get_mailcow_manager()
+        if mailcow_manager is None:
+            raise CommandError("Mailcow connection is not configured.")
+
+        while True:
+            for address, error in drain_alias_outbox(mailcow_manager):
+                self.stderr.write(f"Could not update {address}: {error}")
+
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
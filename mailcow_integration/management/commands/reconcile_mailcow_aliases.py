@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mailcow_integration.squire_mailcow import get_mailcow_manager
+
+
+class Command(BaseCommand):
+    help = "Makes all Squire-managed Mailcow aliases match Squire's data, only sending aliases that differ."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report which changes would be made, without making them."
+        )
+
+    def handle(self, *args, **options):
+        mailcow_manager = get_mailcow_manager()
+        if mailcow_manager is None:
+            raise CommandError("Mailcow connection is not configured.")
+
+        plan = mailcow_manager.reconcile_aliases(dry_run=options["dry_run"])
+        self.stdout.write(plan.report())
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run; no changes were made."))
+        elif plan.errors:
+            self.stdout.write(self.style.ERROR(f"{len(plan.errors)} aliases could not be updated."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Aliases are up-to-date."))
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="AliasOutboxEntry",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "category",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "Member"), (1, "Global committee"), (2, "Committee")]
+                    ),
+                ),
+                ("address", models.CharField(blank=True, max_length=255)),
+                ("should_delete", models.BooleanField(default=False)),
+                ("marked_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "alias outbox entries",
+                "unique_together": {("category", "address")},
+            },
+        ),
+    ]
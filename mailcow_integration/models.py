@@ -0,0 +1,29 @@
+from django.db import models
+
+from mailcow_integration.squire_mailcow import AliasCategory
+
+
+class AliasOutboxEntry(models.Model):
+    """
+    Marks one or more Mailcow aliases as dirty; i.e. they are no longer in sync with Squire's data.
+    Entries are created in the same transaction as the change that caused them, and are
+    processed asynchronously (`manage.py process_mailcow_outbox`). See mailcow_integration/outbox.py
+    """
+
+    category = models.PositiveSmallIntegerField(
+        choices=[(category.value, category.name.replace("_", " ").capitalize()) for category in AliasCategory]
+    )
+    # An empty address marks all aliases in the category as dirty
+    address = models.CharField(max_length=255, blank=True)
+    # Whether the alias should be deleted instead of updated
+    should_delete = models.BooleanField(default=False)
+    # Updated whenever the same alias is marked as dirty again
+    marked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [["category", "address"]]
+        verbose_name_plural = "alias outbox entries"
+
+    def __str__(self):
+        action = "Delete" if self.should_delete else "Update"
+        return f"{action} {self.get_category_display()} alias: {self.address or 'all'}"
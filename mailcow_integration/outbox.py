@@ -0,0 +1,114 @@
+from typing import Dict, List, Optional, Tuple
+
+from django.apps import apps
+from django.db import transaction
+
+from mailcow_integration.api.exceptions import MailcowException
+from mailcow_integration.squire_mailcow import AliasCategory, SquireMailcowManager
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MailcowAliasOutbox:
+    """Records which Mailcow aliases need to be updated, rather than updating them immediately.
+    Has the same interface as the update methods of `SquireMailcowManager`, but only stores
+    "alias X is dirty" marks in the database. This happens inside the current transaction, so
+    marks are only stored if the change that caused them is committed as well. Multiple marks
+    for the same alias are deduplicated.
+
+    The outbox is drained by `drain_alias_outbox`, which coalesces all marks into a single
+    API update per alias.
+    """
+
+    def __init__(self):
+        # Cannot import directly because this class is imported before the app registry is set up
+        self._entry_model = apps.get_model("mailcow_integration", "AliasOutboxEntry")
+
+    def _mark(self, category: AliasCategory, address: str = "", should_delete: bool = False) -> None:
+        self._entry_model.objects.update_or_create(
+            category=category.value, address=address, defaults={"should_delete": should_delete}
+        )
+
+    def update_member_aliases(self) -> None:
+        """Marks all member aliases as dirty"""
+        self._mark(AliasCategory.MEMBER)
+
+    def update_committee_aliases(self, limit_update_to: Optional[List[str]] = None) -> None:
+        """Marks all committee aliases, or a subset thereof, as dirty"""
+        if limit_update_to is None:
+            self._mark(AliasCategory.COMMITTEE)
+            return
+        for address in limit_update_to:
+            if address is not None:
+                self._mark(AliasCategory.COMMITTEE, address)
+
+    def update_global_committee_aliases(self) -> None:
+        """Marks all global committee aliases as dirty"""
+        self._mark(AliasCategory.GLOBAL_COMMITTEE)
+
+    def delete_aliases(self, alias_addresses: List[str]) -> None:
+        """Marks committee aliases for deletion"""
+        for address in alias_addresses:
+            self._mark(AliasCategory.COMMITTEE, address, should_delete=True)
+
+
+def get_alias_outbox() -> MailcowAliasOutbox:
+    """Obtains the outbox that signals use to mark aliases as dirty"""
+    return MailcowAliasOutbox()
+
+
+def drain_alias_outbox(mailcow_manager: SquireMailcowManager) -> List[Tuple[str, MailcowException]]:
+    """Processes all dirty marks in the outbox. Deletions are processed first, followed by member, committee,
+    and global committee aliases; within a category, aliases are processed in the order in which they were
+    last marked. Marks are coalesced, so each alias is updated at most once; marking an entire category as dirty
+    supersedes marks for individual aliases in that category. Processed marks are removed from the
+    outbox, unless the alias was marked again in the meantime, or its update failed.
+    Returns a list of addresses for which the API returned an error.
+    """
+    entry_model = apps.get_model("mailcow_integration", "AliasOutboxEntry")
+    entries = list(entry_model.objects.order_by("marked_at", "id"))
+    if not entries:
+        return []
+
+    errors_by_category: Dict[int, List[Tuple[str, MailcowException]]] = {c.value: [] for c in AliasCategory}
+    dirty_categories = {entry.category for entry in entries if not entry.address}
+    committee_entries = [
+        entry for entry in entries if entry.category == AliasCategory.COMMITTEE.value and entry.address
+    ]
+
+    # Deletions go first; a deleted committee alias also influences the global committee aliases
+    deleted_addresses = [entry.address for entry in committee_entries if entry.should_delete]
+    if deleted_addresses:
+        logger.info(f"Deleting aliases from the outbox: {', '.join(deleted_addresses)}")
+        error = mailcow_manager.delete_aliases(deleted_addresses)
+        if error is not None:
+            errors_by_category[AliasCategory.COMMITTEE.value] += [(address, error) for address in deleted_addresses]
+
+    if AliasCategory.MEMBER.value in dirty_categories:
+        errors_by_category[AliasCategory.MEMBER.value] += mailcow_manager.update_member_aliases()
+
+    if AliasCategory.COMMITTEE.value in dirty_categories:
+        errors_by_category[AliasCategory.COMMITTEE.value] += mailcow_manager.update_committee_aliases()
+    else:
+        updated_addresses = [entry.address for entry in committee_entries if not entry.should_delete]
+        if updated_addresses:
+            errors_by_category[AliasCategory.COMMITTEE.value] += mailcow_manager.update_committee_aliases(
+                updated_addresses
+            )
+
+    if AliasCategory.GLOBAL_COMMITTEE.value in dirty_categories:
+        errors_by_category[AliasCategory.GLOBAL_COMMITTEE.value] += mailcow_manager.update_global_committee_aliases()
+
+    # Remove processed entries
+    with transaction.atomic():
+        for entry in entries:
+            category_errors = errors_by_category[entry.category]
+            if any(entry.address in (address, "") for address, _ in category_errors):
+                # Failed; retry next time
+                continue
+            # Entries that were marked again in the meantime have a different marked_at
+            entry_model.objects.filter(id=entry.id, marked_at=entry.marked_at).delete()
+
+    return [error for category_errors in errors_by_category.values() for error in category_errors]
@@ -6,13 +6,16 @@ from django.db.models.signals import pre_save, post_save, pre_delete, post_delet
 from dynamic_preferences.registries import global_preferences_registry
 
 
-from mailcow_integration.squire_mailcow import SquireMailcowManager, get_mailcow_manager
+from mailcow_integration.outbox import MailcowAliasOutbox, get_alias_outbox
 
 __all__ = ["register_signals", "deregister_signals", "global_preference_required_for_signal"]
 
 
 def register_signals() -> None:
-    """Registers signals that handle Mailcow aliases"""
+    """Registers signals that handle Mailcow aliases. These signals do not contact the Mailcow API
+    themselves; instead they mark aliases as dirty in the alias outbox, which is processed
+    asynchronously by the `process_mailcow_outbox` management command.
+    """
     for signal_method, call_method, sender, dispatch_uid in ALIAS_SIGNALS:
         signal_method.connect(call_method, sender=sender, dispatch_uid=dispatch_uid)
 
@@ -81,28 +84,28 @@ def post_save_member(sender, instance, created: bool, raw: bool, **kwargs) -> No
         return
 
     # Update member/committee mail aliases
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
 
     # Update member aliases
     if instance.is_active:
-        mailcow_client.update_member_aliases()
+        alias_outbox.update_member_aliases()
 
     # Update committee aliases (only for committees the member is part of)
     comm_model = apps.get_model("committees", "AssociationGroup")
     addresses = comm_model.objects.filter(members__email=instance.email).values_list("contact_email", flat=True)
     if addresses:
-        mailcow_client.update_committee_aliases(addresses)
+        alias_outbox.update_committee_aliases(addresses)
 
 
 @global_preference_required_for_signal
 def post_delete_member(sender, instance, **kwargs):
     """Update member and committee aliases when a member is deleted"""
     # Update member/committee mail aliases
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
 
     # Update member aliases
     if instance.is_active:
-        mailcow_client.update_member_aliases()
+        alias_outbox.update_member_aliases()
 
     # NOTE: No need to update committee aliases; members cannot be deleted when they are part of one
     comm_model = apps.get_model("committees", "AssociationGroup")
@@ -143,7 +146,7 @@ def post_save_committee(sender, instance, created: bool, raw: bool, **kwargs):
     """
     if raw:
         return
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
     comm_model = apps.get_model("committees", "AssociationGroup")
 
     should_remove = False
@@ -165,8 +168,8 @@ def post_save_committee(sender, instance, created: bool, raw: bool, **kwargs):
     if should_remove:
         # Delete alias. If a committee changes their email and is at the same time no
         #   longer eligible for an alias, we still need to pass over the old email to Mailcow.
-        mailcow_client.delete_aliases([instance._mailcow_old_data["email"]])
-        mailcow_client.update_global_committee_aliases()
+        alias_outbox.delete_aliases([instance._mailcow_old_data["email"]])
+        alias_outbox.update_global_committee_aliases()
         return
 
     if instance._mailcow_old_data["email"] == instance.contact_email:
@@ -180,8 +183,8 @@ def post_save_committee(sender, instance, created: bool, raw: bool, **kwargs):
 
     # Update the committee's alias, and update all global committee aliases
     # TODO: when email changes, an orphan address is currently left behind and a new one is created
-    mailcow_client.update_committee_aliases([instance.contact_email])
-    mailcow_client.update_global_committee_aliases()
+    alias_outbox.update_committee_aliases([instance.contact_email])
+    alias_outbox.update_global_committee_aliases()
 
 
 @global_preference_required_for_signal
@@ -196,9 +199,9 @@ def post_delete_committee(sender, instance, **kwargs):
         # Committee had no email, or was not eligible for an alias
         return
     # Delete alias
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
-    mailcow_client.delete_aliases([instance.contact_email])
-    mailcow_client.update_global_committee_aliases()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
+    alias_outbox.delete_aliases([instance.contact_email])
+    alias_outbox.update_global_committee_aliases()
 
 
 #########################################
@@ -235,7 +238,7 @@ def post_save_committee_membership(sender, instance, created: bool, raw: bool, *
     if raw:
         return
 
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
 
     if created:
         comm_model = apps.get_model("committees", "AssociationGroup")
@@ -245,7 +248,7 @@ def post_save_committee_membership(sender, instance, created: bool, raw: bool, *
             and instance.group.type in [comm_model.COMMITTEE, comm_model.ORDER, comm_model.WORKGROUP]
             and instance.group.contact_email is not None
         ):
-            mailcow_client.update_committee_aliases([instance.group.contact_email])
+            alias_outbox.update_committee_aliases([instance.group.contact_email])
         return
     elif (
         instance.group_id == instance._mailcow_old_data["committee"].id
@@ -258,7 +261,7 @@ def post_save_committee_membership(sender, instance, created: bool, raw: bool, *
     if instance.group_id != instance._mailcow_old_data["committee"].id:
         # Committee changed; need to update two aliases instead of one
         groups = [instance.group.contact_email, instance._mailcow_old_data["committee"].contact_email]
-    mailcow_client.update_committee_aliases(groups)
+    alias_outbox.update_committee_aliases(groups)
 
 
 @global_preference_required_for_signal
@@ -267,8 +270,8 @@ def post_delete_committee_membership(sender, instance, **kwargs):
     if instance.member is None:
         return
     # Update all member and committee aliases
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
-    mailcow_client.update_committee_aliases([instance.group.contact_email])
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
+    alias_outbox.update_committee_aliases([instance.group.contact_email])
 
 
 #########################################
@@ -319,10 +322,10 @@ def post_save_memberyear(sender, instance, created: bool, raw: bool, **kwargs):
         # Active years haven't changed; active members can't have changed either
         return
 
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
     # Update all member and committee aliases
-    mailcow_client.update_member_aliases()
-    mailcow_client.update_committee_aliases()
+    alias_outbox.update_member_aliases()
+    alias_outbox.update_committee_aliases()
 
 
 @global_preference_required_for_signal
@@ -331,9 +334,9 @@ def post_delete_memberyear(sender, instance, **kwargs):
     if not instance.is_active:
         return
     # Update all member and committee aliases
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
-    mailcow_client.update_member_aliases()
-    mailcow_client.update_committee_aliases()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
+    alias_outbox.update_member_aliases()
+    alias_outbox.update_committee_aliases()
 
 
 #########################################
@@ -384,13 +387,13 @@ def post_save_membership(sender, instance, created: bool, raw: bool, **kwargs):
         return
 
     # Update all member and committee aliases
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
     if not created or instance.member.is_active:
         # Only need to update member aliases if the member was updated,
         #   or if the newly added member is active.
-        mailcow_client.update_member_aliases()
+        alias_outbox.update_member_aliases()
     # Always update committee aliases; they can include non-active members
-    mailcow_client.update_committee_aliases()
+    alias_outbox.update_committee_aliases()
 
 
 @global_preference_required_for_signal
@@ -409,11 +412,11 @@ def post_delete_membership(sender, instance, **kwargs):
     if instance.member is None or not instance.year.is_active:
         return
     # Update all member and committee aliases
-    mailcow_client: SquireMailcowManager = get_mailcow_manager()
+    alias_outbox: MailcowAliasOutbox = get_alias_outbox()
     if instance._mailcow_old_data["is_active"]:
-        mailcow_client.update_member_aliases()
+        alias_outbox.update_member_aliases()
     # Always update committee aliases; they can include non-active members
-    mailcow_client.update_committee_aliases()
+    alias_outbox.update_committee_aliases()
 
 
 #########################################
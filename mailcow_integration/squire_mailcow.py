@@ -1,9 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from dataclasses import dataclass, field
 from enum import Enum
+import functools
+import hashlib
 import re
-from typing import Dict, Optional, List, Tuple
+import threading
+import time
+from typing import Dict, Optional, List, Set, Tuple
 
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import QuerySet, Exists, OuterRef
 from django.template.loader import get_template
 
@@ -25,6 +33,26 @@ def get_mailcow_manager() -> Optional["SquireMailcowManager"]:
     return apps.get_app_config("mailcow_integration").mailcow_client
 
 
+def alias_operation(method):
+    """Decorates a public method of the SquireMailcowManager that works with the aliases, so that the shared
+    alias state version is read from the cache once per call, rather than on each access to the aliases.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "SquireMailcowManager", *args, **kwargs):
+        if getattr(self._operation_state, "alias_version", None) is not None:
+            # Part of another operation
+            return method(self, *args, **kwargs)
+
+        self._operation_state.alias_version = self._read_alias_state_version()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._operation_state.alias_version = None
+
+    return wrapper
+
+
 class AliasCategory(Enum):
     """Squire's Mailcow Aliases can exist in different forms.
     1. Member aliases are used to email all Squire Members active in the current year.
@@ -38,6 +66,68 @@ class AliasCategory(Enum):
     COMMITTEE = 2  # Addresses for emailing specific committees and its members
 
 
+class AliasAction(Enum):
+    """What needs to happen to a Mailcow alias to make it match Squire's data"""
+
+    CREATE = "create"  # Alias does not yet exist
+    UPDATE = "update"  # Alias exists, but its goto addresses or flags differ
+    DELETE = "delete"  # Alias is managed by Squire, but should no longer exist
+    UNCHANGED = "unchanged"  # Alias is already up-to-date
+    SKIP = "skip"  # Alias cannot be modified; e.g. it is not managed by Squire
+
+
+@dataclass
+class AliasChange:
+    """A single planned modification of a Mailcow alias"""
+
+    address: str
+    action: AliasAction
+    goto: List[str] = field(default_factory=list)
+    public_comment: str = ""
+    category: Optional[AliasCategory] = None
+    alias: Optional[MailcowAlias] = None  # The alias as it currently exists in Mailcow (if any)
+    reason: str = ""
+
+    def __str__(self) -> str:
+        text = f"{self.action.value.upper()} {self.address}"
+        if self.action in (AliasAction.CREATE, AliasAction.UPDATE):
+            text += f" ({len(self.goto)} goto addresses)"
+        if self.reason:
+            text += f": {self.reason}"
+        return text
+
+
+@dataclass
+class AliasReconciliationPlan:
+    """The set of changes needed to make Mailcow's aliases match Squire's data.
+    Can be inspected (e.g. for a dry run) before it is applied.
+    """
+
+    changes: List[AliasChange] = field(default_factory=list)
+    errors: List[Tuple[str, MailcowException]] = field(default_factory=list)
+    applied: bool = False
+
+    def get_changes(self, action: AliasAction) -> List[AliasChange]:
+        """Gets all changes with a specific action"""
+        return [change for change in self.changes if change.action == action]
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether applying this plan results in any API writes"""
+        return any(
+            change.action in (AliasAction.CREATE, AliasAction.UPDATE, AliasAction.DELETE) for change in self.changes
+        )
+
+    def report(self) -> str:
+        """A human-readable overview of this plan"""
+        lines = [
+            ", ".join(f"{len(self.get_changes(action))} {action.value}" for action in AliasAction),
+        ]
+        lines += [str(change) for change in self.changes if change.action != AliasAction.UNCHANGED]
+        lines += [f"ERROR {address}: {error}" for address, error in self.errors]
+        return "\n".join(lines)
+
+
 class SquireMailcowManager:
     """All interactions Squire makes with the Mailcow API are handled through this class.
     It is responsible for adding members' emails to a group of member aliases (depending
@@ -58,13 +148,21 @@ class SquireMailcowManager:
     ALIAS_COMMITTEE_PUBLIC_COMMENT = f"{SQUIRE_MANAGE_INDICATOR} Committee Alias"
     ALIAS_MEMBERS_PUBLIC_COMMENT = f"{SQUIRE_MANAGE_INDICATOR} Members Alias"
     ALIAS_GLOBAL_COMMITTEE_PUBLIC_COMMENT = f"{SQUIRE_MANAGE_INDICATOR} Global Committee Alias"
+    # Matches the rule in the internal alias settings that lists the (regex-escaped) internal addresses
+    INTERNAL_ALIAS_RCPT_REGEX = re.compile(r'rcpt = "/\^\((?P<addresses>[^"\n]*)\)\$/"')
 
     def __init__(self, mailcow_host: str, mailcow_api_key: str):
-        self._client = MailcowAPIClient(mailcow_host, mailcow_api_key)
+        self._client = MailcowAPIClient(
+            mailcow_host,
+            mailcow_api_key,
+            timeout=settings.MAILCOW_API_TIMEOUT,
+            max_retries=settings.MAILCOW_API_MAX_RETRIES,
+        )
 
         # Cannot import directly because this class is initialized before the app registry is set up
         self._member_model = apps.get_model("membership_file", "Member")
         self._committee_model = apps.get_model("committees", "AssociationGroup")
+        self._committee_membership_model = apps.get_model("committees", "AssociationGroupMembership")
         self._user_preferences_model = apps.get_model("dynamic_preferences_users", "UserPreferenceModel")
 
         # List of internal addresses (sorted in order of appearance in the config)
@@ -80,10 +178,25 @@ class SquireMailcowManager:
         # Caches
         self._internal_rspamd_setting_whitelist: Optional[RspamdSettings] = None
         self._internal_rspamd_setting_blacklist: Optional[RspamdSettings] = None
+        self._internal_rspamd_setting_time = 0.0
+        self._internal_addresses_cache: Optional[Tuple[Tuple[str, str], Set[str]]] = None
+        self._internal_alias_fingerprint: Optional[Tuple[List[str], str]] = None
+        # Local copies of the snapshots in the shared cache (see get_alias_all)
         self._alias_cache: Optional[List[MailcowAlias]] = None
+        self._alias_cache_version: Optional[int] = None
+        self._alias_cache_time = 0.0
+        self._alias_cache_unsaved = False
+        # Whether the local alias snapshot contains created aliases, whose ids are not known
+        self._alias_cache_incomplete = False
         self._mailbox_cache: Optional[List[MailcowMailbox]] = None
+        self._mailbox_cache_time = 0.0
+        # Maps are derived from (and rebuilt along with) the lists above
         self._alias_map_cache: Optional[Dict[str, MailcowAlias]] = None
+        self._alias_map_source: Optional[List[MailcowAlias]] = None
         self._mailbox_map_cache: Optional[Dict[str, MailcowMailbox]] = None
+        self._mailbox_map_source: Optional[List[MailcowMailbox]] = None
+        # Alias state version of the operation that is running in the current thread (see alias_operation)
+        self._operation_state = threading.local()
 
     @property
     def mailcow_host(self):
@@ -111,23 +224,35 @@ class SquireMailcowManager:
         return list(queryset.values_list(email_field, flat=True))
 
     def get_internal_alias_rspamd_settings(
-        self, use_cache=True
+        self, use_cache=True, max_age: Optional[float] = None
     ) -> Tuple[Optional[RspamdSettings], Optional[RspamdSettings]]:
         """Gets the Rspamd settings (if it exists) that disallows external domains
         to send emails to a specific set of email addresses. Squire recognises
         which Rspamd setting to find based on the setting's name.
         See `self.INTERNAL_ALIAS_SETTING_NAME`
+        Uses the shared cache unless `use_cache` is False. If `max_age` is passed, cached settings
+        older than that many seconds are not used.
         """
-        if (
-            self._internal_rspamd_setting_whitelist is not None
-            and self._internal_rspamd_setting_blacklist is not None
-            and use_cache
-        ):
-            return self._internal_rspamd_setting_whitelist, self._internal_rspamd_setting_blacklist
-
-        self._internal_rspamd_setting_whitelist = None
-        self._internal_rspamd_setting_blacklist = None
-
+        if use_cache:
+            if (
+                self._internal_rspamd_setting_whitelist is not None
+                and self._internal_rspamd_setting_blacklist is not None
+                and self._is_snapshot_fresh(self._internal_rspamd_setting_time, max_age)
+            ):
+                return self._internal_rspamd_setting_whitelist, self._internal_rspamd_setting_blacklist
+
+            snapshot = cache.get(self._get_state_cache_key("internal_alias_settings"))
+            if snapshot is not None and self._is_snapshot_fresh(snapshot[1], max_age):
+                (
+                    _,
+                    self._internal_rspamd_setting_time,
+                    self._internal_rspamd_setting_whitelist,
+                    self._internal_rspamd_setting_blacklist,
+                ) = snapshot
+                return self._internal_rspamd_setting_whitelist, self._internal_rspamd_setting_blacklist
+
+        setting_w = None
+        setting_b = None
         # Fetch all Rspamd settings
         settings = self._client.get_rspamd_setting_all()
         for setting in settings:
@@ -135,31 +260,96 @@ class SquireMailcowManager:
                 continue
             # Setting description matches the one we normally set
             if setting.desc == self.INTERNAL_ALIAS_SETTING_NAME % self.INTERNAL_ALIAS_SETTING_WHITELIST_NAME:
-                self._internal_rspamd_setting_whitelist = setting
+                setting_w = setting
             elif setting.desc == self.INTERNAL_ALIAS_SETTING_NAME % self.INTERNAL_ALIAS_SETTING_BLACKLIST_NAME:
-                self._internal_rspamd_setting_blacklist = setting
-        return (self._internal_rspamd_setting_whitelist, self._internal_rspamd_setting_blacklist)
+                setting_b = setting
+
+        # Settings that did not change since they were last brought up-to-date keep their fingerprint
+        fingerprint = None
+        snapshot = cache.get(self._get_state_cache_key("internal_alias_settings"))
+        if snapshot is not None and self._is_same_rspamd_settings((setting_w, setting_b), snapshot[2:]):
+            fingerprint = snapshot[0]
+        self._set_internal_alias_rspamd_settings(setting_w, setting_b, fingerprint)
+        return setting_w, setting_b
+
+    @staticmethod
+    def _is_same_rspamd_settings(
+        settings: Tuple[Optional[RspamdSettings], ...], other_settings: Tuple[Optional[RspamdSettings], ...]
+    ) -> bool:
+        return all(
+            setting is not None
+            and other is not None
+            and (setting.id, setting.content, setting.active) == (other.id, other.content, other.active)
+            for setting, other in zip(settings, other_settings)
+        )
+
+    def _set_internal_alias_rspamd_settings(
+        self, setting_w: Optional[RspamdSettings], setting_b: Optional[RspamdSettings], fingerprint: Optional[str]
+    ) -> None:
+        """Stores the Rspamd settings as they currently exist in Mailcow, and shares them with other processes.
+        `fingerprint` is that of the internal addresses and templates the settings are known to be up-to-date with.
+        """
+        self._internal_rspamd_setting_whitelist = setting_w
+        self._internal_rspamd_setting_blacklist = setting_b
+        self._internal_rspamd_setting_time = time.time()
+
+        key = self._get_state_cache_key("internal_alias_settings")
+        if setting_w is None or setting_b is None:
+            cache.delete(key)
+        else:
+            cache.set(
+                key,
+                (fingerprint, self._internal_rspamd_setting_time, setting_w, setting_b),
+                timeout=settings.MAILCOW_STATE_CACHE_TIMEOUT,
+            )
+
+    def _get_internal_addresses(self, content_w: str, content_b: str) -> Set[str]:
+        """Gets the addresses that occur in the rcpt-rules of both settings' contents.
+        These are only parsed once for each (new) pair of contents.
+        """
+        if self._internal_addresses_cache is None or self._internal_addresses_cache[0] != (content_w, content_b):
+            addresses = None
+            for content in (content_w, content_b):
+                content_addresses = {
+                    # Addresses are regex-escaped in the rule
+                    re.sub(r"\\(.)", r"\1", address)
+                    for rule in self.INTERNAL_ALIAS_RCPT_REGEX.finditer(content)
+                    for address in rule.group("addresses").split("|")
+                }
+                addresses = content_addresses if addresses is None else addresses & content_addresses
+            self._internal_addresses_cache = ((content_w, content_b), addresses)
+        return self._internal_addresses_cache[1]
 
     def is_address_internal(self, address: str) -> bool:
         """Whether an alias address is made internal by means of an Rspamd setting"""
         setting_w, setting_b = self.get_internal_alias_rspamd_settings()
         if setting_w is None or not setting_w.active or setting_b is None or not setting_b.active:
             return False
+        return address in self._get_internal_addresses(setting_w.content, setting_b.content)
 
-        prefix = re.escape('rcpt = "/^(')
-        suffix = re.escape(')$/"')
-        wildcard = '[^"\n]*'
-        # Double escape since we're using regex to find a match ourselves
-        address = re.escape(re.escape(address))
-        mtch_w = re.search(f"{prefix}{wildcard}{address}{wildcard}{suffix}", setting_w.content)
-        mtch_b = re.search(f"{prefix}{wildcard}{address}{wildcard}{suffix}", setting_b.content)
-        return mtch_w is not None and mtch_b is not None
-
-    def update_internal_alias_setting(self, addresses: List[str], setting: RspamdSettings, is_whitelist_setting: bool):
-        """Updates the allow/block setting"""
+    def _get_internal_alias_fingerprint(self, addresses: List[str]) -> str:
+        """Gets a fingerprint of the Rspamd settings' contents for the given (escaped) addresses. That is, of
+        the addresses themselves, the setting names, and the templates used to render the settings.
+        """
+        if self._internal_alias_fingerprint is None or self._internal_alias_fingerprint[0] != addresses:
+            fingerprint = hashlib.sha256()
+            for subtemplate_name in ("allow", "block"):
+                template = get_template("mailcow_integration/internal_mailbox_%s.conf" % subtemplate_name)
+                fingerprint.update(template.template.source.encode())
+            fingerprint.update(self.INTERNAL_ALIAS_SETTING_NAME.encode())
+            fingerprint.update("|".join(addresses).encode())
+            self._internal_alias_fingerprint = (list(addresses), fingerprint.hexdigest())
+        return self._internal_alias_fingerprint[1]
+
+    def update_internal_alias_setting(
+        self, addresses: List[str], setting: RspamdSettings, is_whitelist_setting: bool
+    ) -> Optional[RspamdSettings]:
+        """Updates the allow/block setting. Returns the setting as it now exists in Mailcow,
+        or `None` if it was newly created (as its id is unknown).
+        """
         if setting is not None and setting.active and f'rcpt = "/^({"|".join(addresses)})$/"' in setting.content:
             # Setting already exists, is active, and is up-to-date; no need to do anything
-            return
+            return setting
 
         # Setting emails are different than from what we expect, or the setting
         #   does not yet exist
@@ -178,16 +368,20 @@ class SquireMailcowManager:
         if setting.id is None:
             # Setting does not yet exist
             self._client.create_rspamd_setting(setting)
-        else:
-            # Setting exists but should be updated
-            self._client.update_rspamd_setting(setting)
+            return None
+        # Setting exists but should be updated
+        self._client.update_rspamd_setting(setting)
+        return setting
 
-    def update_internal_addresses(self) -> None:
+    def update_internal_addresses(self, use_cache=True) -> None:
         """Makes specific member aliases 'internal'. That is, these aliases can only
         be emailed from within one of the domains set up in Mailcow.
         See `templates/internal_mailbox_<allow/block>.conf` for the Rspamd configuration used to
         achieve this.
 
+        No requests are made if the settings were already brought up-to-date with the same addresses
+        and templates (according to the shared cache), unless `use_cache` is False.
+
         Example:
             `@example.com` is a domain set up in Mailcow
             members@example.com is an internal member address according to Squire's mailcowconfig.json
@@ -200,44 +394,188 @@ class SquireMailcowManager:
         addresses = self.INTERNAL_ALIAS_ADDRESSES
         addresses = list(map(lambda addr: re.escape(addr), addresses))
 
+        fingerprint = self._get_internal_alias_fingerprint(addresses)
+        if use_cache:
+            snapshot = cache.get(self._get_state_cache_key("internal_alias_settings"))
+            if snapshot is not None and snapshot[0] == fingerprint and self._is_snapshot_fresh(snapshot[1]):
+                return
+
         setting_w, setting_b = self.get_internal_alias_rspamd_settings(use_cache=False)
-        self.update_internal_alias_setting(addresses, setting_w, True)
-        self.update_internal_alias_setting(addresses, setting_b, False)
-
-    def get_alias_all(self, use_cache=True) -> List[MailcowAlias]:
-        """Gets all email aliases"""
-        if use_cache and self._alias_cache is not None:
-            return self._alias_cache
-        self._alias_cache = [a for a in self._client.get_alias_all() if a is not None]
+        setting_w = self.update_internal_alias_setting(addresses, setting_w, True)
+        setting_b = self.update_internal_alias_setting(addresses, setting_b, False)
+        self._set_internal_alias_rspamd_settings(setting_w, setting_b, fingerprint)
+
+    ################
+    # SHARED STATE CACHE
+    # Snapshots of all aliases and mailboxes are stored in Django's cache, so that they are
+    #   shared between processes (provided that a shared cache backend is configured; see CACHES
+    #   in the settings). Snapshots expire after `settings.MAILCOW_STATE_CACHE_TIMEOUT`
+    #   seconds. Alias snapshots are additionally tagged with a version that is bumped whenever
+    #   Squire itself modifies aliases, invalidating all snapshots taken before that modification.
+    #   The version is read once per operation (see alias_operation).
+    ################
+    def _get_state_cache_key(self, name: str) -> str:
+        return f"mailcow_state:{self.mailcow_host}:{name}"
+
+    def get_alias_state_version(self) -> int:
+        """Gets the current version of the aliases in Mailcow, as read at the start of the current operation"""
+        version = getattr(self._operation_state, "alias_version", None)
+        if version is not None:
+            return version
+        return self._read_alias_state_version()
+
+    def _read_alias_state_version(self) -> int:
+        """Reads the current version of the aliases in Mailcow from the shared cache"""
+        key = self._get_state_cache_key("alias_version")
+        version = cache.get(key)
+        if version is None:
+            # Start at an arbitrary version, so snapshots from before the version was lost are never reused
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def _mark_aliases_modified(self, state_known: bool = True) -> None:
+        """Marks aliases as modified by Squire, invalidating all snapshots of other processes. If the new
+        state is known (i.e. the local snapshot was updated accordingly), then the local snapshot is kept
+        so it can be shared later (see `_save_alias_cache`). Otherwise, it is discarded.
+        """
+        key = self._get_state_cache_key("alias_version")
+        try:
+            version = cache.incr(key)
+        except ValueError:
+            # Version expired or was evicted
+            version = self._read_alias_state_version()
+        if getattr(self._operation_state, "alias_version", None) is not None:
+            self._operation_state.alias_version = version
+
+        if state_known and self._alias_cache is not None:
+            self._alias_cache_version = version
+            self._alias_cache_unsaved = True
+        else:
+            self._alias_cache = None
+            self._alias_cache_unsaved = False
+            self._alias_cache_incomplete = False
+
+    def _save_alias_cache(self) -> None:
+        """Shares the local alias snapshot with other processes, if it was modified by Squire.
+        Snapshots containing created aliases are never shared, as those aliases lack their ids.
+        """
+        if self._alias_cache_unsaved and self._alias_cache is not None and not self._alias_cache_incomplete:
+            cache.set(
+                self._get_state_cache_key("aliases"),
+                (self._alias_cache_version, self._alias_cache_time, self._alias_cache),
+                timeout=settings.MAILCOW_STATE_CACHE_TIMEOUT,
+            )
+        self._alias_cache_unsaved = False
+
+    def _finish_alias_changes(self) -> None:
+        """Called after a batch of alias changes. If aliases were created, all aliases are refetched once
+        (as the ids of the created aliases are not known). Otherwise, the local snapshot is shared.
+        """
+        if not self._alias_cache_incomplete:
+            self._save_alias_cache()
+            return
+
+        try:
+            self.get_alias_all(use_cache=False)
+        except MailcowException as e:
+            # Refetched when they are needed next
+            logger.warning(f"Could not refetch aliases after creating new ones: {e}")
+            self._alias_cache = None
+            self._alias_cache_incomplete = False
+            self._alias_cache_unsaved = False
+
+    def _is_snapshot_fresh(self, snapshot_time: float, max_age: Optional[float] = None) -> bool:
+        """Whether a snapshot is younger than the cache timeout, or `max_age` seconds if that is shorter"""
+        timeout = settings.MAILCOW_STATE_CACHE_TIMEOUT
+        if max_age is not None:
+            timeout = min(timeout, max_age)
+        return time.time() - snapshot_time < timeout
+
+    def get_alias_all(self, use_cache=True, max_age: Optional[float] = None) -> List[MailcowAlias]:
+        """Gets all email aliases. Uses the shared cache unless `use_cache` is False.
+        If `max_age` is passed, cached snapshots older than that many seconds are not used.
+        """
+        # NOTE: Other threads (see update_committee_aliases) may replace or invalidate the
+        #   local snapshot at any time, so only return the local variable
+        version = self.get_alias_state_version()
+        if use_cache:
+            aliases = self._alias_cache
+            if (
+                aliases is not None
+                and self._alias_cache_version == version
+                and self._is_snapshot_fresh(self._alias_cache_time, max_age)
+            ):
+                return aliases
+
+            snapshot = cache.get(self._get_state_cache_key("aliases"))
+            if snapshot is not None and snapshot[0] == version and self._is_snapshot_fresh(snapshot[1], max_age):
+                self._alias_cache_version, self._alias_cache_time, self._alias_cache = snapshot
+                self._alias_cache_unsaved = False
+                self._alias_cache_incomplete = False
+                self._alias_map_cache = None
+                return snapshot[2]
+
+        # Tag the snapshot with the version from before the fetch; writes made during the fetch invalidate it
+        aliases = [a for a in self._client.get_alias_all() if a is not None]
+        self._alias_cache = aliases
+        self._alias_cache_version = version
+        self._alias_cache_time = time.time()
+        self._alias_cache_unsaved = True
+        self._alias_cache_incomplete = False
+        self._save_alias_cache()
         self._alias_map_cache = None
-        return self._alias_cache
+        return aliases
 
-    def get_mailbox_all(self, use_cache=True) -> List[MailcowMailbox]:
-        """Gets all mailboxes"""
-        if use_cache and self._mailbox_cache is not None:
-            return self._mailbox_cache
-        self._mailbox_cache = [m for m in self._client.get_mailbox_all() if m is not None]
+    def get_mailbox_all(self, use_cache=True, max_age: Optional[float] = None) -> List[MailcowMailbox]:
+        """Gets all mailboxes. Uses the shared cache unless `use_cache` is False.
+        If `max_age` is passed, cached snapshots older than that many seconds are not used.
+        """
+        if use_cache:
+            mailboxes = self._mailbox_cache
+            if mailboxes is not None and self._is_snapshot_fresh(self._mailbox_cache_time, max_age):
+                return mailboxes
+
+            snapshot = cache.get(self._get_state_cache_key("mailboxes"))
+            if snapshot is not None and self._is_snapshot_fresh(snapshot[0], max_age):
+                self._mailbox_cache_time, self._mailbox_cache = snapshot
+                self._mailbox_map_cache = None
+                return snapshot[1]
+
+        mailboxes = [m for m in self._client.get_mailbox_all() if m is not None]
+        self._mailbox_cache = mailboxes
+        self._mailbox_cache_time = time.time()
+        cache.set(
+            self._get_state_cache_key("mailboxes"),
+            (self._mailbox_cache_time, mailboxes),
+            timeout=settings.MAILCOW_STATE_CACHE_TIMEOUT,
+        )
         self._mailbox_map_cache = None
-        return self._mailbox_cache
+        return mailboxes
 
     @property
     def alias_map(self) -> Dict[str, MailcowAlias]:
-        """A mapping from alias addresses to a MailcowAlias"""
-        if self._alias_map_cache is not None and self._alias_cache is not None:
-            return self._alias_map_cache
+        """A mapping from alias addresses to a MailcowAlias. Only rebuilt when the aliases change"""
         aliases = self.get_alias_all()
-        self._alias_map_cache = {alias.address: alias for alias in aliases}
-        return self._alias_map_cache
+        alias_map = self._alias_map_cache
+        if alias_map is None or self._alias_map_source is not aliases:
+            alias_map = {alias.address: alias for alias in aliases}
+            self._alias_map_cache = alias_map
+            self._alias_map_source = aliases
+        return alias_map
 
     @property
     def mailbox_map(self) -> Dict[str, MailcowMailbox]:
-        """A mapping from mailbox addresses to a MailcowMailbox"""
-        if self._mailbox_map_cache is not None and self._mailbox_cache is not None:
-            return self._mailbox_map_cache
+        """A mapping from mailbox addresses to a MailcowMailbox. Only rebuilt when the mailboxes change"""
         mailboxes = self.get_mailbox_all()
-        self._mailbox_map_cache = {mailbox.username: mailbox for mailbox in mailboxes}
-        return self._mailbox_map_cache
-
+        mailbox_map = self._mailbox_map_cache
+        if mailbox_map is None or self._mailbox_map_source is not mailboxes:
+            mailbox_map = {mailbox.username: mailbox for mailbox in mailboxes}
+            self._mailbox_map_cache = mailbox_map
+            self._mailbox_map_source = mailboxes
+        return mailbox_map
+
+    @alias_operation
     def delete_aliases(
         self, alias_addresses: List[str], public_comment: Optional[str] = None
     ) -> Optional[MailcowException]:
@@ -254,49 +592,116 @@ class SquireMailcowManager:
             if aliases:
                 # Delete aliases themselves
                 self._client.delete_aliases(aliases)
-
-                # Invalidate cache
-                self._alias_cache = None
+                self._remove_cached_aliases(aliases)
+                self._save_alias_cache()
         except MailcowException as e:
             return e
 
-    def _set_alias_by_name(self, address: str, goto_addresses: List[str], public_comment: str) -> None:
-        """Sets an alias's goto addresses, and optionally sets its visible in SOGo. If the corresponding
-        Mailcow alias's public comment does not match `public_comment`, modifications are aborted.
-        If the alias indicated by `alias_address` does not yet exist, it is created.
-        `alias_map` and `mailbox_map` are mappings of existing email aliases and mailboxes.
+    def _remove_cached_aliases(self, aliases: List[MailcowAlias]) -> None:
+        """Removes deleted aliases from the alias cache, rather than invalidating it entirely"""
+        if self._alias_cache is not None:
+            deleted_ids = {alias.id for alias in aliases}
+            self._alias_cache = [alias for alias in self._alias_cache if alias.id not in deleted_ids]
+        self._mark_aliases_modified()
+
+    def _plan_alias_change(
+        self, address: str, goto_addresses: List[str], public_comment: str, category: Optional[AliasCategory] = None
+    ) -> AliasChange:
+        """Determines what should happen to an alias so that it forwards to `goto_addresses`. If the
+        corresponding Mailcow alias's public comment does not match `public_comment`, it is skipped.
+        No API writes are made, but the existing aliases and mailboxes may be fetched.
         """
-        assert address not in self.mailbox_map
+        change = AliasChange(address, AliasAction.UNCHANGED, goto_addresses, public_comment, category)
+        if address in self.mailbox_map:
+            change.action = AliasAction.SKIP
+            change.reason = "Mailbox with the same name already exists"
+            return change
 
         alias = self.alias_map.get(address, None)
-
-        # There is a race condition here when an alias is created in the Mailcow admin before Squire does so,
-        #   but there is no way around that. The Mailcow API does not have a "create-if-not-exists" endpoint
+        change.alias = alias
         if alias is None:
-            alias = MailcowAlias(
-                address, goto_addresses, active=True, public_comment=public_comment, sogo_visible=False
-            )
-            self._client.create_alias(alias)
-            return
+            change.action = AliasAction.CREATE
+            return change
 
         # Failsafe in case we attempt to overwrite an alias that is not managed by Squire.
         #   This should only happen if such an alias is modified in the Mailcow admin after its creation.
         if alias.public_comment != public_comment:
-            logger.warning(
-                f"Cannot update alias for {address}. It already exists and is not managed by Squire! <{alias.public_comment}>"
+            change.action = AliasAction.SKIP
+            change.reason = f"Alias is not managed by Squire <{alias.public_comment}>"
+            return change
+
+        # Empty aliases are made inactive instead (see _apply_alias_change)
+        if (
+            alias.sogo_visible
+            or alias.active != bool(goto_addresses)
+            or (goto_addresses and alias.goto != goto_addresses)
+        ):
+            change.action = AliasAction.UPDATE
+        return change
+
+    def _apply_alias_change(self, change: AliasChange) -> None:
+        """Sends a planned creation or update of an alias to the Mailcow API, and updates the local snapshot
+        once the API accepted it. Other actions are ignored, as deletions are batched instead (see `delete_aliases`).
+        """
+        alias = self._send_alias_change(change)
+        if alias is not None:
+            self._store_alias_change(change, alias)
+            self._mark_aliases_modified()
+
+    def _send_alias_change(self, change: AliasChange) -> Optional[MailcowAlias]:
+        """Sends a planned creation or update of an alias to the Mailcow API, without touching the local
+        snapshot. Returns the alias as it was sent, or None if no request was needed.
+        """
+        if change.action == AliasAction.CREATE:
+            alias = MailcowAlias(
+                change.address, change.goto, active=True, public_comment=change.public_comment, sogo_visible=False
             )
-            return
+            self._client.create_alias(alias)
+            return alias
+        elif change.action == AliasAction.UPDATE:
+            # Modify a copy; the cached alias is only changed once Mailcow accepted the update
+            alias = copy(change.alias)
+            alias.active = True
+            if not change.goto:
+                # If the alias is emtpy, Mailcow will accept the response and act as if things were properly changed.
+                #   In practise, all changes are ignored!
+                # As a failsafe, this just disables the alias.
+                alias.active = False
+            else:
+                alias.goto = change.goto
+            alias.sogo_visible = False
+            self._client.update_alias(alias)
+            return alias
+        return None
+
+    def _store_alias_change(self, change: AliasChange, alias: MailcowAlias) -> None:
+        """Writes an alias change that the Mailcow API accepted into the local snapshot"""
+        if change.action == AliasAction.CREATE:
+            # The new alias's id is not known, so aliases are refetched after the batch (see _finish_alias_changes)
+            self._alias_cache_incomplete = True
+            if self._alias_cache is not None:
+                self._alias_cache.append(alias)
+                if self._alias_map_cache is not None and self._alias_map_source is self._alias_cache:
+                    self._alias_map_cache[alias.address] = alias
+        elif change.action == AliasAction.UPDATE:
+            # Update the cached alias in-place, so the cache remains valid
+            change.alias.active = alias.active
+            change.alias.goto = alias.goto
+            change.alias.sogo_visible = alias.sogo_visible
+
+    def _set_alias_by_name(self, address: str, goto_addresses: List[str], public_comment: str) -> AliasAction:
+        """Sets an alias's goto addresses, and optionally sets its visible in SOGo. If the corresponding
+        Mailcow alias's public comment does not match `public_comment`, modifications are aborted.
+        If the alias indicated by `alias_address` does not yet exist, it is created. If it is already
+        up-to-date, no request is made. Returns the action that was taken.
+        """
+        assert address not in self.mailbox_map
 
-        alias.active = True
-        if not goto_addresses:
-            # If the alias is emtpy, Mailcow will accept the response and act as if things were properly changed.
-            #   In practise, all changes are ignored!
-            # As a failsafe, this just disables the alias.
-            alias.active = False
-        else:
-            alias.goto = goto_addresses
-        alias.sogo_visible = False
-        self._client.update_alias(alias)
+        change = self._plan_alias_change(address, goto_addresses, public_comment)
+        if change.action == AliasAction.SKIP:
+            logger.warning(f"Cannot update alias for {address}. {change.reason}")
+        self._apply_alias_change(change)
+        return change.action
 
     def get_active_members(self) -> QuerySet:
         """Helper method to obtain a queryset of active members. That is, those that have active membership."""
@@ -336,29 +741,64 @@ class SquireMailcowManager:
             return settings.COMMITTEE_CONFIGS["global_archive_addresses"]
         return settings.COMMITTEE_CONFIGS["archive_addresses"]
 
-    def update_member_aliases(self) -> List[Tuple[str, MailcowException]]:
-        """Updates all member aliases. Returns a list of addresses for which the API returned an error"""
-        # Fetch active members here so the results can be cached
-        errors = []
-        active_members = self.get_active_members()
+    def get_member_alias_subscribers(self) -> Dict[str, List[str]]:
+        """Computes the subscribers of all member aliases at once. Active members and their mail preferences
+        are each fetched in a single query, so the number of queries does not depend on the number of aliases.
+        Results are the same as those of `get_subscribed_members`, but excluding blocklisted and committee emails.
+        Returns a mapping from alias addresses to (sorted) subscriber emails.
+        """
         committee_emails = self._committee_model.objects.values_list("contact_email", flat=True)
+        active_members = self.get_active_members()
+        members = list(
+            self.clean_emails(active_members, exclude=committee_emails).values_list("user_id", "email").distinct()
+        )
 
+        alias_ids = {alias_address: alias_address_to_id(alias_address) for alias_address in settings.MEMBER_ALIASES}
+        # (user id, alias id) -> stored preference value
+        preferences = {
+            (user_id, name): raw_value
+            for user_id, name, raw_value in self._user_preferences_model.objects.filter(
+                instance_id__in=active_members.filter(user__isnull=False).values("user_id"),
+                section="mail",
+                name__in=alias_ids.values(),
+            ).values_list("instance_id", "name", "raw_value")
+        }
+
+        subscribers = {}
         for alias_address, alias_data in settings.MEMBER_ALIASES.items():
+            default = alias_data["default_opt"]
+            # dynamic preferences stores everything as a string
+            opposite_value = str(not default)
+            subscribers[alias_address] = [
+                email
+                for user_id, email in members
+                # Members without an explicit opposite preference follow the default
+                if default != (preferences.get((user_id, alias_ids[alias_address])) == opposite_value)
+            ]
+        return subscribers
+
+    def get_member_alias_gotos(self) -> Dict[str, List[str]]:
+        """Gets the goto addresses each member alias should have, based on Squire's data"""
+        return {
+            alias_address: self.get_archive_adresses_for_type(AliasCategory.MEMBER, alias_address) + emails
+            for alias_address, emails in self.get_member_alias_subscribers().items()
+        }
+
+    @alias_operation
+    def update_member_aliases(self) -> List[Tuple[str, MailcowException]]:
+        """Updates all member aliases. Returns a list of addresses for which the API returned an error"""
+        errors = []
+        for alias_address, emails in self.get_member_alias_gotos().items():
             try:
                 if alias_address in self.mailbox_map:
                     logger.warning(f"Skipping over {alias_address}: Mailbox with the same name already exists")
                     continue
 
                 logger.info(f"Forced updating {alias_address}")
-                emails = self.clean_emails_flat(
-                    self.get_subscribed_members(active_members, alias_address, default=alias_data["default_opt"]),
-                    exclude=committee_emails,
-                )
-                emails = self.get_archive_adresses_for_type(AliasCategory.MEMBER, alias_address) + emails
                 self._set_alias_by_name(alias_address, emails, public_comment=self.ALIAS_MEMBERS_PUBLIC_COMMENT)
             except MailcowException as e:
                 errors.append((alias_address, e))
-        self._alias_cache = None
+        self._finish_alias_changes()
         return errors
 
     def get_active_committees(self):
@@ -369,60 +809,189 @@ class SquireMailcowManager:
             contact_email__isnull=False,
         )
 
-    def update_committee_aliases(
-        self, limit_update_to: Optional[List[str]] = None
-    ) -> List[Tuple[str, MailcowException]]:
-        """Updates all committee aliases, or a subset thereof. Returns a list of addresses for which the API returned an error"""
-        errors = []
+    def get_committee_alias_gotos(self, limit_update_to: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Gets the goto addresses each committee alias (or a subset thereof) should have, based on Squire's data"""
         committee_emails = self._committee_model.objects.values_list("contact_email", flat=True)
         valid_groups = self.clean_emails(self.get_active_committees(), email_field="contact_email")
         if limit_update_to is not None:
             # Only update a selection of committee aliases
             valid_groups = valid_groups.filter(contact_email__in=limit_update_to)
 
+        # Fetch the members of all groups at once
+        valid_groups = list(valid_groups)
+        member_emails: Dict[int, List[str]] = {assoc_group.id: [] for assoc_group in valid_groups}
+        memberships = (
+            self._committee_membership_model.objects.filter(group__in=valid_groups, member__isnull=False)
+            .exclude(member__email__in=self.BLOCKLISTED_EMAIL_ADDRESSES + list(committee_emails))
+            .order_by("member__email")
+            .values_list("group_id", "member__email")
+        )
+        for group_id, email in memberships:
+            member_emails[group_id].append(email)
+
+        gotos = {}
         for assoc_group in valid_groups:
-            try:
-                if assoc_group.contact_email in self.mailbox_map:
-                    logger.warning(
-                        f"Skipping over {assoc_group} ({assoc_group.contact_email}): Mailbox with the same name already exists"
-                    )
+            # NOTE: Include all committee member emails here, not just active members' ones
+            gotos[assoc_group.contact_email] = (
+                self.get_archive_adresses_for_type(AliasCategory.COMMITTEE, assoc_group.contact_email)
+                + member_emails[assoc_group.id]
+            )
+        return gotos
+
+    @alias_operation
+    def update_committee_aliases(
+        self, limit_update_to: Optional[List[str]] = None
+    ) -> List[Tuple[str, MailcowException]]:
+        """Updates all committee aliases, or a subset thereof. Returns a list of addresses for which the API returned an error.
+        Changes are planned up front, after which the requests to the API are made concurrently
+        (see `settings.MAILCOW_API_MAX_WORKERS`). Only the requests are made in other threads; the local
+        alias snapshot is only read and modified by the calling thread.
+        """
+        gotos = self.get_committee_alias_gotos(limit_update_to)
+        if not gotos:
+            return []
+
+        changes: List[AliasChange] = []
+        try:
+            for address, goto_emails in gotos.items():
+                if address in self.mailbox_map:
+                    logger.warning(f"Skipping over {address}: Mailbox with the same name already exists")
                     continue
-                # NOTE: Include all committee member emails here, not just active members' ones
-                goto_emails = self.clean_emails_flat(assoc_group.members, exclude=committee_emails)
-                logger.info(f"Forced updating {assoc_group} ({len(goto_emails)} subscribers)")
-                goto_emails = (
-                    self.get_archive_adresses_for_type(AliasCategory.COMMITTEE, assoc_group.contact_email)
-                    + goto_emails
+                change = self._plan_alias_change(
+                    address, goto_emails, self.ALIAS_COMMITTEE_PUBLIC_COMMENT, AliasCategory.COMMITTEE
                 )
+                if change.action == AliasAction.SKIP:
+                    logger.warning(f"Cannot update alias for {address}. {change.reason}")
+                changes.append(change)
+        except MailcowException as e:
+            return [(address, e) for address in gotos]
 
-                self._set_alias_by_name(
-                    assoc_group.contact_email, goto_emails, public_comment=self.ALIAS_COMMITTEE_PUBLIC_COMMENT
-                )
+        def send_alias_change(change: AliasChange) -> Optional[MailcowAlias]:
+            logger.info(f"Forced updating {change.address} ({len(change.goto)} goto addresses)")
+            return self._send_alias_change(change)
+
+        changes = [change for change in changes if change.action in (AliasAction.CREATE, AliasAction.UPDATE)]
+        with ThreadPoolExecutor(max_workers=settings.MAILCOW_API_MAX_WORKERS) as executor:
+            futures = [(change, executor.submit(send_alias_change, change)) for change in changes]
+
+        # Collect errors in a deterministic order
+        errors = []
+        is_modified = False
+        for change, future in futures:
+            try:
+                alias = future.result()
             except MailcowException as e:
-                errors.append((assoc_group.contact_email, e))
-        self._alias_cache = None
+                errors.append((change.address, e))
+                continue
+            self._store_alias_change(change, alias)
+            is_modified = True
+
+        if is_modified:
+            self._mark_aliases_modified()
+        self._finish_alias_changes()
         return errors
 
+    def get_global_committee_alias_gotos(self) -> Dict[str, List[str]]:
+        """Gets the goto addresses each global committee alias should have, based on Squire's data"""
+        committee_emails = self.clean_emails_flat(self.get_active_committees(), email_field="contact_email")
+        return {
+            alias_address: self.get_archive_adresses_for_type(AliasCategory.GLOBAL_COMMITTEE, alias_address)
+            + committee_emails
+            for alias_address in settings.COMMITTEE_CONFIGS["global_addresses"]
+            if alias_address not in settings.MEMBER_ALIASES.keys()
+        }
+
+    @alias_operation
     def update_global_committee_aliases(self) -> List[Tuple[str, MailcowException]]:
         """Updates all global committee aliases Returns a list of addresses for which the API returned an error"""
         errors = []
-        for alias_address in filter(
-            lambda address: address not in settings.MEMBER_ALIASES.keys(),
-            settings.COMMITTEE_CONFIGS["global_addresses"],
-        ):
+        for alias_address, emails in self.get_global_committee_alias_gotos().items():
             try:
                 if alias_address in self.mailbox_map:
                     logger.warning(f"Skipping over {alias_address}: Mailbox with the same name already exists")
                     continue
 
                 logger.info(f"Forced updating {alias_address}")
-                emails = self.clean_emails_flat(self.get_active_committees(), email_field="contact_email")
-                emails = self.get_archive_adresses_for_type(AliasCategory.GLOBAL_COMMITTEE, alias_address) + emails
-
                 self._set_alias_by_name(
                     alias_address, emails, public_comment=self.ALIAS_GLOBAL_COMMITTEE_PUBLIC_COMMENT
                 )
             except MailcowException as e:
                 errors.append((alias_address, e))
-        self._alias_cache = None
+        self._finish_alias_changes()
         return errors
+
+    ################
+    # RECONCILIATION
+    ################
+    @alias_operation
+    def plan_alias_reconciliation(self) -> AliasReconciliationPlan:
+        """Compares the complete desired alias state in Squire against the aliases that currently exist in
+        Mailcow, and determines which aliases need to be created, updated, or deleted. Aliases are fetched
+        once; no writes are made to the Mailcow API.
+        """
+        plan = AliasReconciliationPlan()
+        # Always work on fresh data
+        self.get_alias_all(use_cache=False)
+        self.get_mailbox_all(use_cache=False)
+
+        desired = [
+            (AliasCategory.MEMBER, self.ALIAS_MEMBERS_PUBLIC_COMMENT, self.get_member_alias_gotos()),
+            (AliasCategory.COMMITTEE, self.ALIAS_COMMITTEE_PUBLIC_COMMENT, self.get_committee_alias_gotos()),
+            (
+                AliasCategory.GLOBAL_COMMITTEE,
+                self.ALIAS_GLOBAL_COMMITTEE_PUBLIC_COMMENT,
+                self.get_global_committee_alias_gotos(),
+            ),
+        ]
+        desired_addresses = set()
+        for category, public_comment, gotos in desired:
+            for address, goto in gotos.items():
+                desired_addresses.add(address)
+                plan.changes.append(self._plan_alias_change(address, goto, public_comment, category))
+
+        # Aliases managed by Squire that no longer have a counterpart in Squire (e.g. a committee changed its email)
+        comment_categories = {public_comment: category for category, public_comment, _ in desired}
+        for address, alias in self.alias_map.items():
+            if address not in desired_addresses and alias.public_comment in comment_categories:
+                plan.changes.append(
+                    AliasChange(
+                        address,
+                        AliasAction.DELETE,
+                        public_comment=alias.public_comment,
+                        category=comment_categories[alias.public_comment],
+                        alias=alias,
+                    )
+                )
+        return plan
+
+    @alias_operation
+    def apply_alias_reconciliation(self, plan: AliasReconciliationPlan) -> List[Tuple[str, MailcowException]]:
+        """Sends the changes in a reconciliation plan to the Mailcow API. Deletions are batched into a single
+        request. Returns a list of addresses for which the API returned an error (also stored in the plan).
+        """
+        deleted = plan.get_changes(AliasAction.DELETE)
+        if deleted:
+            try:
+                self._client.delete_aliases([change.alias for change in deleted])
+                self._remove_cached_aliases([change.alias for change in deleted])
+            except MailcowException as e:
+                plan.errors += [(change.address, e) for change in deleted]
+
+        for change in plan.changes:
+            try:
+                self._apply_alias_change(change)
+            except MailcowException as e:
+                plan.errors.append((change.address, e))
+        self._finish_alias_changes()
+        plan.applied = True
+        return plan.errors
+
+    @alias_operation
+    def reconcile_aliases(self, dry_run=False) -> AliasReconciliationPlan:
+        """Makes all Squire-managed aliases in Mailcow match Squire's data, only sending requests
+        for aliases that actually differ. If `dry_run` is set, the plan is returned without being applied.
+        """
+        plan = self.plan_alias_reconciliation()
+        if not dry_run:
+            self.apply_alias_reconciliation(plan)
+        return plan
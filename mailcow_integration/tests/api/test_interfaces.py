@@ -1,5 +1,6 @@
 from copy import deepcopy
 from datetime import datetime
+import pickle
 from unittest import TestCase
 
 from mailcow_integration.api.interface.alias import AliasType, MailcowAlias
@@ -153,6 +154,59 @@ class MailcowInterfacesTest(TestCase):
         mailbox = MailcowMailbox.from_json(data)
         self.assertIsNone(mailbox.percent_in_use)
 
+    def test_from_json_list_warnings(self):
+        """Parsing warnings are logged once per list"""
+        aliases = [{**get_alias_json(), "foo": i, "is_catch_all": "maybe"} for i in range(3)]
+        aliases.append({"goto": "bar@example.com"})
+        with self.assertLogs("mailcow_api", level="WARNING") as logs:
+            parsed = list(MailcowAlias.from_json_list(aliases))
+        self.assertEqual([alias.address for alias in parsed[:3]], ["foo@example.com"] * 3)
+        self.assertIsNone(parsed[3])
+        self.assertListEqual(
+            logs.output,
+            [
+                "WARNING:mailcow_api:JSONParseError in MailcowAlias: Found extra field <foo> with value <0> (3 of 4 objects)",
+                "WARNING:mailcow_api:JSONParseError in MailcowAlias: Field <is_catch_all> value could not be parsed as bool: <maybe> (3 of 4 objects)",
+                "WARNING:mailcow_api:JSONParseError in MailcowAlias: Missing required field <address> (1 of 4 objects)",
+            ],
+        )
+
+    def test_from_json_list_warnings_stopped_early(self):
+        """Parsing warnings are still logged if the list is not consumed completely"""
+        aliases = [{**get_alias_json(), "foo": i} for i in range(3)]
+        with self.assertLogs("mailcow_api", level="WARNING") as logs:
+            parsed = MailcowAlias.from_json_list(aliases)
+            next(parsed)
+            parsed.close()
+        self.assertListEqual(
+            logs.output,
+            [
+                "WARNING:mailcow_api:JSONParseError in MailcowAlias: Found extra field <foo> with value <0> (1 of 1 objects)"
+            ],
+        )
+
+    def test_mailbox_from_json_list(self):
+        """Mailboxes in a list are only parsed completely when needed"""
+        data = get_mailbox_json()
+        mailbox = next(MailcowMailbox.from_json_list([data]))
+        self.assertEqual(mailbox.username, "foo@example.com")
+        self.assertIs(mailbox._unparsed_json, data)
+
+        # Pickling (e.g. for the cache) keeps the mailbox unparsed
+        mailbox = pickle.loads(pickle.dumps(mailbox))
+        self.assertIsNotNone(mailbox._unparsed_json)
+
+        # Accessing other fields parses the entire mailbox
+        self.assertEqual(mailbox.attributes.passwd_update, datetime.fromisoformat("2024-09-14 17:13:08"))
+        self.assertIsNone(mailbox._unparsed_json)
+        self.assertEqual(mailbox, MailcowMailbox.from_json(get_mailbox_json()))
+        with self.assertRaises(AttributeError):
+            mailbox.foo
+
+        # Objects do not have a __dict__
+        self.assertFalse(hasattr(mailbox, "__dict__"))
+        self.assertFalse(hasattr(MailcowAlias.from_json(get_alias_json()), "__dict__"))
+
     def test_rspamd_from_json(self):
         """Rspamd Setting JSON correctly converted to object"""
         setting = RspamdSettings.from_json(get_rspamd_json())
@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from django.test import SimpleTestCase
+
+from core.tests.util import suppress_errors, suppress_infos, suppress_warnings
+from mailcow_integration.api.client import MailcowAPIClient, RequestType
+from mailcow_integration.api.exceptions import MailcowConnectionException, MailcowException
+
+##################################################################################
+# Test cases for the mailcow client's HTTP connection handling, against a local
+#   stand-in for the Mailcow server
+##################################################################################
+
+
+class StandInMailcowHandler(BaseHTTPRequestHandler):
+    """Responds to every request with the next queued (status, content) pair, or with an empty list"""
+
+    protocol_version = "HTTP/1.1"  # Allows keep-alive
+
+    def _respond(self):
+        server: StandInMailcowServer = self.server
+        server.requests.append((self.command, self.path, self.client_address))
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+
+        if server.delay:
+            time.sleep(server.delay)
+        status, content = server.responses.pop(0) if server.responses else (200, [])
+        body = json.dumps(content).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if server.cutoff is not None:
+                # Connection drops while the body is being sent
+                self.wfile.write(body[: server.cutoff])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up waiting (e.g. a timeout)
+            pass
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        # Keep test output clean
+        pass
+
+
+class StandInMailcowServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInMailcowHandler)
+        self.requests: List[tuple] = []
+        self.responses: List[tuple] = []
+        self.delay: Optional[float] = None
+        self.cutoff: Optional[int] = None
+
+    @property
+    def host(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class MailcowClientSessionTest(SimpleTestCase):
+    """Tests connection pooling, timeouts, and retries of the Mailcow API Client"""
+
+    def setUp(self):
+        self.server = StandInMailcowServer()
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.client = MailcowAPIClient(self.server.host, "fake_key", timeout=(1, 0.5), max_retries=2, backoff_factor=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    @suppress_infos(logger_name="mailcow_integration.api.client")
+    def test_keep_alive(self):
+        """Tests that consecutive requests reuse the same connection"""
+        self.client._make_request("get/alias/all")
+        self.client._make_request("get/mailbox/all")
+        self.assertEqual(len(self.server.requests), 2)
+        # Same client port; so the same TCP connection
+        self.assertEqual(self.server.requests[0][2], self.server.requests[1][2])
+
+    @suppress_errors(logger_name="mailcow_integration.api.client")
+    @suppress_warnings(logger_name="mailcow_api")
+    def test_get_retried(self):
+        """Tests that GET requests are retried when the server is temporarily unavailable"""
+        self.server.responses = [(503, {}), (502, {}), (200, [{"k": "v"}])]
+        self.assertListEqual(self.client._make_request("get/alias/all"), [{"k": "v"}])
+        self.assertEqual(len(self.server.requests), 3)
+
+        # Retries are bounded
+        self.server.requests = []
+        self.server.responses = [(503, {"type": "error", "msg": "unavailable"})] * 3
+        with self.assertRaises(MailcowException):
+            self.client._make_request("get/alias/all")
+        self.assertEqual(len(self.server.requests), 3)
+
+    @suppress_errors(logger_name="mailcow_integration.api.client")
+    def test_post_not_retried(self):
+        """Tests that non-idempotent requests are not retried"""
+        self.server.responses = [(503, {"type": "error", "msg": "unavailable"}), (200, [])]
+        with self.assertRaises(MailcowException):
+            self.client._make_request("add/alias", request_type=RequestType.POST, data="{}")
+        self.assertEqual(len(self.server.requests), 1)
+
+    @suppress_infos(logger_name="mailcow_integration.api.client")
+    @suppress_warnings(logger_name="mailcow_api")
+    def test_timeout(self):
+        """Tests that a hanging server does not block forever"""
+        self.server.delay = 1
+        self.client._session.adapters["http://"].max_retries.total = 0
+        start_time = time.perf_counter()
+        with self.assertRaises(MailcowConnectionException):
+            self.client._make_request("get/alias/all")
+        self.assertLess(time.perf_counter() - start_time, 1)
+
+    @suppress_infos(logger_name="mailcow_integration.api.client")
+    @suppress_warnings(logger_name="mailcow_api")
+    def test_list_cut_off(self):
+        """Tests that a list response that is cut off while it is received raises a connection exception"""
+        self.server.responses = [(200, [{"k": i} for i in range(10)])]
+        self.server.cutoff = 30
+        with self.assertRaises(MailcowConnectionException):
+            self.client._make_list_request("get/alias/all")
+
+        # Cut off after some items were already decoded
+        self.client.LIST_CHUNK_SIZE = 4
+        self.server.responses = [(200, [{"k": i} for i in range(10)])]
+        items = self.client._make_list_request("get/alias/all")
+        self.assertDictEqual(next(items), {"k": 0})
+        with self.assertRaises(MailcowConnectionException):
+            list(items)
+
+    @suppress_infos(logger_name="mailcow_integration.api.client")
+    def test_latency_logged(self):
+        """Tests that the duration of each request is logged"""
+        with self.assertLogs("mailcow_api", level="INFO") as logs:
+            self.client._make_request("get/alias/all")
+        self.assertEqual(len(logs.output), 1)
+        self.assertRegex(logs.output[0], r"GET .*/api/v1/get/alias/all returned 200 in \d+ms")
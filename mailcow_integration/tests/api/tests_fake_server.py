@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from committees.models import AssociationGroup
+from core.tests.util import suppress_errors, suppress_infos
+from mailcow_integration.api.client import MailcowAPIClient
+from mailcow_integration.api.exceptions import MailcowAuthException, MailcowException
+from mailcow_integration.api.fake_server import FakeMailcowAPI, FakeMailcowServer
+from mailcow_integration.api.interface.alias import MailcowAlias
+from mailcow_integration.api.interface.rspamd import RspamdSettings
+from membership_file.models import Member
+
+##################################################################################
+# Test cases for the fake Mailcow server, and the sync benchmark that uses it
+##################################################################################
+
+
+class FakeMailcowServerTest(SimpleTestCase):
+    """Tests whether the fake Mailcow server works with the MailcowAPIClient"""
+
+    def setUp(self):
+        self.api = FakeMailcowAPI("fake_key", seed=42)
+        self.server = FakeMailcowServer(self.api).start()
+        self.client = MailcowAPIClient(self.server.url, "fake_key", max_retries=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    @suppress_infos(logger_name="mailcow_integration.api.client")
+    def test_aliases(self):
+        """Tests creating, updating, and deleting aliases"""
+        self.api.add_alias("foo@example.com", ["a@example.com"], "Foo!")
+        self.client.create_alias(MailcowAlias("bar@example.com", ["b@example.com", "c@example.com"]))
+
+        aliases = {alias.address: alias for alias in self.client.get_alias_all()}
+        self.assertEqual(aliases["foo@example.com"].public_comment, "Foo!")
+        self.assertEqual(aliases["bar@example.com"].goto, ["b@example.com", "c@example.com"])
+
+        alias = aliases["bar@example.com"]
+        alias.goto = ["null@localhost"]
+        self.client.update_alias(alias)
+        self.assertEqual(self.client.get_alias(alias.id).goto, ["null@localhost"])
+
+        self.client.delete_aliases([aliases["foo@example.com"]])
+        self.assertEqual([alias.address for alias in self.client.get_alias_all()], ["bar@example.com"])
+
+        # Stats are tracked
+        self.assertEqual(self.api.request_count, 6)
+        self.assertGreater(self.api.bytes_received, 0)
+        self.assertGreater(self.api.bytes_sent, 0)
+
+    @suppress_infos(logger_name="mailcow_integration.api.client")
+    def test_mailboxes(self):
+        """Tests fetching mailboxes"""
+        self.api.add_mailbox("foo@example.com", "Mr. Foo")
+        with self.assertNoLogs("mailcow_api", level="WARNING"):
+            mailboxes = list(self.client.get_mailbox_all())
+        self.assertEqual(mailboxes[0].username, "foo@example.com")
+        self.assertEqual(mailboxes[0].name, "Mr. Foo")
+
+    @suppress_infos(logger_name="mailcow_integration.api.client")
+    def test_rspamd_settings(self):
+        """Tests creating and updating Rspamd settings"""
+        self.client.create_rspamd_setting(RspamdSettings(None, "Foo", "rule;"))
+        setting = next(self.client.get_rspamd_setting_all())
+        setting.content = "other rule;"
+        self.client.update_rspamd_setting(setting)
+        self.assertEqual(self.client.get_rspamd_setting(setting.id).content, "other rule;")
+
+    @suppress_errors(logger_name="mailcow_integration.api.client")
+    def test_errors(self):
+        """Tests authentication and injected errors"""
+        client = MailcowAPIClient(self.server.url, "invalid_key", max_retries=0)
+        with self.assertRaises(MailcowAuthException):
+            client.get_alias_all()
+        client.close()
+
+        self.api.error_rate = 1.0
+        with self.assertRaisesMessage(MailcowException, "injected error"):
+            self.client.create_alias(MailcowAlias("foo@example.com", ["a@example.com"]))
+
+
+class BenchmarkMailcowSyncTest(TestCase):
+    """Tests the benchmark_mailcow_sync command"""
+
+    @suppress_infos(logger_name="mailcow_integration")
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            "benchmark_mailcow_sync",
+            members=20,
+            committees=3,
+            committee_size=5,
+            aliases=10,
+            mailboxes=2,
+            latency=0,
+            seed=1,
+            stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("Full sync", output)
+        self.assertIn("Incremental sync (unchanged)", output)
+        self.assertIn("update_committee_aliases", output)
+
+        # Generated data is rolled back
+        self.assertFalse(Member.objects.filter(email__startswith="benchmark-").exists())
+        self.assertFalse(AssociationGroup.objects.filter(name__startswith="Benchmark").exists())
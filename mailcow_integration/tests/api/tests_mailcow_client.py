@@ -8,7 +8,7 @@ from requests import Response
 from unittest.mock import patch, Mock, call
 from core.tests.util import suppress_errors, suppress_infos
 
-from mailcow_integration.api.client import MailcowAPIClient, RequestType
+from mailcow_integration.api.client import MailcowAPIClient, RequestType, iter_json_list
 from mailcow_integration.api.exceptions import *
 from mailcow_integration.api.interface.alias import MailcowAlias
 from mailcow_integration.api.interface.rspamd import RspamdSettings
@@ -34,6 +34,7 @@ class MailcowClientTest(TestCase):
         res = Response()
         res.status_code = status_code
         res._content = bytes(content, "utf-8")
+        res._content_consumed = True
         return res
 
     def _get_success_response(self, msg="xxx_modified", obj="foo@example.com") -> dict:
@@ -46,7 +47,7 @@ class MailcowClientTest(TestCase):
         """Tests if requests are made with the correct parameters"""
         # Dictionary response
         with patch(
-            "requests.request", return_value=self._patch_mailcow_response(json.dumps({"k": "v"}))
+            "requests.Session.request", return_value=self._patch_mailcow_response(json.dumps({"k": "v"}))
         ) as mock_request:
             self.mailcow_client._make_request(
                 "my_url", RequestType.GET, params={"foo": "bar"}, data={"hello": "there"}
@@ -75,7 +76,8 @@ class MailcowClientTest(TestCase):
 
         # List response
         with patch(
-            "requests.request", return_value=self._patch_mailcow_response(json.dumps([{"a": 1}, {"b": 2}, {"c": 3}]))
+            "requests.Session.request",
+            return_value=self._patch_mailcow_response(json.dumps([{"a": 1}, {"b": 2}, {"c": 3}])),
         ) as mock_request:
             self.mailcow_client._make_request(
                 "my_url", RequestType.GET, params={"foo": "bar"}, data={"hello": "there"}
@@ -92,12 +94,60 @@ class MailcowClientTest(TestCase):
             )
 
         # Exception response (cannot JSON decode)
-        with patch("requests.request", return_value=self._patch_mailcow_response("foo")) as mock_request:
+        with patch("requests.Session.request", return_value=self._patch_mailcow_response("foo")) as mock_request:
             with self.assertRaisesMessage(MailcowException, "Unexpected response"):
                 self.mailcow_client._make_request(
                     "my_url", RequestType.GET, params={"foo": "bar"}, data={"hello": "there"}
                 )
 
+    @suppress_infos(logger_name="mailcow_integration")
+    @patch("mailcow_integration.api.client.MailcowAPIClient._verify_response_content")
+    def test_list_request(self, mock_verification: Mock):
+        """Tests if items of list responses are decoded while they are received"""
+        self.mailcow_client.LIST_CHUNK_SIZE = 4
+        content = json.dumps([{"a": 1}, {"b": "[]"}, {"c": 3}])
+        with patch("requests.Session.request", return_value=self._patch_mailcow_response(content)) as mock_request:
+            res = self.mailcow_client._make_list_request("my_url")
+            # Request is made immediately, in streaming mode
+            mock_request.assert_called_once()
+            self.assertTrue(mock_request.call_args.kwargs["stream"])
+
+            self.assertEqual(list(res), [{"a": 1}, {"b": "[]"}, {"c": 3}])
+            mock_verification.assert_has_calls(
+                [
+                    call({"a": 1}, "example.com/api/v1/my_url"),
+                    call({"b": "[]"}, "example.com/api/v1/my_url"),
+                    call({"c": 3}, "example.com/api/v1/my_url"),
+                ]
+            )
+
+        # Error responses are not lists
+        mock_verification.side_effect = MailcowAuthException("authentication failed")
+        content = json.dumps({"type": "error", "msg": "authentication failed"})
+        with patch("requests.Session.request", return_value=self._patch_mailcow_response(content)):
+            with self.assertRaises(MailcowAuthException):
+                self.mailcow_client._make_list_request("my_url")
+
+        # Invalid JSON
+        mock_verification.side_effect = None
+        with patch("requests.Session.request", return_value=self._patch_mailcow_response('[{"a": 1}, {"b')):
+            res = self.mailcow_client._make_list_request("my_url")
+            with self.assertRaisesMessage(MailcowException, "Unexpected response"):
+                list(res)
+
+    def test_iter_json_list(self):
+        """Tests incrementally decoding JSON lists"""
+        content = ' [ {"a": [1, 2]}, "b,]", 123 , null,{"c": {}} ] '
+        expected = [{"a": [1, 2]}, "b,]", 123, None, {"c": {}}]
+        for chunk_size in (1, 2, 3, 5, 100):
+            chunks = [content[i : i + chunk_size] for i in range(0, len(content), chunk_size)]
+            self.assertEqual(list(iter_json_list(chunks)), expected)
+
+        self.assertEqual(list(iter_json_list(["[", "]"])), [])
+        for invalid in ('{"a": 1}', "[1, 2", "[1 2]", "[1,, 2]", "[1, {]"):
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_list([invalid]))
+
     @suppress_errors(logger_name="mailcow_integration.api.client")
     def test_response_verification(self):
         """Tests if responses given by the API are verified properly"""
@@ -145,7 +195,7 @@ class MailcowClientTest(TestCase):
     # ALIASES
     ################
     @patch(
-        "mailcow_integration.api.client.MailcowAPIClient._make_request",
+        "mailcow_integration.api.client.MailcowAPIClient._make_list_request",
         return_value=[
             {**get_alias_json(), "address": "foo@example.com"},
             {**get_alias_json(), "address": "bar@example.com"},
@@ -383,7 +433,7 @@ class MailcowClientTest(TestCase):
     # MAILBOXES
     ################
     @patch(
-        "mailcow_integration.api.client.MailcowAPIClient._make_request",
+        "mailcow_integration.api.client.MailcowAPIClient._make_list_request",
         return_value=[
             {**get_mailbox_json(), "username": "foo@example.com"},
             {**get_mailbox_json(), "username": "bar@example.com"},
@@ -405,7 +455,7 @@ class MailcowClientTest(TestCase):
     # RSPAMD SETTINGS
     ################
     @patch(
-        "mailcow_integration.api.client.MailcowAPIClient._make_request",
+        "mailcow_integration.api.client.MailcowAPIClient._make_list_request",
         return_value=[{**get_rspamd_json(), "id": 999}, {**get_rspamd_json(), "id": 1234}],
     )
     def test_get_rspamd_all(self, mock_request: Mock):
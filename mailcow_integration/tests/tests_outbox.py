@@ -0,0 +1,133 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from core.tests.util import suppress_infos
+from mailcow_integration.api.exceptions import MailcowException
+from mailcow_integration.models import AliasOutboxEntry
+from mailcow_integration.outbox import MailcowAliasOutbox, drain_alias_outbox
+from mailcow_integration.squire_mailcow import AliasCategory, SquireMailcowManager
+
+
+class AliasOutboxTests(TestCase):
+    """Tests marking aliases as dirty in the alias outbox"""
+
+    def setUp(self):
+        self.outbox = MailcowAliasOutbox()
+
+    def test_deduplicated(self):
+        """Tests that an alias is stored at most once"""
+        self.outbox.update_member_aliases()
+        self.outbox.update_member_aliases()
+        self.outbox.update_committee_aliases(["foo@example.com", "bar@example.com", None])
+        self.outbox.update_committee_aliases(["foo@example.com"])
+        self.assertEqual(AliasOutboxEntry.objects.filter(category=AliasCategory.MEMBER.value).count(), 1)
+        self.assertSetEqual(
+            set(
+                AliasOutboxEntry.objects.filter(category=AliasCategory.COMMITTEE.value).values_list(
+                    "address", flat=True
+                )
+            ),
+            {"foo@example.com", "bar@example.com"},
+        )
+
+    def test_latest_mark_wins(self):
+        """Tests that an alias marked for deletion is updated instead if it is marked for an update afterwards"""
+        self.outbox.delete_aliases(["foo@example.com"])
+        self.assertTrue(AliasOutboxEntry.objects.get(address="foo@example.com").should_delete)
+        self.outbox.update_committee_aliases(["foo@example.com"])
+        self.assertFalse(AliasOutboxEntry.objects.get(address="foo@example.com").should_delete)
+
+
+@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_member_aliases", return_value=[])
+@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_global_committee_aliases", return_value=[])
+@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_committee_aliases", return_value=[])
+@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.delete_aliases", return_value=None)
+class DrainAliasOutboxTests(TestCase):
+    """Tests processing the alias outbox"""
+
+    def setUp(self):
+        self.outbox = MailcowAliasOutbox()
+        self.manager = SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key")
+
+    def test_empty(self, mock_o: Mock, mock_c: Mock, mock_gc: Mock, mock_m: Mock):
+        """Tests that nothing is sent to Mailcow if no aliases are dirty"""
+        self.assertListEqual(drain_alias_outbox(self.manager), [])
+        for mock in (mock_o, mock_c, mock_gc, mock_m):
+            mock.assert_not_called()
+
+    @suppress_infos(logger_name="mailcow_integration.outbox")
+    def test_coalesce(self, mock_o: Mock, mock_c: Mock, mock_gc: Mock, mock_m: Mock):
+        """Tests that each alias is updated at most once"""
+        self.outbox.update_member_aliases()
+        self.outbox.update_committee_aliases(["foo@example.com"])
+        self.outbox.update_committee_aliases(["bar@example.com"])
+        self.outbox.delete_aliases(["old@example.com"])
+        self.outbox.update_global_committee_aliases()
+        self.outbox.update_member_aliases()
+
+        self.assertListEqual(drain_alias_outbox(self.manager), [])
+        mock_m.assert_called_once_with()
+        mock_gc.assert_called_once_with()
+        mock_o.assert_called_once_with(["old@example.com"])
+        mock_c.assert_called_once()
+        self.assertListEqual(mock_c.call_args[0][0], ["foo@example.com", "bar@example.com"])
+        self.assertFalse(AliasOutboxEntry.objects.exists())
+
+    def test_order(self, mock_o: Mock, mock_c: Mock, mock_gc: Mock, mock_m: Mock):
+        """Tests that aliases are processed in the order in which they were last marked"""
+        start = timezone.now()
+        with patch("django.utils.timezone.now", side_effect=[start + timedelta(seconds=i) for i in range(3)]):
+            self.outbox.update_committee_aliases(["foo@example.com"])
+            self.outbox.update_committee_aliases(["bar@example.com"])
+            self.outbox.update_committee_aliases(["foo@example.com"])
+        drain_alias_outbox(self.manager)
+        mock_c.assert_called_once_with(["bar@example.com", "foo@example.com"])
+
+    def test_category_supersedes_addresses(self, mock_o: Mock, mock_c: Mock, mock_gc: Mock, mock_m: Mock):
+        """Tests that marking all committee aliases supersedes marks for individual committee aliases"""
+        self.outbox.update_committee_aliases(["foo@example.com"])
+        self.outbox.update_committee_aliases()
+        drain_alias_outbox(self.manager)
+        mock_c.assert_called_once_with()
+        mock_m.assert_not_called()
+        self.assertFalse(AliasOutboxEntry.objects.exists())
+
+    @suppress_infos(logger_name="mailcow_integration.outbox")
+    def test_failed_aliases_kept(self, mock_o: Mock, mock_c: Mock, mock_gc: Mock, mock_m: Mock):
+        """Tests that aliases for which the API returned an error are retried later"""
+        error = MailcowException()
+        mock_c.return_value = [("foo@example.com", error)]
+        mock_o.return_value = error
+        self.outbox.update_committee_aliases(["foo@example.com", "bar@example.com"])
+        self.outbox.delete_aliases(["old@example.com"])
+
+        errors = drain_alias_outbox(self.manager)
+        self.assertListEqual(errors, [("old@example.com", error), ("foo@example.com", error)])
+        self.assertSetEqual(
+            set(AliasOutboxEntry.objects.values_list("address", flat=True)), {"foo@example.com", "old@example.com"}
+        )
+
+    def test_marked_while_processing(self, mock_o: Mock, mock_c: Mock, mock_gc: Mock, mock_m: Mock):
+        """Tests that aliases marked again while the outbox is processed are processed again later"""
+        mock_m.side_effect = lambda: self.outbox.update_member_aliases() or []
+        self.outbox.update_member_aliases()
+        drain_alias_outbox(self.manager)
+        self.assertTrue(AliasOutboxEntry.objects.filter(category=AliasCategory.MEMBER.value).exists())
+
+    @patch("mailcow_integration.management.commands.process_mailcow_outbox.get_mailcow_manager")
+    def test_command(self, mock_get_manager: Mock, mock_o: Mock, mock_c: Mock, mock_gc: Mock, mock_m: Mock):
+        """Tests the process_mailcow_outbox management command"""
+        mock_get_manager.return_value = None
+        with self.assertRaises(CommandError):
+            call_command("process_mailcow_outbox")
+
+        mock_get_manager.return_value = self.manager
+        self.outbox.update_member_aliases()
+        call_command("process_mailcow_outbox")
+        mock_m.assert_called_once_with()
+        self.assertFalse(AliasOutboxEntry.objects.exists())
@@ -1,4 +1,4 @@
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, PropertyMock, patch
 from django.contrib.auth.models import Group
 from django.db.models.signals import pre_save
 from django.test import TestCase
@@ -6,6 +6,8 @@ from dynamic_preferences.registries import global_preferences_registry
 from committees.models import AssociationGroup, AssociationGroupMembership
 from core.tests.util import suppress_infos
 from mailcow_integration.api.exceptions import MailcowException
+from mailcow_integration.models import AliasOutboxEntry
+from mailcow_integration.outbox import MailcowAliasOutbox, drain_alias_outbox
 
 from mailcow_integration.signals import deregister_signals, global_preference_required_for_signal, register_signals
 from mailcow_integration.squire_mailcow import SquireMailcowManager
@@ -54,14 +56,11 @@ class GlobalPreferenceRequiredDecoratorTests(MailcowSignalTestMixin, TestCase):
         signal_mock.assert_not_called()
 
 
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_member_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_global_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.delete_aliases")
-@patch(
-    "mailcow_integration.squire_mailcow.get_mailcow_manager",
-    return_value=SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key"),
-)
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_member_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_global_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.delete_aliases")
+@patch("mailcow_integration.signals.get_alias_outbox", return_value=MailcowAliasOutbox())
 class AliasSignalsTestsBase(MailcowSignalTestMixin, TestCase):
     """Base class for alias signal tests"""
 
@@ -71,14 +70,11 @@ class AliasSignalsTestsBase(MailcowSignalTestMixin, TestCase):
             mock.reset_mock()
 
 
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_member_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_global_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.delete_aliases")
-@patch(
-    "mailcow_integration.signals.get_mailcow_manager",
-    return_value=SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key"),
-)
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_member_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_global_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.delete_aliases")
+@patch("mailcow_integration.signals.get_alias_outbox", return_value=MailcowAliasOutbox())
 class MemberAliasSignalsTests(AliasSignalsTestsBase):
     """Tests for alias signals for members"""
 
@@ -135,14 +131,11 @@ class MemberAliasSignalsTests(AliasSignalsTestsBase):
         mock_c.assert_not_called()
 
 
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_member_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_global_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.delete_aliases")
-@patch(
-    "mailcow_integration.signals.get_mailcow_manager",
-    return_value=SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key"),
-)
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_member_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_global_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.delete_aliases")
+@patch("mailcow_integration.signals.get_alias_outbox", return_value=MailcowAliasOutbox())
 class CommitteeAliasSignalsTests(AliasSignalsTestsBase):
     """Tests for alias signals for committees/orders"""
 
@@ -271,14 +264,11 @@ class CommitteeAliasSignalsTests(AliasSignalsTestsBase):
         mock_o.assert_not_called()
 
 
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_member_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_global_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.delete_aliases")
-@patch(
-    "mailcow_integration.signals.get_mailcow_manager",
-    return_value=SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key"),
-)
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_member_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_global_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.delete_aliases")
+@patch("mailcow_integration.signals.get_alias_outbox", return_value=MailcowAliasOutbox())
 class CommitteeMembershipAliasSignalsTests(AliasSignalsTestsBase):
     """Tests for alias signals for adding members to committees/orders"""
 
@@ -372,14 +362,11 @@ class CommitteeMembershipAliasSignalsTests(AliasSignalsTestsBase):
         self.assertListEqual(list(mock_c.call_args[0][0]), ["foo@example.com"])
 
 
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_member_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_global_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.delete_aliases")
-@patch(
-    "mailcow_integration.signals.get_mailcow_manager",
-    return_value=SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key"),
-)
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_member_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_global_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.delete_aliases")
+@patch("mailcow_integration.signals.get_alias_outbox", return_value=MailcowAliasOutbox())
 class MemberYearAliasSignalsTests(AliasSignalsTestsBase):
     """Tests for alias signals for member years"""
 
@@ -436,14 +423,11 @@ class MemberYearAliasSignalsTests(AliasSignalsTestsBase):
         mock_c.assert_called_once_with()
 
 
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_member_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_global_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.update_committee_aliases")
-@patch("mailcow_integration.squire_mailcow.SquireMailcowManager.delete_aliases")
-@patch(
-    "mailcow_integration.signals.get_mailcow_manager",
-    return_value=SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key"),
-)
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_member_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_global_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.update_committee_aliases")
+@patch("mailcow_integration.outbox.MailcowAliasOutbox.delete_aliases")
+@patch("mailcow_integration.signals.get_alias_outbox", return_value=MailcowAliasOutbox())
 class MembershipAliasSignalsTests(AliasSignalsTestsBase):
     """Tests for alias signals for memberships (year-member link)"""
 
@@ -569,21 +553,29 @@ class MembershipAliasSignalsTests(AliasSignalsTestsBase):
         mock_c.assert_called_once_with()
 
 
-@patch(
-    "mailcow_integration.signals.get_mailcow_manager",
-    return_value=SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key"),
-)
+@patch("mailcow_integration.signals.get_alias_outbox", return_value=MailcowAliasOutbox())
 class MiscAliasSignalTests(MailcowSignalTestMixin, TestCase):
     """Miscellaneous tests for Mailcow alias signals"""
 
     @patch(
-        "mailcow_integration.squire_mailcow.SquireMailcowManager._set_alias_by_name", side_effect=MailcowException()
+        "mailcow_integration.squire_mailcow.SquireMailcowManager._send_alias_change", side_effect=MailcowException()
     )
     @patch("mailcow_integration.squire_mailcow.SquireMailcowManager.mailbox_map", return_value={})
+    @patch(
+        "mailcow_integration.squire_mailcow.SquireMailcowManager.alias_map", return_value={}, new_callable=PropertyMock
+    )
     @suppress_infos(logger_name="mailcow_integration.squire_mailcow")
-    def test_exception_handling(self, _, mock_a: Mock, mock_mailcow_manager: Mock):
+    def test_exception_handling(self, _a, _m, mock_a: Mock, mock_outbox: Mock):
         """Tests whether signals do not break when the API raises a MailcowException"""
         AssociationGroup.objects.create(
             name="group3", contact_email="bar@example.com", type=AssociationGroup.COMMITTEE
         )
-        mock_a.assert_called_once()  # Sanity check
+        # Signals only mark the alias as dirty
+        mock_a.assert_not_called()
+        self.assertTrue(AliasOutboxEntry.objects.filter(address="bar@example.com").exists())
+
+        errors = drain_alias_outbox(SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key"))
+        mock_a.assert_called()  # Sanity check
+        self.assertIn("bar@example.com", [address for address, _ in errors])
+        # Failed aliases are retried later
+        self.assertTrue(AliasOutboxEntry.objects.filter(address="bar@example.com").exists())
@@ -1,7 +1,9 @@
 from copy import deepcopy
+import time
 from typing import List
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from dynamic_preferences.users.models import UserPreferenceModel
 from unittest.mock import Mock, PropertyMock, patch, ANY
@@ -12,7 +14,7 @@ from mailcow_integration.api.exceptions import MailcowException
 from mailcow_integration.api.interface.alias import MailcowAlias
 from mailcow_integration.api.interface.mailbox import MailcowMailbox
 from mailcow_integration.api.interface.rspamd import RspamdSettings
-from mailcow_integration.squire_mailcow import AliasCategory, SquireMailcowManager
+from mailcow_integration.squire_mailcow import AliasAction, AliasCategory, SquireMailcowManager
 from membership_file.models import Member
 
 User = get_user_model()
@@ -27,8 +29,16 @@ class SquireMailcowManagerTest(TestCase):
     """Tests the Squire Mailcow Manager"""
 
     def setUp(self):
+        # Snapshots of the Mailcow state are shared through the cache
+        cache.clear()
         self.squire_mailcow_manager = SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key")
 
+    def _set_alias_cache(self, aliases: List[MailcowAlias]):
+        """Fills the local alias snapshot, as if it was just fetched"""
+        self.squire_mailcow_manager._alias_cache = aliases
+        self.squire_mailcow_manager._alias_cache_version = self.squire_mailcow_manager.get_alias_state_version()
+        self.squire_mailcow_manager._alias_cache_time = time.time()
+
     def _setup_subs(self, default_opt: bool):
         """Setup subscription preferences test data.
         Creates one member with a preference for: opt-in, opt-out, no preference set, not linked to a user
@@ -82,6 +92,32 @@ class SquireMailcowManagerTest(TestCase):
         expected_subs = Member.objects.filter(first_name__in=["Subbed"])
         self.assertQuerySetEqual(subs, expected_subs)
 
+    @override_settings(
+        MEMBER_ALIASES={
+            "mycategory@example.com": {"default_opt": True},
+            "my_category@example.com": {"default_opt": False},
+        }
+    )
+    def test_member_alias_subscribers(self):
+        """Tests that the subscribers of all member aliases are computed at once, with the same
+        results as get_subscribed_members
+        """
+        self.squire_mailcow_manager.BLOCKLISTED_EMAIL_ADDRESSES = []
+        self._setup_subs(True)
+        UserPreferenceModel.objects.create(
+            instance=User.objects.get(username="foo"), name="my_categoryexamplecom", raw_value="True", section="mail"
+        )
+        # Active years, committee emails, members, and preferences; regardless of the number of aliases
+        with self.assertNumQueries(4):
+            subscribers = self.squire_mailcow_manager.get_member_alias_subscribers()
+        self.assertDictEqual(
+            subscribers,
+            {
+                "mycategory@example.com": ["baz@example.com", "foo@example.com", "moo@example.com"],
+                "my_category@example.com": ["foo@example.com"],
+            },
+        )
+
     def test_str(self):
         """Tests the __str__ method"""
         self.assertEqual(str(self.squire_mailcow_manager), "SquireMailcowManager[example.com]")
@@ -266,7 +302,7 @@ class SquireMailcowManagerTest(TestCase):
             "mailcow_integration.squire_mailcow.SquireMailcowManager.get_internal_alias_rspamd_settings",
             return_value=(setting, setting),
         ):
-            self.squire_mailcow_manager.update_internal_addresses()
+            self.squire_mailcow_manager.update_internal_addresses(use_cache=False)
             # Create method should not be called
             mock_create.assert_not_called()
             # Update called twice (once for each rule)
@@ -282,7 +318,7 @@ class SquireMailcowManagerTest(TestCase):
             "mailcow_integration.squire_mailcow.SquireMailcowManager.get_internal_alias_rspamd_settings",
             return_value=(setting, setting),
         ):
-            self.squire_mailcow_manager.update_internal_addresses()
+            self.squire_mailcow_manager.update_internal_addresses(use_cache=False)
             # Create method should not be called
             mock_create.assert_not_called()
             self.assertEqual(mock_update.call_count, 2)
@@ -295,11 +331,60 @@ class SquireMailcowManagerTest(TestCase):
             "mailcow_integration.squire_mailcow.SquireMailcowManager.get_internal_alias_rspamd_settings",
             return_value=(None, None),
         ):
-            self.squire_mailcow_manager.update_internal_addresses()
+            self.squire_mailcow_manager.update_internal_addresses(use_cache=False)
             # Update method should not be called
             self.assertEqual(mock_create.call_count, 2)
             mock_update.assert_not_called()
 
+    @patch("mailcow_integration.api.client.MailcowAPIClient.update_rspamd_setting")
+    def test_update_internal_addresses_fingerprint(self, mock_update: Mock):
+        """Tests whether no requests are made if the settings are already up-to-date with the same addresses"""
+        self.squire_mailcow_manager.INTERNAL_ALIAS_ADDRESSES = ["foo@example.com"]
+        manager = self.squire_mailcow_manager
+        setting_w = RspamdSettings(
+            1, manager.INTERNAL_ALIAS_SETTING_NAME % manager.INTERNAL_ALIAS_SETTING_WHITELIST_NAME, "out of date", True
+        )
+        setting_b = RspamdSettings(
+            2, manager.INTERNAL_ALIAS_SETTING_NAME % manager.INTERNAL_ALIAS_SETTING_BLACKLIST_NAME, "out of date", True
+        )
+
+        with patch(
+            "mailcow_integration.api.client.MailcowAPIClient.get_rspamd_setting_all",
+            side_effect=lambda: iter([setting_w, setting_b]),
+        ) as mock_get:
+            self.squire_mailcow_manager.update_internal_addresses()
+            mock_get.assert_called_once()
+            self.assertEqual(mock_update.call_count, 2)
+            # Updated settings are used afterwards
+            self.assertTrue(self.squire_mailcow_manager.is_address_internal("foo@example.com"))
+
+            # Settings were already updated for these addresses; no requests are made
+            mock_get.reset_mock()
+            mock_update.reset_mock()
+            self.squire_mailcow_manager.update_internal_addresses()
+            mock_get.assert_not_called()
+            mock_update.assert_not_called()
+
+            # Other processes know this as well
+            other_manager = SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key")
+            other_manager.INTERNAL_ALIAS_ADDRESSES = ["foo@example.com"]
+            other_manager.update_internal_addresses()
+            mock_get.assert_not_called()
+            self.assertTrue(other_manager.is_address_internal("foo@example.com"))
+
+            # Addresses changed; settings are fetched and updated again
+            self.squire_mailcow_manager.INTERNAL_ALIAS_ADDRESSES = ["bar@example.com"]
+            self.squire_mailcow_manager.update_internal_addresses()
+            mock_get.assert_called_once()
+            self.assertEqual(mock_update.call_count, 2)
+            self.assertFalse(self.squire_mailcow_manager.is_address_internal("foo@example.com"))
+            self.assertTrue(self.squire_mailcow_manager.is_address_internal("bar@example.com"))
+
+            # Updates can be forced
+            mock_get.reset_mock()
+            self.squire_mailcow_manager.update_internal_addresses(use_cache=False)
+            mock_get.assert_called_once()
+
     ################
     # ALIASES/MAILBOX CACHING
     ################
@@ -381,73 +466,122 @@ class SquireMailcowManagerTest(TestCase):
         # Cache should be regenerated (compare list identities)
         self.assertNotEqual(mailboxes, mailbox_cache)
 
-    @patch(
-        "mailcow_integration.squire_mailcow.SquireMailcowManager.get_alias_all",
-        return_value=iter(
-            [
-                MailcowAlias("foo@example.com", ["a@example.com", "b@example.com"], 99),
-                MailcowAlias("bar@example.com", ["x@example.com", "y@example.com"], 100),
-            ]
-        ),
-    )
+    @patch("mailcow_integration.squire_mailcow.SquireMailcowManager.get_alias_all")
     def test_alias_map_prop(self, mock_get: Mock):
-        """Tests the caching behaviour of alias_map"""
-        # Cache is empty, so should make a request. Caches should be set accordingly
-        self.squire_mailcow_manager.alias_map
+        """Tests that alias_map is only rebuilt when the aliases change"""
+        aliases = [
+            MailcowAlias("foo@example.com", ["a@example.com", "b@example.com"], 99),
+            MailcowAlias("bar@example.com", ["x@example.com", "y@example.com"], 100),
+        ]
+        mock_get.return_value = aliases
+        alias_map = self.squire_mailcow_manager.alias_map
         mock_get.assert_called_once()
-        self.assertIsNotNone(self.squire_mailcow_manager._alias_map_cache)
-        self.assertEqual(len(self.squire_mailcow_manager._alias_map_cache), 2)
-        self.assertIsNotNone(self.squire_mailcow_manager._alias_map_cache["foo@example.com"])
-        self.assertIsNotNone(self.squire_mailcow_manager._alias_map_cache["bar@example.com"])
-        alias_cache = deepcopy(self.squire_mailcow_manager._alias_map_cache)
+        self.assertEqual(len(alias_map), 2)
+        self.assertEqual(alias_map["foo@example.com"].id, 99)
+        self.assertEqual(alias_map["bar@example.com"].id, 100)
 
-        # Cache is not empty, so should not make a request
-        mock_get.reset_mock()
-        self.squire_mailcow_manager._alias_cache = "dummy"
-        aliases = self.squire_mailcow_manager.alias_map
-        mock_get.assert_not_called()
-        self.assertDictEqual(aliases, alias_cache)  # Cache wasn't modified
+        # Aliases did not change, so the map is not rebuilt
+        self.assertIs(self.squire_mailcow_manager.alias_map, alias_map)
 
-        # Alias cache was invalidated
-        mock_get.reset_mock()
-        self.squire_mailcow_manager._alias_cache = None
-        self.squire_mailcow_manager.alias_map
-        mock_get.assert_called_once()
-        self.assertIsNotNone(self.squire_mailcow_manager._alias_map_cache)
+        # Aliases changed
+        mock_get.return_value = aliases[:1]
+        alias_map = self.squire_mailcow_manager.alias_map
+        self.assertEqual(len(alias_map), 1)
+        self.assertIn("foo@example.com", alias_map)
 
-    @patch(
-        "mailcow_integration.squire_mailcow.SquireMailcowManager.get_mailbox_all",
-        return_value=iter(
-            [
-                MailcowMailbox("foo@example.com", "Mr. Foo"),
-                MailcowMailbox("bar@example.com", "Sir Bar"),
-            ]
-        ),
-    )
+    @patch("mailcow_integration.squire_mailcow.SquireMailcowManager.get_mailbox_all")
     def test_mailbox_map_prop(self, mock_get: Mock):
-        """Tests the caching behaviour of mailbox_map"""
-        # Cache is empty, so should make a request. Caches should be set accordingly
-        self.squire_mailcow_manager.mailbox_map
+        """Tests that mailbox_map is only rebuilt when the mailboxes change"""
+        mailboxes = [
+            MailcowMailbox("foo@example.com", "Mr. Foo"),
+            MailcowMailbox("bar@example.com", "Sir Bar"),
+        ]
+        mock_get.return_value = mailboxes
+        mailbox_map = self.squire_mailcow_manager.mailbox_map
         mock_get.assert_called_once()
-        self.assertIsNotNone(self.squire_mailcow_manager._mailbox_map_cache)
-        self.assertEqual(len(self.squire_mailcow_manager._mailbox_map_cache), 2)
-        self.assertIsNotNone(self.squire_mailcow_manager._mailbox_map_cache["foo@example.com"])
-        self.assertIsNotNone(self.squire_mailcow_manager._mailbox_map_cache["bar@example.com"])
-        mailbox_cache = deepcopy(self.squire_mailcow_manager._mailbox_map_cache)
+        self.assertEqual(len(mailbox_map), 2)
+        self.assertEqual(mailbox_map["foo@example.com"].name, "Mr. Foo")
+        self.assertEqual(mailbox_map["bar@example.com"].name, "Sir Bar")
 
-        # Cache is not empty, so should not make a request
-        mock_get.reset_mock()
-        self.squire_mailcow_manager._mailbox_cache = "dummy"
-        mailboxes = self.squire_mailcow_manager.mailbox_map
-        mock_get.assert_not_called()
-        self.assertDictEqual(mailboxes, mailbox_cache)  # Cache wasn't modified
+        # Mailboxes did not change, so the map is not rebuilt
+        self.assertIs(self.squire_mailcow_manager.mailbox_map, mailbox_map)
 
-        # Mailbox cache was invalidated
-        mock_get.reset_mock()
-        self.squire_mailcow_manager._mailbox_cache = None
-        self.squire_mailcow_manager.mailbox_map
-        mock_get.assert_called_once()
-        self.assertIsNotNone(self.squire_mailcow_manager._mailbox_map_cache)
+        # Mailboxes changed
+        mock_get.return_value = mailboxes[:1]
+        mailbox_map = self.squire_mailcow_manager.mailbox_map
+        self.assertEqual(len(mailbox_map), 1)
+
+    @patch("mailcow_integration.api.client.MailcowAPIClient.update_alias")
+    @patch("mailcow_integration.api.client.MailcowAPIClient.get_mailbox_all")
+    @patch("mailcow_integration.api.client.MailcowAPIClient.get_alias_all")
+    def test_shared_state_cache(self, mock_get_aliases: Mock, mock_get_mailboxes: Mock, mock_update: Mock):
+        """Tests that snapshots of aliases and mailboxes are shared between managers (e.g. in different processes)"""
+        mock_get_aliases.side_effect = lambda: iter(
+            [MailcowAlias("foo@example.com", ["a@example.com"], 99, public_comment="Foo!")]
+        )
+        mock_get_mailboxes.side_effect = lambda: iter([MailcowMailbox("bar@example.com", "Sir Bar")])
+        other_manager = SquireMailcowManager(mailcow_host="example.com", mailcow_api_key="fake_key")
+
+        # Fetched once, then shared
+        self.squire_mailcow_manager.get_alias_all()
+        self.squire_mailcow_manager.get_mailbox_all()
+        self.assertEqual(other_manager.alias_map["foo@example.com"].goto, ["a@example.com"])
+        self.assertIn("bar@example.com", other_manager.mailbox_map)
+        mock_get_aliases.assert_called_once()
+        mock_get_mailboxes.assert_called_once()
+
+        # Our own writes invalidate snapshots of others, but share the new state
+        self.squire_mailcow_manager._set_alias_by_name("foo@example.com", ["b@example.com"], "Foo!")
+        mock_update.assert_called_once()
+        self.squire_mailcow_manager._save_alias_cache()
+        self.assertEqual(other_manager.alias_map["foo@example.com"].goto, ["b@example.com"])
+        mock_get_aliases.assert_called_once()
+
+        # Snapshots of others are not used if they have been modified since
+        self.squire_mailcow_manager._mark_aliases_modified(state_known=False)
+        self.assertEqual(other_manager.alias_map["foo@example.com"].goto, ["a@example.com"])
+        self.assertEqual(mock_get_aliases.call_count, 2)
+
+        # Snapshots expire
+        with override_settings(MAILCOW_STATE_CACHE_TIMEOUT=0):
+            other_manager.get_alias_all()
+            other_manager.get_mailbox_all()
+        self.assertEqual(mock_get_aliases.call_count, 3)
+        self.assertEqual(mock_get_mailboxes.call_count, 2)
+
+        # Snapshots older than a requested maximum age are not used
+        other_manager.get_alias_all(max_age=60)
+        self.assertEqual(mock_get_aliases.call_count, 3)
+        other_manager.get_alias_all(max_age=0)
+        other_manager.get_mailbox_all(max_age=0)
+        self.assertEqual(mock_get_aliases.call_count, 4)
+        self.assertEqual(mock_get_mailboxes.call_count, 3)
+
+    @patch("mailcow_integration.api.client.MailcowAPIClient.get_mailbox_all", side_effect=lambda: iter([]))
+    @patch("mailcow_integration.api.client.MailcowAPIClient.get_alias_all", side_effect=lambda: iter([]))
+    @patch(
+        "mailcow_integration.squire_mailcow.SquireMailcowManager.get_committee_alias_gotos",
+        return_value={f"committee{i}@example.com": ["foo@example.com"] for i in range(5)},
+    )
+    @patch("mailcow_integration.squire_mailcow.SquireMailcowManager.get_global_committee_alias_gotos", return_value={})
+    @patch("mailcow_integration.squire_mailcow.SquireMailcowManager.get_member_alias_gotos", return_value={})
+    def test_alias_state_version_read_once(self, *mocks: Mock):
+        """Tests that the shared alias state version is read once per operation, not on each access to the aliases"""
+        manager = self.squire_mailcow_manager
+        with patch.object(
+            SquireMailcowManager, "_read_alias_state_version", autospec=True, return_value=1
+        ) as mock_read_version:
+            plan = manager.plan_alias_reconciliation()
+        self.assertEqual(len(plan.get_changes(AliasAction.CREATE)), 5)
+        mock_read_version.assert_called_once()
+
+        # Outside of operations, the version is read on each access
+        with patch.object(
+            SquireMailcowManager, "_read_alias_state_version", autospec=True, return_value=1
+        ) as mock_read_version:
+            manager.alias_map
+            manager.alias_map
+        self.assertEqual(mock_read_version.call_count, 2)
 
     ################
     # Deleting aliases
@@ -464,7 +598,7 @@ class SquireMailcowManagerTest(TestCase):
     )
     def test_delete_aliases(self, mock_alias_map: Mock, mock_delete: Mock):
         """Tests deletion of aliases"""
-        self.squire_mailcow_manager._alias_cache = mock_alias_map.return_value.values()
+        self._set_alias_cache(list(mock_alias_map.return_value.values()))
         # Not deleted when public comment does not match up, alias cache kept intact
         error = self.squire_mailcow_manager.delete_aliases(["foo@example.com"], "Bar!")
         self.assertIsNone(error)
@@ -472,11 +606,11 @@ class SquireMailcowManagerTest(TestCase):
         self.assertIsNotNone(self.squire_mailcow_manager._alias_cache)
 
         # Deletion happens normally; invalid addresses skipped
-        #   alias cache invalidated
+        #   deleted alias removed from the alias cache
         error = self.squire_mailcow_manager.delete_aliases(["foo@example.com", "invalid@example.com"], "Fo")
         self.assertIsNone(error)
         mock_delete.assert_called_once_with([mock_alias_map.return_value["foo@example.com"]])
-        self.assertIsNone(self.squire_mailcow_manager._alias_cache)
+        self.assertListEqual(self.squire_mailcow_manager._alias_cache, [])
 
         # API exceptions are caught
         e = MailcowException("Something went terribly, terribly wrong!")
@@ -539,6 +673,14 @@ class SquireMailcowManagerTest(TestCase):
         self.assertFalse(alias.sogo_visible)
         mock_update.reset_mock()
 
+        # Alias is already up-to-date; no request is made
+        action = self.squire_mailcow_manager._set_alias_by_name(
+            "foo@example.com", ["c@example.com", "d@example.com"], "Foo!"
+        )
+        self.assertEqual(action, AliasAction.UNCHANGED)
+        mock_create.assert_not_called()
+        mock_update.assert_not_called()
+
         # goto is empty (failsafe)
         self.squire_mailcow_manager._set_alias_by_name("foo@example.com", [], "Foo!")
         mock_create.assert_not_called()
@@ -551,6 +693,61 @@ class SquireMailcowManagerTest(TestCase):
         self.assertFalse(alias.sogo_visible)
         mock_update.reset_mock()
 
+    @patch("mailcow_integration.api.client.MailcowAPIClient.update_alias")
+    @patch(
+        "mailcow_integration.squire_mailcow.SquireMailcowManager.mailbox_map",
+        return_value={},
+        new_callable=PropertyMock,
+    )
+    def test_failed_alias_update(self, mock_mailbox_map: Mock, mock_update: Mock):
+        """Tests that the cached alias is not modified if the API rejects its update"""
+        alias = MailcowAlias("foo@example.com", ["a@example.com"], 99, public_comment="Foo!", sogo_visible=False)
+        self._set_alias_cache([alias])
+        mock_update.side_effect = MailcowException("Something went terribly, terribly wrong!")
+
+        with self.assertRaises(MailcowException):
+            self.squire_mailcow_manager._set_alias_by_name("foo@example.com", ["b@example.com"], "Foo!")
+        mock_update.assert_called_once()
+        self.assertEqual(alias.goto, ["a@example.com"])
+
+        # The update is attempted again next time
+        change = self.squire_mailcow_manager._plan_alias_change("foo@example.com", ["b@example.com"], "Foo!")
+        self.assertEqual(change.action, AliasAction.UPDATE)
+
+    @patch("mailcow_integration.api.client.MailcowAPIClient.create_alias")
+    @patch("mailcow_integration.api.client.MailcowAPIClient.get_alias_all")
+    @patch(
+        "mailcow_integration.squire_mailcow.SquireMailcowManager.mailbox_map",
+        return_value={},
+        new_callable=PropertyMock,
+    )
+    def test_created_aliases_refetched_once(self, mock_mailbox_map: Mock, mock_get_aliases: Mock, mock_create: Mock):
+        """Tests that created aliases are added to the snapshot, and that aliases are refetched once afterwards"""
+        manager = self.squire_mailcow_manager
+        self._set_alias_cache([])
+        mock_get_aliases.side_effect = lambda: iter(
+            [
+                MailcowAlias("new@example.com", ["a@example.com"], 1, public_comment="Foo!"),
+                MailcowAlias("new2@example.com", ["b@example.com"], 2, public_comment="Foo!"),
+            ]
+        )
+
+        manager._set_alias_by_name("new@example.com", ["a@example.com"], "Foo!")
+        self.assertIn("new@example.com", manager.alias_map)
+        # Creating the same alias again is not attempted
+        action = manager._set_alias_by_name("new@example.com", ["a@example.com"], "Foo!")
+        self.assertEqual(action, AliasAction.UNCHANGED)
+        manager._set_alias_by_name("new2@example.com", ["b@example.com"], "Foo!")
+        self.assertEqual(mock_create.call_count, 2)
+        mock_get_aliases.assert_not_called()
+
+        # Aliases without an id are not shared, but refetched at the end of the batch instead
+        manager._save_alias_cache()
+        self.assertIsNone(cache.get(manager._get_state_cache_key("aliases")))
+        manager._finish_alias_changes()
+        mock_get_aliases.assert_called_once()
+        self.assertEqual(manager.alias_map["new2@example.com"].id, 2)
+
     @patch(
         "mailcow_integration.squire_mailcow.SquireMailcowManager.get_archive_adresses_for_type",
         return_value=["archive@example.com", "archive2@example.com"],
@@ -562,10 +759,14 @@ class SquireMailcowManagerTest(TestCase):
         },
         new_callable=PropertyMock,
     )
-    @patch("mailcow_integration.squire_mailcow.SquireMailcowManager._set_alias_by_name")
+    @patch("mailcow_integration.api.client.MailcowAPIClient.get_alias_all", side_effect=lambda: iter([]))
+    @patch("mailcow_integration.api.client.MailcowAPIClient.create_alias")
     @suppress_warnings(logger_name="mailcow_integration.squire_mailcow")
-    def test_update_committee_aliases(self, mock_set_alias: Mock, mock_mailbox_map: Mock, archive_mock: Mock):
+    def test_update_committee_aliases(
+        self, mock_create: Mock, mock_get_aliases: Mock, mock_mailbox_map: Mock, archive_mock: Mock
+    ):
         """Tests updating committee aliases"""
+        self._set_alias_cache([])
         self.squire_mailcow_manager.BLOCKLISTED_EMAIL_ADDRESSES = ["blocklisted@example.com"]
         # Setup committees:
         #   - boardgames: foo, bar
@@ -598,39 +799,38 @@ class SquireMailcowManagerTest(TestCase):
         AssociationGroupMembership.objects.create(member=blockedmem, group=rp)
         AssociationGroupMembership.objects.create(member=bar, group=blocked)
 
-        errors = self.squire_mailcow_manager.update_committee_aliases()
+        # Members of all committees are fetched at once
+        with self.assertNumQueries(3):
+            errors = self.squire_mailcow_manager.update_committee_aliases()
         self.assertFalse(errors)
         # Blockedlisted member email not used
-        mock_set_alias.assert_any_call(
-            "bg@example.com",
+        created = {alias.address: alias for alias in (call.args[0] for call in mock_create.call_args_list)}
+        self.assertListEqual(
+            created["bg@example.com"].goto,
             archive_mock.return_value + ["memberbar@example.com", "memberfoo@example.com"],
-            public_comment=self.squire_mailcow_manager.ALIAS_COMMITTEE_PUBLIC_COMMENT,
         )
-        mock_set_alias.assert_any_call(
-            "rp@example.com",
-            archive_mock.return_value + ["memberfoo@example.com"],
-            public_comment=self.squire_mailcow_manager.ALIAS_COMMITTEE_PUBLIC_COMMENT,
+        self.assertListEqual(created["rp@example.com"].goto, archive_mock.return_value + ["memberfoo@example.com"])
+        self.assertEqual(
+            created["bg@example.com"].public_comment, self.squire_mailcow_manager.ALIAS_COMMITTEE_PUBLIC_COMMENT
         )
         # Blocklisted & Mailbox committee email not called
-        self.assertEqual(mock_set_alias.call_count, 2)
+        self.assertEqual(mock_create.call_count, 2)
 
-        # Alias cache is invalidated
-        self.assertIsNone(self.squire_mailcow_manager._alias_cache)
+        # Aliases were planned before any threads started, and are refetched once afterwards
+        mock_get_aliases.assert_called_once()
+        self.assertIsNotNone(self.squire_mailcow_manager._alias_cache)
 
         # limit_update_to is adhered to
-        mock_set_alias.reset_mock()
+        mock_create.reset_mock()
         self.squire_mailcow_manager.update_committee_aliases(limit_update_to=["bg@example.com"])
-        mock_set_alias.assert_called_once_with(
-            "bg@example.com",
-            archive_mock.return_value + ["memberbar@example.com", "memberfoo@example.com"],
-            public_comment=self.squire_mailcow_manager.ALIAS_COMMITTEE_PUBLIC_COMMENT,
-        )
+        mock_create.assert_called_once()
+        self.assertEqual(mock_create.call_args.args[0].address, "bg@example.com")
 
         # API exceptions are caught
         e = MailcowException("Something went terribly, terribly wrong!")
-        with patch("mailcow_integration.squire_mailcow.SquireMailcowManager._set_alias_by_name", side_effect=e):
-            errors = self.squire_mailcow_manager.update_committee_aliases()
-            self.assertListEqual(errors, [("bg@example.com", e), ("rp@example.com", e)])
+        mock_create.side_effect = e
+        errors = self.squire_mailcow_manager.update_committee_aliases()
+        self.assertListEqual(errors, [("bg@example.com", e), ("rp@example.com", e)])
 
     @patch(
         "mailcow_integration.squire_mailcow.SquireMailcowManager.mailbox_map",
@@ -663,6 +863,7 @@ class SquireMailcowManagerTest(TestCase):
     @suppress_warnings(logger_name="mailcow_integration.squire_mailcow")
     def test_update_member_aliases(self, mock_set_alias: Mock, mock_mailbox_map: Mock):
         """Tests updating member aliases"""
+        self._set_alias_cache([])
         self.squire_mailcow_manager.BLOCKLISTED_EMAIL_ADDRESSES = ["blocklisted@example.com"]
 
         bg = AssociationGroup.objects.create(
@@ -691,8 +892,8 @@ class SquireMailcowManagerTest(TestCase):
         # Blocklisted & Mailbox email not called
         self.assertEqual(mock_set_alias.call_count, 1)
 
-        # Alias cache is invalidated
-        self.assertIsNone(self.squire_mailcow_manager._alias_cache)
+        # Alias cache is kept; updates are made to the cached aliases in-place
+        self.assertIsNotNone(self.squire_mailcow_manager._alias_cache)
 
         # API exceptions are caught
         e = MailcowException("Something went terribly, terribly wrong!")
@@ -722,6 +923,7 @@ class SquireMailcowManagerTest(TestCase):
     @suppress_warnings(logger_name="mailcow_integration.squire_mailcow")
     def test_update_global_committee_aliases(self, mock_set_alias: Mock, mock_mailbox_map: Mock, archive_mock: Mock):
         """Tests updating committee aliases"""
+        self._set_alias_cache([])
         self.squire_mailcow_manager.BLOCKLISTED_EMAIL_ADDRESSES = [
             "leden@example.com",
             "commissies@example.com",
@@ -757,8 +959,8 @@ class SquireMailcowManagerTest(TestCase):
         self.assertEqual(mock_set_alias.call_count, 2)
         # globalaliasmailbox@example.com is a mailbox; alias shouldn't be created
 
-        # Alias cache is invalidated
-        self.assertIsNone(self.squire_mailcow_manager._alias_cache)
+        # Alias cache is kept; updates are made to the cached aliases in-place
+        self.assertIsNotNone(self.squire_mailcow_manager._alias_cache)
 
         # API exceptions are caught
         e = MailcowException("Something went terribly, terribly wrong!")
@@ -766,6 +968,108 @@ class SquireMailcowManagerTest(TestCase):
             errors = self.squire_mailcow_manager.update_global_committee_aliases()
             self.assertListEqual(errors, [("commissies@example.com", e), ("ordes@example.com", e)])
 
+    ################
+    # Reconciliation
+    ################
+    @patch("mailcow_integration.api.client.MailcowAPIClient.delete_aliases")
+    @patch("mailcow_integration.api.client.MailcowAPIClient.create_alias")
+    @patch("mailcow_integration.api.client.MailcowAPIClient.update_alias")
+    @patch("mailcow_integration.api.client.MailcowAPIClient.get_mailbox_all")
+    @patch("mailcow_integration.api.client.MailcowAPIClient.get_alias_all")
+    @patch(
+        "mailcow_integration.squire_mailcow.SquireMailcowManager.get_global_committee_alias_gotos",
+        return_value={"committees@example.com": ["uptodate@example.com", "new@example.com"]},
+    )
+    @patch(
+        "mailcow_integration.squire_mailcow.SquireMailcowManager.get_committee_alias_gotos",
+        return_value={
+            "uptodate@example.com": ["foo@example.com"],
+            "new@example.com": ["bar@example.com"],
+            "mailbox@example.com": ["foo@example.com"],
+            "unmanaged@example.com": ["foo@example.com"],
+        },
+    )
+    @patch(
+        "mailcow_integration.squire_mailcow.SquireMailcowManager.get_member_alias_gotos",
+        return_value={"members@example.com": ["foo@example.com", "bar@example.com"]},
+    )
+    def test_reconcile_aliases(
+        self,
+        _m: Mock,
+        _c: Mock,
+        _gc: Mock,
+        mock_get_aliases: Mock,
+        mock_get_mailboxes: Mock,
+        mock_update: Mock,
+        mock_create: Mock,
+        mock_delete: Mock,
+    ):
+        """Tests that only aliases that differ from Squire's data are sent to the Mailcow API"""
+        manager = self.squire_mailcow_manager
+        members_alias = MailcowAlias(
+            "members@example.com", ["foo@example.com"], 1, public_comment=manager.ALIAS_MEMBERS_PUBLIC_COMMENT
+        )
+        uptodate_alias = MailcowAlias(
+            "uptodate@example.com",
+            ["foo@example.com"],
+            2,
+            public_comment=manager.ALIAS_COMMITTEE_PUBLIC_COMMENT,
+            sogo_visible=False,
+        )
+        unmanaged_alias = MailcowAlias("unmanaged@example.com", ["foo@example.com"], 3, public_comment="Manual")
+        orphan_alias = MailcowAlias(
+            "orphan@example.com", ["foo@example.com"], 4, public_comment=manager.ALIAS_COMMITTEE_PUBLIC_COMMENT
+        )
+        orphan_alias2 = MailcowAlias(
+            "orphan2@example.com", ["foo@example.com"], 5, public_comment=manager.ALIAS_MEMBERS_PUBLIC_COMMENT
+        )
+        mock_get_aliases.side_effect = lambda: iter(
+            [members_alias, uptodate_alias, unmanaged_alias, orphan_alias, orphan_alias2]
+        )
+        mock_get_mailboxes.side_effect = lambda: iter([MailcowMailbox("mailbox@example.com", "Mailbox")])
+
+        # Dry run does not make any writes
+        plan = manager.reconcile_aliases(dry_run=True)
+        self.assertFalse(plan.applied)
+        self.assertTrue(plan.has_changes)
+        mock_update.assert_not_called()
+        mock_create.assert_not_called()
+        mock_delete.assert_not_called()
+        actions = {change.address: change.action for change in plan.changes}
+        self.assertDictEqual(
+            actions,
+            {
+                "members@example.com": AliasAction.UPDATE,
+                "uptodate@example.com": AliasAction.UNCHANGED,
+                "new@example.com": AliasAction.CREATE,
+                "mailbox@example.com": AliasAction.SKIP,
+                "unmanaged@example.com": AliasAction.SKIP,
+                "committees@example.com": AliasAction.CREATE,
+                "orphan@example.com": AliasAction.DELETE,
+                "orphan2@example.com": AliasAction.DELETE,
+            },
+        )
+        report = plan.report()
+        self.assertIn("1 update", report)
+        self.assertIn("CREATE new@example.com (1 goto addresses)", report)
+        self.assertNotIn("uptodate@example.com", report)
+
+        # Applying the plan only writes aliases that differ; deletions are batched
+        plan = manager.reconcile_aliases()
+        self.assertTrue(plan.applied)
+        self.assertListEqual(plan.errors, [])
+        mock_update.assert_called_once_with(members_alias)
+        self.assertListEqual(members_alias.goto, ["foo@example.com", "bar@example.com"])
+        self.assertEqual(mock_create.call_count, 2)
+        mock_delete.assert_called_once_with([orphan_alias, orphan_alias2])
+
+        # API exceptions are caught
+        e = MailcowException("Something went terribly, terribly wrong!")
+        mock_delete.side_effect = e
+        plan = manager.reconcile_aliases()
+        self.assertIn(("orphan@example.com", e), plan.errors)
+        self.assertIn(("orphan2@example.com", e), plan.errors)
+
     @override_settings(
         MEMBER_ALIASES={
             "leden@example.com": {
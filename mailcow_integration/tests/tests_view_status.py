@@ -1,4 +1,5 @@
 from typing import List
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.test import RequestFactory, TestCase, override_settings
@@ -17,7 +18,7 @@ from mailcow_integration.api.exceptions import (
 from mailcow_integration.api.interface.alias import MailcowAlias
 from mailcow_integration.api.interface.mailbox import MailcowMailbox
 from mailcow_integration.squire_mailcow import AliasCategory, SquireMailcowManager
-from mailcow_integration.admin_status.views import AliasInfos, AliasStatus, MailcowStatusView
+from mailcow_integration.admin_status.views import AliasExposureGraph, AliasInfos, AliasStatus, MailcowStatusView
 from membership_file.models import Member
 
 User = get_user_model()
@@ -330,6 +331,40 @@ class MailcowStatusExposureTests(MailcowStatusViewTests):
             [["exposed1@example.com", "internal@example.com"], ["exposed2@example.com", "internal@example.com"]],
         )
 
+    def test_exposed_cycle(self):
+        """Tests that cycles of internal aliases do not cause infinite recursion"""
+        self.member_aliases["internal2@example.com"] = {"internal": True}
+        aliases = [
+            MailcowAlias("internal@example.com", ["foo@example.com", "internal2@example.com"]),
+            MailcowAlias("internal2@example.com", ["internal@example.com"]),
+            MailcowAlias("exposed@example.com", ["internal2@example.com"]),
+        ]
+
+        exposure_routes = self.view._get_alias_exposure_routes("foo@example.com", aliases, [], self.member_aliases)
+        self.assertListEqual(
+            exposure_routes, [["exposed@example.com", "internal2@example.com", "internal@example.com"]]
+        )
+        exposure_routes = self.view._get_alias_exposure_routes(
+            "internal2@example.com", aliases, [], self.member_aliases
+        )
+        self.assertListEqual(exposure_routes, [["exposed@example.com"]])
+
+    def test_exposure_graph_reused(self):
+        """Tests that the alias graph is only built once for the same aliases"""
+        aliases = [MailcowAlias("exposer@example.com", ["foo@example.com", "internal@example.com"])]
+        with patch(
+            "mailcow_integration.admin_status.views.AliasExposureGraph", wraps=AliasExposureGraph
+        ) as graph_mock:
+            self.view._get_alias_exposure_routes("foo@example.com", aliases, [], self.member_aliases)
+            routes = self.view._get_alias_exposure_routes("internal@example.com", aliases, [], self.member_aliases)
+            graph_mock.assert_called_once()
+        self.assertListEqual(routes, [["exposer@example.com"]])
+
+        # Returned routes can be modified safely
+        routes[0].append("bar@example.com")
+        routes = self.view._get_alias_exposure_routes("internal@example.com", aliases, [], self.member_aliases)
+        self.assertListEqual(routes, [["exposer@example.com"]])
+
 
 class MailcowStatusInitializersTests(MailcowStatusViewTests):
     """Tests the MailcowStatusView._init_<foo>_alias_list methods"""
@@ -610,11 +645,15 @@ class MailcowContextDataTests(MailcowStatusViewTests):
         mock_member: Mock,
     ):
         """Tests the view's get_context_data"""
-        self.view.get_context_data()
+        context = self.view.get_context_data()
+
+        # Mailbox/alias data retrieved once, only reusing recently fetched data
+        mock_aliases.assert_called_once_with(max_age=settings.MAILCOW_STATUS_MAX_AGE)
+        mock_mailboxes.assert_called_once_with(max_age=settings.MAILCOW_STATUS_MAX_AGE)
+        mock_rspamd.assert_any_call(max_age=settings.MAILCOW_STATUS_MAX_AGE)
 
-        # Mailbox/alias data retrieved once, ignoring the cache
-        mock_aliases.assert_called_once_with(use_cache=False)
-        mock_mailboxes.assert_called_once_with(use_cache=False)
+        # Time taken per fetch is shown
+        self.assertSetEqual(set(context["fetch_timings"].keys()), {"aliases", "mailboxes", "rspamd_settings"})
 
         # No API errors: Init list methods called once
         mock_member.assert_called_once_with([1], [2])
@@ -622,6 +661,19 @@ class MailcowContextDataTests(MailcowStatusViewTests):
         mock_comm.assert_called_once_with([1], [2])
         mock_orphan.assert_called_once_with([1], sentinel.m_alias, sentinel.c_alias, sentinel.gc_alias)
 
+    @patch("mailcow_integration.squire_mailcow.SquireMailcowManager.get_alias_all", return_value=[1])
+    @patch("mailcow_integration.squire_mailcow.SquireMailcowManager.get_mailbox_all", side_effect=MailcowException())
+    @patch(
+        "mailcow_integration.squire_mailcow.SquireMailcowManager.get_internal_alias_rspamd_settings",
+        return_value=(None, None),
+    )
+    @patch("mailcow_integration.admin_status.views.connections")
+    def test_fetch_closes_connections(self, mock_connections: Mock, *args):
+        """Tests that each fetch closes the database connections of its worker thread, even if it fails"""
+        with self.assertRaises(MailcowException):
+            self.view._fetch_mailcow_state()
+        self.assertEqual(mock_connections.close_all.call_count, 3)
+
     def _test_exception_not_call_list_init(
         self,
         exception: MailcowException,
@@ -632,7 +684,12 @@ class MailcowContextDataTests(MailcowStatusViewTests):
         mock_member: Mock,
     ):
         """Tests whether a given exception is handled with the given message"""
-        with patch("mailcow_integration.squire_mailcow.SquireMailcowManager.get_alias_all", side_effect=exception):
+        with patch(
+            "mailcow_integration.squire_mailcow.SquireMailcowManager.get_alias_all", side_effect=exception
+        ), patch("mailcow_integration.squire_mailcow.SquireMailcowManager.get_mailbox_all", return_value=[]), patch(
+            "mailcow_integration.squire_mailcow.SquireMailcowManager.get_internal_alias_rspamd_settings",
+            return_value=(None, None),
+        ):
             context = self.view.get_context_data()
             # Error message present in the context
             self.assertIn("error", context)
@@ -1,15 +1,25 @@
 from datetime import datetime
 
 from django.contrib import admin, messages
+from django.utils.html import format_html, format_html_join
 from django_object_actions import DjangoObjectActions, action as object_action
 from import_export.admin import ExportActionMixin
 from import_export.forms import ExportForm
 from import_export.formats.base_formats import CSV, ODS, TSV, XLSX
 
-from core.admin import DisableModificationsAdminMixin, URLLinkInlineAdminMixin
+from core.admin import DisableModificationsAdminMixin, PaginatedInlineAdminMixin, URLLinkInlineAdminMixin
 from membership_file.forms import AdminMemberForm
 from membership_file.export import MemberResource, MembersFinancialResource
-from membership_file.models import Member, MemberLog, MemberLogField, Room, MemberYear, Membership
+from membership_file.models import (
+    Member,
+    MemberLog,
+    MemberLogArchive,
+    MemberLogField,
+    Room,
+    MemberYear,
+    Membership,
+)
+from membership_file.search import search_members
 from membership_file.views import RegisterNewMemberAdminView, ResendRegistrationMailAdminView
 from utils.forms import RequestUserToFormModelAdminMixin
 
@@ -44,13 +54,32 @@ class MemberYearInline(admin.TabularInline):
     fields = ["year", "has_paid", "payment_date"]
 
 
-class MemberLogReadOnlyInline(DisableModificationsAdminMixin, URLLinkInlineAdminMixin, admin.TabularInline):
+class MemberLogReadOnlyInline(
+    DisableModificationsAdminMixin, URLLinkInlineAdminMixin, PaginatedInlineAdminMixin, admin.TabularInline
+):
     model = MemberLog
     extra = 0
     readonly_fields = ["date", "get_url"]
     fields = ["log_type", "user", "date", "get_url"]
     ordering = ("-date",)
 
+    # Only show the most recent logs; older ones are reachable through the paginator
+    per_page = 20
+    page_param = "log_page"
+
+    # Whether the object can be deleted inline
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("user")
+
+
+class MemberLogArchiveReadOnlyInline(DisableModificationsAdminMixin, URLLinkInlineAdminMixin, admin.TabularInline):
+    model = MemberLogArchive
+    extra = 0
+    readonly_fields = ["year", "entry_count", "last_archived_date", "get_url"]
+    fields = ["year", "entry_count", "last_archived_date", "get_url"]
+
     # Whether the object can be deleted inline
     can_delete = False
 
@@ -144,6 +173,13 @@ class MemberWithLog(RequestUserToFormModelAdminMixin, DjangoObjectActions, Expor
     ]
     search_help_text = "Search for name, email, phone number, TUe/external card number, key ID"
 
+    def get_search_results(self, request, queryset, search_term):
+        # Search through the indexed search tokens instead of scanning all search_fields
+        #   search_fields must remain set, as it enables the search box and autocompletion
+        if not search_term.strip():
+            return queryset, False
+        return search_members(queryset, search_term), False
+
     readonly_fields = ["last_updated_by", "last_updated_date"]
 
     # Display a search box instead of a dropdown menu
@@ -172,7 +208,7 @@ class MemberWithLog(RequestUserToFormModelAdminMixin, DjangoObjectActions, Expor
     ]
     # fmt: on
 
-    inlines = [MemberLogReadOnlyInline, MemberYearInline]
+    inlines = [MemberLogReadOnlyInline, MemberLogArchiveReadOnlyInline, MemberYearInline]
 
     # Show at most 150 members per page (opposed to 100).
     # Show a "show all" button if <999 members are selected (opposed to 200)
@@ -260,6 +296,38 @@ class MemberLogReadOnly(DisableModificationsAdminMixin, HideRelatedNameAdmin):
     inlines = [MemberLogFieldReadOnlyInline]
 
 
+# Prevents MemberLogArchive creation, editing, or deletion in the Django Admin Panel
+@admin.register(MemberLogArchive)
+class MemberLogArchiveReadOnly(DisableModificationsAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "member", "year", "entry_count", "last_archived_date")
+    list_filter = ["year"]
+    list_display_links = ("id", "member")
+    fields = ["member", "year", "entry_count", "last_archived_date", "display_entries"]
+    readonly_fields = fields
+
+    def get_queryset(self, request):
+        # Archived data can be large; only load it on the change page
+        return super().get_queryset(request).select_related("member").defer("data")
+
+    def display_entries(self, obj):
+        rows = []
+        for entry in obj.get_entries():
+            changes = format_html_join(
+                "",
+                "<li>{}: &lt;{}&gt; -&gt; &lt;{}&gt;</li>",
+                ((change["field"], change["old_value"], change["new_value"]) for change in entry["fields"]),
+            )
+            rows.append((entry["date"], entry["log_type"], entry["user"] or "-", format_html("<ul>{}</ul>", changes)))
+
+        return format_html(
+            "<table><thead><tr><th>Date</th><th>Type</th><th>User</th><th>Changes</th></tr></thead>"
+            "<tbody>{}</tbody></table>",
+            format_html_join("", "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>", rows),
+        )
+
+    display_entries.short_description = "Archived logs"
+
+
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
     model = Room
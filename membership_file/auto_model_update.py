@@ -3,7 +3,8 @@ from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
 from .serializers import MemberSerializer
-from .models import Member, MemberLog, MemberLogField
+from .models import Member, MemberLog, MemberLogArchive, MemberLogField
+from .search import update_member_search_index
 
 ##################################################################################
 # Methods that automatically create Log data when a Member gets updated
@@ -90,6 +91,13 @@ def post_save_member(sender, instance, created, raw, **kwargs):
         MemberLog.objects.create(user=instance.last_updated_by, member=instance, log_type="DELETE")
 
 
+# Keeps the member search index up to date
+#   Also fires for raw saves (e.g. fixtures), as the index only depends on the member itself
+@receiver(post_save, sender=Member)
+def post_save_member_search_index(sender, instance, **kwargs):
+    update_member_search_index(instance)
+
+
 # Fires when the member deletion has completed successfully
 @receiver(post_delete, sender=Member)
 def post_delete_member(sender, instance, **kwargs):
@@ -97,3 +105,4 @@ def post_delete_member(sender, instance, **kwargs):
     # (I.e. they belonged to the just-deleted member)
     # Not enforced through a models.CASCADE as to circumvent permissions to keep the logs read only
     pMemberLogs = MemberLog.objects.filter(member=None).delete()
+    MemberLogArchive.objects.filter(member=None).delete()
@@ -1,4 +1,4 @@
-from dynamic_preferences.types import ModelChoicePreference, StringPreference
+from dynamic_preferences.types import IntegerPreference, ModelChoicePreference, StringPreference
 from dynamic_preferences.preferences import Section
 from dynamic_preferences.registries import global_preferences_registry
 
@@ -52,3 +52,15 @@ class RegistrationExtraDescription(StringPreference):
     help_text = "Recommended to set board name. E.g., The Alliance of Alliterating Astronauts"
     default = ""
     required = False
+
+
+@global_preferences_registry.register
+class MemberLogRetentionDays(IntegerPreference):
+    section = membership_section
+    name = "memberlog_retention_days"
+    verbose_name = "Member log retention (days)"
+    description = "Member logs older than this number of days are moved to the compressed member log archive."
+    help_text = (
+        "Archived logs remain viewable in the admin panel. Archiving happens through `manage.py archive_memberlogs`."
+    )
+    default = 730
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.utils import timezone
+from dynamic_preferences.registries import global_preferences_registry
+
+from membership_file.models import MemberLog, MemberLogArchive
+
+##################################################################################
+# Archival of old MemberLogs
+# MemberLogs (and their MemberLogFields) older than the retention period are
+# moved into one compressed MemberLogArchive per member per year.
+##################################################################################
+
+global_preferences = global_preferences_registry.manager()
+
+
+def get_archive_cutoff_date() -> datetime:
+    """Logs created before this date should be archived, as configured in the global preferences"""
+    return timezone.now() - timedelta(days=global_preferences["membership__memberlog_retention_days"])
+
+
+def serialize_member_log(member_log: MemberLog) -> dict:
+    """Converts a MemberLog and its updated fields into a JSON-serializable dictionary"""
+    return {
+        "id": member_log.id,
+        "log_type": member_log.log_type,
+        "user_id": member_log.user_id,
+        "user": str(member_log.user) if member_log.user is not None else None,
+        "date": member_log.date.isoformat(),
+        "fields": [
+            {"field": log_field.field, "old_value": log_field.old_value, "new_value": log_field.new_value}
+            for log_field in member_log.updated_fields.all()
+        ],
+    }
+
+
+def archive_member_logs(cutoff_date: datetime = None) -> int:
+    """
+    Moves all MemberLogs created before the cutoff date into the member log archive.
+    Logs are processed per member in a separate transaction. Returns the number of archived logs.
+    """
+    if cutoff_date is None:
+        cutoff_date = get_archive_cutoff_date()
+
+    logs_to_archive = MemberLog.objects.filter(date__lt=cutoff_date, member__isnull=False)
+    member_ids = logs_to_archive.values_list("member_id", flat=True).distinct().order_by()
+
+    archived_count = 0
+    for member_id in list(member_ids):
+        with transaction.atomic():
+            member_logs = list(
+                logs_to_archive.filter(member_id=member_id)
+                .select_related("user")
+                .prefetch_related("updated_fields")
+                .order_by("date", "id")
+            )
+            for year, year_logs in groupby(
+                member_logs, key=lambda member_log: timezone.localtime(member_log.date).year
+            ):
+                archive, _ = MemberLogArchive.objects.select_for_update().get_or_create(member_id=member_id, year=year)
+                archive.append_entries([serialize_member_log(member_log) for member_log in year_logs])
+                archive.save()
+
+            # MemberLogFields are deleted through their models.CASCADE
+            MemberLog.objects.filter(id__in=[member_log.id for member_log in member_logs]).delete()
+            archived_count += len(member_logs)
+
+    return archived_count
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from membership_file.log_archive import archive_member_logs, get_archive_cutoff_date
+
+
+class Command(BaseCommand):
+    help = "Moves member logs older than the configured retention period into the compressed member log archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Archive logs older than this number of days, instead of using the configured retention period.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] is not None:
+            cutoff_date = timezone.now() - timedelta(days=options["days"])
+        else:
+            cutoff_date = get_archive_cutoff_date()
+
+        archived_count = archive_member_logs(cutoff_date)
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived_count} member logs created before {cutoff_date}."))
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:50
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Copied from membership_file.search as it was when this migration was written, so that later changes to the
+#   tokenizer do not change what this migration does. Tokens are rebuilt whenever a member is saved.
+SEARCH_TEXT_FIELDS = ["first_name", "tussenvoegsel", "last_name", "email"]
+SEARCH_NUMBER_FIELDS = ["phone_number", "tue_card_number", "external_card_number", "key_id"]
+TOKEN_MAX_LENGTH = 255
+
+_WORD_REGEX = re.compile(r"[^\W_]+")
+
+
+def tokenize_search_text(text):
+    """Lower-cases, accent-folds, and splits text into its alphanumerical words"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    normalized = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return _WORD_REGEX.findall(normalized)
+
+
+def get_member_search_tokens(member):
+    """Obtains the set of search tokens for a (historical) member"""
+    tokens = set()
+    for field in SEARCH_TEXT_FIELDS:
+        value = getattr(member, field)
+        if value:
+            tokens.update(tokenize_search_text(value))
+
+    for field in SEARCH_NUMBER_FIELDS:
+        value = getattr(member, field)
+        if value:
+            tokens.add("".join(tokenize_search_text(value)))
+    return {token[:TOKEN_MAX_LENGTH] for token in tokens if token}
+
+
+def build_search_index(apps, schema_editor):
+    """Builds the search index for all existing members"""
+    # We can't import the models directly as they may be a newer
+    # version than this migration expects. We use the historical version.
+    Member = apps.get_model("membership_file", "Member")
+    MemberSearchToken = apps.get_model("membership_file", "MemberSearchToken")
+    MemberSearchToken.objects.bulk_create(
+        [
+            MemberSearchToken(member=member, token=token)
+            for member in Member.objects.all()
+            for token in get_member_search_tokens(member)
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("membership_file", "0021_card_lengths_db"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MemberSearchToken",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("token", models.CharField(db_index=True, max_length=255)),
+                (
+                    "member",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="membership_file.member",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("member", "token")},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("membership_file", "0022_member_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MemberLogArchive",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("year", models.PositiveSmallIntegerField()),
+                ("entry_count", models.PositiveIntegerField(default=0)),
+                ("data", models.BinaryField(default=bytes)),
+                ("last_archived_date", models.DateTimeField(auto_now=True)),
+                (
+                    "member",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="log_archives",
+                        to="membership_file.member",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-year"],
+                "unique_together": {("member", "year")},
+            },
+        ),
+    ]
@@ -1,3 +1,5 @@
+import gzip
+import json
 from decimal import Decimal
 from django.conf import settings
 from django.core.validators import RegexValidator, MinValueValidator
@@ -413,3 +415,68 @@ class MemberLogField(models.Model):
     # String-representation of an instance of a MemberLogField
     def __str__(self):
         return "{1} was updated: <{2}> -> <{3}> ({0})".format(self.id, self.field, self.old_value, self.new_value)
+
+
+# The MemberLogArchive Model stores compressed MemberLogs of a member in a certain year
+class MemberLogArchive(models.Model):
+    """
+    Append-only archive of old MemberLogs (and their MemberLogFields) of a single member in a single year.
+    Each archived log is stored as a JSON line. Every batch of archived logs is compressed as a separate
+    gzip member and appended to the existing data, so earlier batches never need to be rewritten.
+    See membership_file/log_archive.py
+    """
+
+    # The member whose logs were archived
+    # Not enforced through a models.CASCADE as to circumvent permissions to keep the archives read only
+    member = models.ForeignKey(
+        Member,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="log_archives",
+    )
+    year = models.PositiveSmallIntegerField()
+    entry_count = models.PositiveIntegerField(default=0)
+    # Concatenated gzip members of JSON lines
+    data = models.BinaryField(default=bytes)
+    last_archived_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [["member", "year"]]
+        ordering = ["-year"]
+
+    def append_entries(self, entries):
+        """Appends a list of (JSON-serializable) log entries to the archive. Does not save the archive."""
+        if not entries:
+            return
+        lines = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+        self.data = bytes(self.data) + gzip.compress(lines.encode("utf-8"))
+        self.entry_count += len(entries)
+
+    def get_entries(self):
+        """Returns the list of archived log entries, in the order they were archived"""
+        if not self.data:
+            return []
+        lines = gzip.decompress(bytes(self.data)).decode("utf-8").splitlines()
+        return [json.loads(line) for line in lines if line]
+
+    def __str__(self):
+        return f"Archived logs of {self.member} in {self.year}"
+
+
+# The MemberSearchToken Model represents a normalised search token of a Member
+class MemberSearchToken(models.Model):
+    """
+    A lower-cased, accent-folded token derived from a member's name, contact details,
+    card numbers or key id. Maintained automatically whenever a Member is saved, and used
+    to look up members using (indexed) prefix matching instead of scanning all members.
+    See membership_file/search.py
+    """
+
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=255, db_index=True)
+
+    class Meta:
+        unique_together = [["member", "token"]]
+
+    def __str__(self):
+        return f"{self.token} ({self.member_id})"
@@ -0,0 +1,99 @@
+import re
+import unicodedata
+from typing import List, Set
+
+from django.db.models import Q, QuerySet
+from django.utils.text import smart_split, unescape_string_literal
+
+from membership_file.models import Member, MemberSearchToken
+
+##################################################################################
+# Indexed member search
+# Members are searched by prefix-matching normalised tokens stored in the
+# MemberSearchToken table, rather than running icontains on several columns.
+##################################################################################
+
+# Fields whose (normalised) words are indexed
+SEARCH_TEXT_FIELDS = ["first_name", "tussenvoegsel", "last_name", "email"]
+# Fields that are indexed as a whole (after stripping non-alphanumerical characters)
+SEARCH_NUMBER_FIELDS = ["phone_number", "tue_card_number", "external_card_number", "key_id"]
+# Fields that can be looked up exactly by e.g. a card swipe
+EXACT_LOOKUP_FIELDS = ["tue_card_number", "external_card_number", "key_id"]
+
+_WORD_REGEX = re.compile(r"[^\W_]+")
+
+
+def normalize_search_text(text: str) -> str:
+    """Lower-cases and accent-folds the given text. E.g. `Ëlise` becomes `elise`"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize_search_text(text: str) -> List[str]:
+    """Splits normalised text into its alphanumerical words"""
+    return _WORD_REGEX.findall(normalize_search_text(text))
+
+
+def get_member_search_tokens(member) -> Set[str]:
+    """
+    Obtains the set of search tokens for a member. Only reads attributes, so this also works
+    for historical models used in migrations.
+    """
+    tokens = set()
+    for field in SEARCH_TEXT_FIELDS:
+        value = getattr(member, field)
+        if value:
+            tokens.update(tokenize_search_text(value))
+
+    for field in SEARCH_NUMBER_FIELDS:
+        value = getattr(member, field)
+        if value:
+            tokens.add("".join(tokenize_search_text(value)))
+
+    # Tokens longer than the indexed column are truncated; prefix matching still works for those
+    max_length = MemberSearchToken._meta.get_field("token").max_length
+    return {token[:max_length] for token in tokens if token}
+
+
+def update_member_search_index(member: Member):
+    """Synchronises the search tokens of the given member with its current values"""
+    new_tokens = get_member_search_tokens(member)
+    old_tokens = set(member.search_tokens.values_list("token", flat=True))
+
+    if old_tokens - new_tokens:
+        member.search_tokens.filter(token__in=old_tokens - new_tokens).delete()
+    if new_tokens - old_tokens:
+        MemberSearchToken.objects.bulk_create(
+            [MemberSearchToken(member=member, token=token) for token in new_tokens - old_tokens]
+        )
+
+
+def get_search_terms(search_term: str) -> List[str]:
+    """Splits a search query into normalised terms, respecting quoted bits like the Django admin does"""
+    terms = []
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        terms.extend(tokenize_search_text(bit))
+    return terms
+
+
+def search_members(queryset: QuerySet, search_term: str) -> QuerySet:
+    """
+    Filters a Member queryset on the given search term.
+    If the search term is an exact card number or key id (e.g. obtained through a card swipe), only the
+    member(s) with that number are returned. Otherwise, each search term must be a prefix of at least
+    one of the member's search tokens.
+    """
+    search_term = search_term.strip()
+    if search_term.isdigit():
+        exact_query = Q()
+        for field in EXACT_LOOKUP_FIELDS:
+            exact_query |= Q(**{field: search_term})
+        exact_matches = queryset.filter(exact_query)
+        if exact_matches.exists():
+            return exact_matches
+
+    for term in get_search_terms(search_term):
+        queryset = queryset.filter(id__in=MemberSearchToken.objects.filter(token__startswith=term).values("member_id"))
+    return queryset
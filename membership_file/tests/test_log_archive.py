@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.admin import AdminSite
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from membership_file.admin import MemberLogArchiveReadOnly, MemberLogReadOnlyInline
+from membership_file.log_archive import archive_member_logs
+from membership_file.models import Member, MemberLog, MemberLogArchive, MemberLogField
+
+
+class MemberLogArchiveModelTest(TestCase):
+    """Tests for the MemberLogArchive model"""
+
+    def test_append_entries(self):
+        """Tests that appended entries are stored in order"""
+        archive = MemberLogArchive(year=2020)
+        self.assertEqual(archive.get_entries(), [])
+
+        archive.append_entries([{"id": 1}, {"id": 2}])
+        archive.append_entries([])
+        archive.append_entries([{"id": 3, "name": "Ëlise"}])
+        self.assertEqual(archive.entry_count, 3)
+        self.assertEqual(archive.get_entries(), [{"id": 1}, {"id": 2}, {"id": 3, "name": "Ëlise"}])
+
+
+class ArchiveMemberLogsTest(TestCase):
+    """Tests moving MemberLogs to the archive"""
+
+    fixtures = ["test_users.json", "test_members.json"]
+
+    def setUp(self):
+        self.user = User.objects.get(id=100)
+        self.member = Member.objects.get(id=1)
+
+    def _create_log(self, date, field="first_name"):
+        log = MemberLog.objects.create(user=self.user, member=self.member, log_type="UPDATE")
+        MemberLogField.objects.create(member_log=log, field=field, old_value="old", new_value="new")
+        # date is auto_now_add
+        MemberLog.objects.filter(id=log.id).update(date=date)
+        return log
+
+    def test_archive_member_logs(self):
+        """Tests that only old logs are archived, grouped per year"""
+        old_2020 = self._create_log(datetime(2020, 5, 1, 12, tzinfo=timezone.utc), field="email")
+        old_2020_later = self._create_log(datetime(2020, 6, 1, 12, tzinfo=timezone.utc))
+        old_2021 = self._create_log(datetime(2021, 1, 1, 12, tzinfo=timezone.utc))
+        recent = self._create_log(timezone.now())
+
+        archived_count = archive_member_logs(timezone.now() - timedelta(days=30))
+        self.assertEqual(archived_count, 3)
+        self.assertTrue(MemberLog.objects.filter(id=recent.id).exists())
+        self.assertFalse(MemberLog.objects.filter(id__in=[old_2020.id, old_2020_later.id, old_2021.id]).exists())
+        self.assertFalse(MemberLogField.objects.filter(member_log_id=old_2020.id).exists())
+
+        archive = MemberLogArchive.objects.get(member=self.member, year=2020)
+        self.assertEqual(archive.entry_count, 2)
+        entries = archive.get_entries()
+        self.assertEqual([entry["id"] for entry in entries], [old_2020.id, old_2020_later.id])
+        self.assertEqual(entries[0]["user_id"], self.user.id)
+        self.assertEqual(entries[0]["fields"], [{"field": "email", "old_value": "old", "new_value": "new"}])
+        self.assertEqual(MemberLogArchive.objects.get(member=self.member, year=2021).entry_count, 1)
+
+    def test_archive_appends(self):
+        """Tests that logs are appended to existing archives"""
+        first = self._create_log(datetime(2020, 5, 1, 12, tzinfo=timezone.utc))
+        archive_member_logs(timezone.now())
+        second = self._create_log(datetime(2020, 6, 1, 12, tzinfo=timezone.utc))
+        archive_member_logs(timezone.now())
+
+        archive = MemberLogArchive.objects.get(member=self.member, year=2020)
+        self.assertEqual([entry["id"] for entry in archive.get_entries()], [first.id, second.id])
+
+    def test_command(self):
+        """Tests the archive_memberlogs management command"""
+        self._create_log(timezone.now() - timedelta(days=10))
+        out = StringIO()
+        call_command("archive_memberlogs", days=20, stdout=out)
+        self.assertIn("Archived 0 member logs", out.getvalue())
+
+        call_command("archive_memberlogs", days=5, stdout=out)
+        self.assertIn("Archived 1 member logs", out.getvalue())
+
+    def test_delete_member_deletes_archive(self):
+        """Tests that archives are removed along with their member"""
+        self._create_log(datetime(2020, 5, 1, 12, tzinfo=timezone.utc))
+        archive_member_logs(timezone.now())
+        Member.objects.get(id=2).delete()
+        self.assertTrue(MemberLogArchive.objects.exists())
+        self.member.delete()
+        self.assertFalse(MemberLogArchive.objects.exists())
+
+    def test_admin_display_entries(self):
+        """Tests that archived logs are rendered in the admin"""
+        self._create_log(datetime(2020, 5, 1, 12, tzinfo=timezone.utc), field="email")
+        archive_member_logs(timezone.now())
+        model_admin = MemberLogArchiveReadOnly(model=MemberLogArchive, admin_site=AdminSite())
+        html = model_admin.display_entries(MemberLogArchive.objects.get())
+        self.assertIn("<li>email: &lt;old&gt; -&gt; &lt;new&gt;</li>", html)
+
+    def test_member_change_page_paginates_logs(self):
+        """Tests that the member change page only shows a single page of logs"""
+        for _ in range(MemberLogReadOnlyInline.per_page + 5):
+            self._create_log(timezone.now())
+        self.client.force_login(User.objects.filter(is_superuser=True).first())
+        url = reverse("admin:membership_file_member_change", args=[self.member.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(len(formset.forms), MemberLogReadOnlyInline.per_page)
+        self.assertTrue(formset.page.has_next())
+
+        response = self.client.get(url, data={"log_page": 2})
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(len(formset.forms), MemberLog.objects.filter(member=self.member).count() - 20)
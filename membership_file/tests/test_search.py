@@ -0,0 +1,99 @@
+from django.test import TestCase
+
+from membership_file.models import Member, MemberSearchToken
+from membership_file.search import (
+    get_member_search_tokens,
+    get_search_terms,
+    normalize_search_text,
+    search_members,
+)
+
+
+class SearchNormalisationTest(TestCase):
+    """Tests the normalisation of search text"""
+
+    def test_normalize_search_text(self):
+        self.assertEqual(normalize_search_text("Ëlise Ç"), "elise c")
+        self.assertEqual(normalize_search_text("STRAßE"), "strasse")
+
+    def test_get_search_terms(self):
+        self.assertEqual(get_search_terms("Chárlie  van"), ["charlie", "van"])
+        self.assertEqual(get_search_terms('"van der" Dommel'), ["van", "der", "dommel"])
+        self.assertEqual(get_search_terms("+31612"), ["31612"])
+        self.assertEqual(get_search_terms("   "), [])
+
+
+class MemberSearchIndexTest(TestCase):
+    """Tests maintenance of the member search index"""
+
+    fixtures = ["test_users.json", "test_members.json"]
+
+    def test_tokens(self):
+        member = Member.objects.get(id=1)
+        member.phone_number = "+31612345678"
+        member.key_id = "0123"
+        tokens = get_member_search_tokens(member)
+        self.assertSetEqual(
+            tokens,
+            {
+                "charlie",
+                "van",
+                "der",
+                "dommel",
+                "linked",
+                "member",
+                "example",
+                "com",
+                "31612345678",
+                "01234567",
+                "0123",
+            },
+        )
+
+    def test_fixture_members_indexed(self):
+        """Members loaded through fixtures are indexed as well"""
+        self.assertTrue(MemberSearchToken.objects.filter(member_id=3, token="penterman").exists())
+
+    def test_index_updated_on_save(self):
+        member = Member.objects.get(id=2)
+        member.last_name = "Wölfe"
+        member.save()
+        tokens = set(member.search_tokens.values_list("token", flat=True))
+        self.assertIn("wolfe", tokens)
+        self.assertNotIn("wolf", tokens)
+
+    def test_index_removed_on_delete(self):
+        Member.objects.get(id=2).delete()
+        self.assertFalse(MemberSearchToken.objects.filter(member_id=2).exists())
+
+
+class SearchMembersTest(TestCase):
+    """Tests searching through members"""
+
+    fixtures = ["test_users.json", "test_members.json"]
+
+    def _search(self, search_term):
+        return set(search_members(Member.objects.all(), search_term).values_list("id", flat=True))
+
+    def test_search_name_prefix(self):
+        self.assertSetEqual(self._search("charl"), {1})
+        self.assertSetEqual(self._search("CHARLIE DOM"), {1})
+        self.assertSetEqual(self._search("charlie wolf"), set())
+
+    def test_search_accent_folded(self):
+        self.assertSetEqual(self._search("Xéna"), {2})
+
+    def test_search_email(self):
+        self.assertSetEqual(self._search("nonlinked_member@example.com"), {2})
+        self.assertSetEqual(self._search("example"), {1, 2, 3})
+
+    def test_search_card_number(self):
+        # Exact card number
+        self.assertSetEqual(self._search("01234567"), {1})
+        # Card number prefix
+        self.assertSetEqual(self._search("0123"), {1})
+
+    def test_search_exact_key_id(self):
+        """Exact card number or key id matches take precedence over prefix matches"""
+        Member.objects.filter(id=3).update(key_id="0123")
+        self.assertSetEqual(self._search("0123"), {3})
@@ -65,6 +65,18 @@ class MemberAdminTest(TestCase):
         self.assertEqual(self.fake_message["level"], messages.SUCCESS)
         self.assertEqual(Membership.objects.filter(year__is_active=True).count(), 2)
 
+    def test_get_search_results(self):
+        """Tests that searching uses the member search index"""
+        queryset, may_have_duplicates = self.model_admin.get_search_results(
+            self.request, Member.objects.all(), "penter"
+        )
+        self.assertFalse(may_have_duplicates)
+        self.assertQuerysetEqual(queryset, [3], transform=lambda member: member.id)
+
+        # Empty search terms do not filter
+        queryset, may_have_duplicates = self.model_admin.get_search_results(self.request, Member.objects.all(), " ")
+        self.assertEqual(queryset.count(), Member.objects.count())
+
     def test_register_action(self):
         """Tests availability of the register member action button"""
         self.user.is_superuser = False
@@ -174,6 +186,10 @@ class MemberLogTest(TestCase):
             "memberlog_set-INITIAL_FORMS": 0,
             "memberlog_set-MIN_NUM_FORMS": 0,
             "memberlog_set-MAX_NUM_FORMS": 0,
+            "log_archives-TOTAL_FORMS": 0,
+            "log_archives-INITIAL_FORMS": 0,
+            "log_archives-MIN_NUM_FORMS": 0,
+            "log_archives-MAX_NUM_FORMS": 0,
             "membership_set-TOTAL_FORMS": 0,
             "membership_set-INITIAL_FORMS": 0,
             "membership_set-MIN_NUM_FORMS": 0,
@@ -503,6 +519,10 @@ class DeleteMemberTest(TestCase):
             "memberlog_set-INITIAL_FORMS": 0,
             "memberlog_set-MIN_NUM_FORMS": 0,
             "memberlog_set-MAX_NUM_FORMS": 0,
+            "log_archives-TOTAL_FORMS": 0,
+            "log_archives-INITIAL_FORMS": 0,
+            "log_archives-MIN_NUM_FORMS": 0,
+            "log_archives-MAX_NUM_FORMS": 0,
             "membership_set-TOTAL_FORMS": 0,
             "membership_set-INITIAL_FORMS": 0,
             "membership_set-MIN_NUM_FORMS": 0,
@@ -29,6 +29,7 @@ class NextcloudGroupConfig(CommitteeBaseConfig):
                             "sync/help/", CloudFileSyncInstructionsView.as_view(config=self), name="folder_sync_help"
                         ),
                         path("refresh/", CloudFolderRefreshView.as_view(config=self), name="folder_refresh"),
+                        path("upload/", CloudFileUploadView.as_view(config=self), name="folder_upload_file"),
                     ]
                 ),
             ),
@@ -1,10 +1,13 @@
+from django.conf import settings
 from django.contrib import messages
-from django.http import HttpResponseRedirect
-from django.views.generic import TemplateView, ListView, View
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.http import HttpResponseRedirect, HttpResponseBadRequest, JsonResponse
+from django.views.generic import TemplateView, ListView, View, FormView
 from django.urls import reverse
 
 from committees.mixins import AssociationGroupMixin
 
+from nextcloud_integration.forms import FileUploadForm
 from nextcloud_integration.models import SquireNextCloudFolder
 from nextcloud_integration.utils import refresh_status
 from nextcloud_integration.views import (
@@ -23,6 +26,7 @@ __all__ = [
     "CloudFileSyncView",
     "CloudFileSyncInstructionsView",
     "CloudFolderRefreshView",
+    "CloudFileUploadView",
 ]
 
 
@@ -97,3 +101,144 @@ class CloudFolderRefreshView(AssociationGroupMixin, NextcloudConnectionViewMixin
                 "group_id": self.association_group.id,
             },
         )
+
+
+class CloudFileUploadView(
+    AssociationGroupMixin, NextcloudConnectionViewMixin, PermissionRequiredMixin, FolderMixin, FormView
+):
+    """Uploads a file from the browser to the folder on Nextcloud in chunks. Each chunk is passed on to Nextcloud
+    while it is being received, so files are never held in memory or on disk as a whole.
+    The browser starts the upload (POST), uploads the chunks (PUT, possibly in parallel), and finishes the upload
+    (POST). Interrupted uploads can be resumed within the same session.
+    """
+
+    template_name = "nextcloud_integration/committees/committee_cloud_folder_upload.html"
+    permission_required = "nextcloud_integration.sync_squirenextcloudfile"
+    form_class = FileUploadForm
+    http_method_names = ["get", "post", "put", "delete"]
+    # Uploads started in this session
+    session_key = "nextcloud_uploads"
+
+    def get_form_kwargs(self):
+        kwargs = super(CloudFileUploadView, self).get_form_kwargs()
+        kwargs["folder"] = self.folder
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        return super(CloudFileUploadView, self).get_context_data(
+            chunk_size=settings.NEXTCLOUD_UPLOAD_CHUNK_SIZE, **kwargs
+        )
+
+    def get_upload(self, upload_id):
+        """Gets the upload with the given id, if it was started in this session for this folder"""
+        upload = self.request.session.get(self.session_key, {}).get(upload_id)
+        if upload is None or upload["folder"] != self.folder.id:
+            return None
+        return upload
+
+    def set_upload(self, upload_id, upload):
+        uploads = self.request.session.get(self.session_key, {})
+        if upload is None:
+            uploads.pop(upload_id, None)
+        else:
+            uploads[upload_id] = upload
+        self.request.session[self.session_key] = uploads
+
+    def post(self, request, *args, **kwargs):
+        action = request.POST.get("action")
+        if action == "start":
+            return self.start_upload()
+        elif action == "status":
+            return self.get_upload_status()
+        elif action == "finish":
+            return self.finish_upload()
+        return HttpResponseBadRequest("Invalid action passed")
+
+    def form_invalid(self, form):
+        return JsonResponse({"errors": form.errors}, status=400)
+
+    def start_upload(self):
+        form = self.get_form()
+        if not form.is_valid():
+            return self.form_invalid(form)
+
+        upload_id = self.client.start_upload(form.destination_path)
+        self.set_upload(
+            upload_id,
+            {
+                "folder": self.folder.id,
+                "file_name": form.cleaned_data["file_name"],
+                "file_size": form.cleaned_data["file_size"],
+                "destination_path": form.destination_path,
+            },
+        )
+        return JsonResponse({"upload_id": upload_id, "chunks": {}})
+
+    def get_upload_status(self):
+        upload_id = self.request.POST.get("upload_id")
+        if self.get_upload(upload_id) is None:
+            return JsonResponse({"errors": {"upload_id": ["Upload does not exist."]}}, status=404)
+        return JsonResponse({"upload_id": upload_id, "chunks": self.client.get_uploaded_chunks(upload_id)})
+
+    def get_chunk_size(self, upload, index):
+        """Gets the size of the chunk with the given number, or None if no such chunk is part of the upload"""
+        chunk_size = settings.NEXTCLOUD_UPLOAD_CHUNK_SIZE
+        num_chunks = -(-upload["file_size"] // chunk_size)
+        if not 1 <= index <= num_chunks:
+            return None
+        if index == num_chunks:
+            return upload["file_size"] - chunk_size * (num_chunks - 1)
+        return chunk_size
+
+    def put(self, request, *args, **kwargs):
+        upload_id = request.GET.get("upload_id")
+        upload = self.get_upload(upload_id)
+        if upload is None:
+            return JsonResponse({"errors": {"upload_id": ["Upload does not exist."]}}, status=404)
+
+        try:
+            index = int(request.GET.get("chunk"))
+            length = int(request.META.get("CONTENT_LENGTH"))
+        except (TypeError, ValueError):
+            return HttpResponseBadRequest("Invalid chunk passed")
+        if self.get_chunk_size(upload, index) != length:
+            return HttpResponseBadRequest("Invalid chunk passed")
+
+        # The request body is read while it is sent to Nextcloud
+        self.client.upload_chunk(
+            upload_id, index, request, length, upload["destination_path"], total_length=upload["file_size"]
+        )
+        return JsonResponse({"chunk": index})
+
+    def finish_upload(self):
+        upload_id = self.request.POST.get("upload_id")
+        upload = self.get_upload(upload_id)
+        if upload is None:
+            return JsonResponse({"errors": {"upload_id": ["Upload does not exist."]}}, status=404)
+        form = self.get_form()
+        if not form.is_valid():
+            return self.form_invalid(form)
+        if form.destination_path != upload["destination_path"]:
+            return JsonResponse({"errors": {"file_name": ["File does not match the upload."]}}, status=400)
+
+        form.instance.file = self.client.finish_upload(upload_id, upload["destination_path"], upload["file_size"])
+        form.save()
+        self.set_upload(upload_id, None)
+        messages.success(self.request, f"{form.instance.display_name} has been uploaded")
+        return JsonResponse({"redirect_url": self.get_success_url()})
+
+    def delete(self, request, *args, **kwargs):
+        upload_id = request.GET.get("upload_id")
+        if self.get_upload(upload_id) is None:
+            return JsonResponse({"errors": {"upload_id": ["Upload does not exist."]}}, status=404)
+        self.client.cancel_upload(upload_id)
+        self.set_upload(upload_id, None)
+        return JsonResponse({})
+
+    def get_success_url(self):
+        return reverse(
+            "committees:nextcloud:cloud_overview",
+            kwargs={
+                "group_id": self.association_group.id,
+            },
+        )
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from django.conf import settings
+
+##################################################################################
+# Bounded on-disk cache for the contents of files downloaded from Nextcloud.
+#   Entries are keyed by the file's path on Nextcloud and remember the ETag they
+#   were downloaded with, so that they can be revalidated with a conditional GET.
+#   Files are written atomically, so multiple processes can share the same cache.
+##################################################################################
+
+
+@dataclass
+class CachedFile:
+    """Metadata of a file stored in the cache"""
+
+    data_path: str  # Location of the file's contents on disk
+    etag: str
+    content_type: str
+    last_modified: str
+    size: int
+
+
+class NextCloudFileCache:
+    """On-disk cache of Nextcloud file contents. Once the total size of the cached files exceeds `max_size`
+    bytes, the least recently used files are evicted. Files larger than `max_file_size` bytes are never cached.
+    """
+
+    # Temporary files older than this (in seconds) were left behind by interrupted writes
+    STALE_TMP_AGE = 60 * 60
+
+    def __init__(self, directory: str, max_size: int, max_file_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+
+    def _get_meta_path(self, path: str) -> str:
+        key = hashlib.sha256(path.encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, path: str) -> Optional[CachedFile]:
+        """Gets the cached file for the given Nextcloud path, if it exists"""
+        try:
+            with open(self._get_meta_path(path), "r") as meta_file:
+                cached_file = CachedFile(**json.load(meta_file))
+        except (OSError, ValueError, TypeError):
+            return None
+
+        if not os.path.exists(cached_file.data_path):
+            # Contents were evicted
+            return None
+        return cached_file
+
+    def touch(self, cached_file: CachedFile) -> None:
+        """Marks the cached file as recently used"""
+        try:
+            os.utime(cached_file.data_path)
+        except OSError:
+            pass
+
+    def can_store(self, response) -> bool:
+        """Whether the file in the (streamed) download response can be cached"""
+        size = response.headers.get("Content-Length")
+        return (
+            response.status_code == 200
+            and "ETag" in response.headers
+            and size is not None
+            and int(size) <= min(self.max_file_size, self.max_size)
+        )
+
+    def store(self, path: str, response, chunk_size: int = 64 * 1024) -> CachedFile:
+        """Writes the contents of a (streamed) download response for the given Nextcloud path to the cache.
+        The response is consumed and closed. See `can_store` for which responses can be cached.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path = self._get_meta_path(path)
+        previous_file = self.get(path)
+
+        # Contents are written to a new file so that processes serving the previous version are not affected
+        fd, data_path = tempfile.mkstemp(dir=self.directory, prefix=os.path.basename(meta_path)[:-5], suffix=".data")
+        tmp_meta_path = None
+        try:
+            with os.fdopen(fd, "wb") as data_file:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    data_file.write(chunk)
+            cached_file = CachedFile(
+                data_path=data_path,
+                etag=response.headers["ETag"],
+                content_type=response.headers.get("Content-Type", "application/octet-stream"),
+                last_modified=response.headers.get("Last-Modified", ""),
+                size=os.path.getsize(data_path),
+            )
+
+            fd, tmp_meta_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as meta_file:
+                json.dump(asdict(cached_file), meta_file)
+            os.replace(tmp_meta_path, meta_path)
+        except BaseException:
+            self._remove(data_path)
+            if tmp_meta_path is not None:
+                self._remove(tmp_meta_path)
+            raise
+        finally:
+            response.close()
+
+        if previous_file is not None:
+            self._remove(previous_file.data_path)
+        self.evict()
+        return cached_file
+
+    @staticmethod
+    def _remove(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        """Removes the least recently used files until the cache's total size no longer exceeds its maximum.
+        Also removes metadata of evicted files, and temporary files left behind by interrupted writes.
+        """
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        stats = []
+        meta_paths = {}
+        for entry in entries:
+            try:
+                if entry.name.endswith(".data"):
+                    stats.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+                elif entry.name.endswith(".json"):
+                    meta_paths[entry.name[:-5]] = entry.path
+                elif entry.name.endswith(".tmp") and entry.stat().st_mtime < time.time() - self.STALE_TMP_AGE:
+                    self._remove(entry.path)
+            except OSError:
+                # Removed by another process
+                continue
+
+        total_size = sum(size for _, size, _ in stats)
+        data_paths = []
+        for _, size, data_path in sorted(stats):
+            if total_size <= self.max_size:
+                data_paths.append(data_path)
+                continue
+            self._remove(data_path)
+            total_size -= size
+
+        # Data files are prefixed with the key of their metadata
+        keys = {os.path.basename(data_path)[:64] for data_path in data_paths}
+        for key, meta_path in meta_paths.items():
+            if key not in keys:
+                self._remove(meta_path)
+
+    def clear(self) -> None:
+        """Removes all cached files"""
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            self._remove(entry.path)
+
+
+def get_file_cache() -> Optional[NextCloudFileCache]:
+    """Gets the file cache as configured in the settings, or None if files should not be cached"""
+    if getattr(settings, "NEXTCLOUD_CACHE_DIR", None) is None:
+        return None
+    return NextCloudFileCache(
+        settings.NEXTCLOUD_CACHE_DIR, settings.NEXTCLOUD_CACHE_MAX_SIZE, settings.NEXTCLOUD_CACHE_MAX_FILE_SIZE
+    )
@@ -1,8 +1,8 @@
 from django.forms import Form, ValidationError, ModelForm
 from django.forms.formsets import BaseFormSet
-from django.forms.fields import CharField, ChoiceField, HiddenInput
+from django.forms.fields import CharField, ChoiceField, HiddenInput, IntegerField
 from django.forms.renderers import get_default_renderer
-from django.utils.text import slugify
+from django.utils.text import get_valid_filename, slugify
 
 from utils.forms import FormGroup
 
@@ -11,8 +11,7 @@ from nextcloud_integration.nextcloud_resources import NextCloudFile, NextCloudFo
 from nextcloud_integration.models import SquireNextCloudFolder, SquireNextCloudFile
 from nextcloud_integration.widgets import NextcloudFileSelectWidget
 
-
-__all__ = ["FileMoveForm", "FolderCreateForm", "SyncFileToFolderForm", "FolderEditFormGroup"]
+__all__ = ["FileMoveForm", "FolderCreateForm", "SyncFileToFolderForm", "FileUploadForm", "FolderEditFormGroup"]
 
 
 class FileMoveForm(Form):
@@ -111,6 +110,46 @@ class SyncFileToFolderForm(ModelForm):
         return super(SyncFileToFolderForm, self).clean()
 
 
+class FileUploadForm(ModelForm):
+    """Defines a file that is uploaded to a folder through Squire. The file's content itself is uploaded
+    separately in chunks (see CloudFileUploadView)."""
+
+    file_name = CharField(max_length=64)
+    file_size = IntegerField(min_value=1)
+
+    class Meta:
+        model = SquireNextCloudFile
+        fields = ["display_name", "description"]
+
+    def __init__(self, *args, folder: SquireNextCloudFolder = None, **kwargs):
+        assert folder is not None
+        self.folder = folder
+        super(FileUploadForm, self).__init__(*args, **kwargs)
+        self.instance.folder = self.folder
+        self.instance.connection = SquireNextCloudFile.CONNECTION_SQUIRE_UPLOAD
+
+    def clean_file_name(self):
+        file_name = get_valid_filename(self.cleaned_data["file_name"])
+        if self.folder.files.filter(file_name=file_name).exists():
+            raise ValidationError("A file with this name already exists in this folder.", code="duplicate_file_name")
+        self.instance.file_name = file_name
+        return file_name
+
+    def clean(self):
+        self.instance.slug = slugify(self.cleaned_data.get("display_name", ""))
+        if self.folder.files.filter(slug=self.instance.slug).exists():
+            self.add_error(
+                "display_name",
+                ValidationError("A file with this name already exists in this folder.", code="duplicate_slug"),
+            )
+        return super(FileUploadForm, self).clean()
+
+    @property
+    def destination_path(self):
+        """The path of the file on Nextcloud"""
+        return f"{self.folder.path}{self.instance.file_name}"
+
+
 class FolderEditForm(ModelForm):
     class Meta:
         model = SquireNextCloudFolder
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from nextcloud_integration.utils import scan_folders
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks whether all Nextcloud folders and files known to Squire still exist on Nextcloud, and marks them "
+        "as missing (or no longer missing) accordingly. Uses a single request per folder."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--depth-infinity",
+            action="store_true",
+            help="List all of Nextcloud in a single request. Requires the server to allow 'Depth: infinity' requests.",
+        )
+
+    def handle(self, *args, **options):
+        missing_folders, missing_files = scan_folders(depth_infinity=options["depth_infinity"])
+        for folder in missing_folders:
+            self.stdout.write(f"Missing folder: {folder.display_name} ({folder.path})")
+        for file in missing_files:
+            self.stdout.write(f"Missing file: {file.display_name} ({file.path})")
+
+        if missing_folders or missing_files:
+            self.stdout.write(
+                self.style.WARNING(f"{len(missing_folders)} folders and {len(missing_files)} files are missing.")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("All folders and files are present on Nextcloud."))
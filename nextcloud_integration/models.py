@@ -1,5 +1,10 @@
+import time
+
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.text import slugify
 
@@ -65,7 +70,7 @@ class SquireNextCloudFile(models.Model):
     file_name = models.CharField(help_text="The file name", max_length=64, blank=True, default=None)
     folder = models.ForeignKey(SquireNextCloudFolder, on_delete=models.CASCADE, related_name="files")
     slug = models.SlugField(blank=True)
-    file: NextCloudFolder = None  # Used to translate Nextcloud folder contents
+    _file: NextCloudFile = None  # Used to translate Nextcloud folder contents
 
     is_missing = models.BooleanField(default=False)  # Whether the file is non-existant on nextcloud
     CONNECTION_NEXTCLOUD_SYNC = "NcS"
@@ -92,10 +97,17 @@ class SquireNextCloudFile(models.Model):
         )
         unique_together = [["slug", "folder"], ["file_name", "folder"]]
 
-    def __init__(self, *args, **kwargs):
-        super(SquireNextCloudFile, self).__init__(*args, **kwargs)
-        if self.id:
-            self.file = NextCloudFile(path=self.path)
+    @property
+    def file(self) -> NextCloudFile:
+        # Constructed on first use, as its path requires the folder. Fetching that folder when the file is
+        #   initialised would cost a query per file, even if the folder is prefetched
+        if self._file is None and self.id:
+            self._file = NextCloudFile(path=self.path)
+        return self._file
+
+    @file.setter
+    def file(self, file: NextCloudFile):
+        self._file = file
 
     def save(self, **kwargs):
         if self.file and (self.file_name == "" or self.file_name is None):
@@ -144,3 +156,34 @@ class SquireNextCloudFile(models.Model):
 
     def get_file_type(self):
         return get_file_type(self.file_name)
+
+
+# Key of the version of the cached download overview fragments. Fragments of other versions are outdated.
+DOWNLOADS_CACHE_VERSION_KEY = "nextcloud_downloads_version"
+
+
+def get_downloads_cache_version():
+    """Gets the current version of the cached download overview"""
+    version = cache.get(DOWNLOADS_CACHE_VERSION_KEY)
+    if version is None:
+        # Start at an arbitrary version, so fragments from before the version was lost are never reused
+        cache.add(DOWNLOADS_CACHE_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(DOWNLOADS_CACHE_VERSION_KEY)
+    return version
+
+
+def invalidate_downloads_cache():
+    """Marks the cached download overview as outdated, e.g. after a folder or file was modified"""
+    try:
+        cache.incr(DOWNLOADS_CACHE_VERSION_KEY)
+    except ValueError:
+        # Version expired or was evicted, so the fragments are already unreachable
+        pass
+
+
+@receiver(post_save, sender=SquireNextCloudFolder)
+@receiver(post_delete, sender=SquireNextCloudFolder)
+@receiver(post_save, sender=SquireNextCloudFile)
+@receiver(post_delete, sender=SquireNextCloudFile)
+def invalidate_downloads_cache_on_change(sender, **kwargs):
+    invalidate_downloads_cache()
@@ -1,10 +1,17 @@
 from django.conf import settings
+import hashlib
+import threading
+import time
+import uuid
 import xml.etree.cElementTree as xml
 from urllib.parse import urlparse
-from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.utils.text import slugify
 
 from easywebdav import Client, OperationFailed
+from requests.adapters import HTTPAdapter
 
 
 from nextcloud_integration.exceptions import ClientNotImplemented
@@ -27,8 +34,12 @@ https://github.com/amnong/easywebdav
 
 class NextCloudClient(Client):
     dav_path = "remote.php/dav/files/"
+    upload_path = "remote.php/dav/uploads/"
+
+    # Number of bytes of (large) PROPFIND responses that are parsed at once
+    MULTISTATUS_CHUNK_SIZE = 64 * 1024
 
-    def __init__(self, *args, path=None, **kwargs):
+    def __init__(self, *args, path=None, timeout=(5, 30), pool_size=10, listing_cache_timeout=0, **kwargs):
         self.local_baseurl = "{local_url}/{username}".format(
             local_url=self.dav_path.strip("/"), username=kwargs.get("username", "")
         )
@@ -38,14 +49,127 @@ class NextCloudClient(Client):
             path = self.local_baseurl
 
         super(NextCloudClient, self).__init__(*args, path=path, **kwargs)
+        # Chunked uploads are assembled in a separate part of the WebDAV API
+        self.uploads_baseurl = "{base_url}{upload_path}{username}".format(
+            base_url=self.baseurl[: -len(self.local_baseurl)],
+            upload_path=self.upload_path,
+            username=kwargs.get("username", ""),
+        )
+
+        # (connect, read) timeout in seconds
+        self.timeout = timeout
+        # Number of seconds directory listings are cached. If 0, listings are not cached
+        self.listing_cache_timeout = listing_cache_timeout
+        # Keep connections to Nextcloud alive between requests (and threads)
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    @property
+    def connection_count(self) -> int:
+        """The number of connections (i.e. TCP/TLS handshakes) made to Nextcloud so far"""
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def _send(self, method, path, expected_code, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super(NextCloudClient, self)._send(method, path, expected_code, **kwargs)
 
-    def download(self, file: NextCloudFile):
+    def download(self, file: NextCloudFile, headers=None):
         """
-        Downloads the indicated file from Nextcloud
+        Downloads the indicated file from Nextcloud. The response is streamed, so its content should be
+        iterated over rather than read at once.
         :param file: The NextCloudFile to be downloaded
-        :return:
+        :param headers: Additional request headers, e.g. a Range header to download part of the file
+        :return: The (streamed) response
+        """
+        # Content is passed on as-is, so it should not be encoded (which would invalidate its Content-Length)
+        headers = {"Accept-Encoding": "identity", **(headers or {})}
+        expected_code = [200]
+        if "Range" in headers:
+            # Partial content, or a range that cannot be satisfied
+            expected_code += [206, 416]
+        if "If-None-Match" in headers:
+            # Not modified
+            expected_code.append(304)
+        if len(expected_code) == 1:
+            expected_code = expected_code[0]
+        return self._send("GET", file.path, expected_code, headers=headers, stream=True)
+
+    def _send_upload(self, method, upload_id, expected_code, name="", **kwargs):
+        """Sends a request for the chunked upload with the given id. See `start_upload`"""
+        path = f"{upload_id}/{name}" if name else upload_id
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.request(method, f"{self.uploads_baseurl}/{path}", allow_redirects=False, **kwargs)
+        if response.status_code not in expected_code:
+            raise OperationFailed(method, path, expected_code, response.status_code)
+        return response
+
+    def start_upload(self, destination_path):
+        """
+        Starts a chunked upload (v2) of a file to the given path. Its chunks can be uploaded in any order (and
+        in parallel), after which Nextcloud assembles them in `finish_upload`.
+        See https://docs.nextcloud.com/server/latest/developer_manual/client_apis/WebDAV/chunking.html
+        :param destination_path: The path of the file once it is uploaded
+        :return: The id of the upload
+        """
+        upload_id = f"squire-upload-{uuid.uuid4().hex}"
+        self._send_upload("MKCOL", upload_id, (201,), headers={"Destination": self._get_url(destination_path)})
+        return upload_id
+
+    def upload_chunk(self, upload_id, index, stream, length, destination_path, total_length):
+        """
+        Uploads a chunk of a file, reading its content from the given stream while it is being sent.
+        :param upload_id: The id of the upload
+        :param index: The number of the chunk (1 to 10000)
+        :param stream: A file-like object containing (at least) `length` bytes
+        :param length: The size of the chunk in bytes. All chunks but the last should be at least 5 MB
+        :param destination_path: The path of the file once it is uploaded
+        :param total_length: The size of the entire file in bytes
+        """
+        headers = {
+            "Destination": self._get_url(destination_path),
+            "OC-Total-Length": str(total_length),
+        }
+        self._send_upload(
+            "PUT", upload_id, (201, 204), name=str(index), data=SizedStream(stream, length), headers=headers
+        )
+
+    def get_uploaded_chunks(self, upload_id):
+        """
+        Lists the chunks that were uploaded so far, so that an interrupted upload can be resumed
+        :param upload_id: The id of the upload
+        :return: A dictionary mapping the numbers of the uploaded chunks to their sizes
         """
-        return self._send("GET", file.path, 200, stream=True)
+        response = self._send_upload("PROPFIND", upload_id, (207,), headers={"Depth": "1"})
+        chunks = {}
+        for dav_node in xml.fromstring(response.content).findall("{DAV:}response"):
+            name = self._get_dav_prop(dav_node, "href").rstrip("/").rsplit("/", 1)[-1]
+            size = self._get_dav_prop(dav_node, "getcontentlength")
+            if name.isdigit() and size is not None:
+                chunks[int(name)] = int(size)
+        return chunks
+
+    def finish_upload(self, upload_id, destination_path, total_length):
+        """
+        Assembles the uploaded chunks into the destination file. Fails if that file already exists.
+        :param upload_id: The id of the upload
+        :param destination_path: The path of the file once it is uploaded
+        :param total_length: The size of the entire file in bytes
+        :return: The uploaded NextCloudFile
+        """
+        headers = {
+            "Destination": self._get_url(destination_path),
+            "OC-Total-Length": str(total_length),
+            "Overwrite": "F",
+        }
+        self._send_upload("MOVE", upload_id, (201, 204), name=".file", headers=headers)
+        self.invalidate_listings()
+        return NextCloudFile(path=destination_path)
+
+    def cancel_upload(self, upload_id):
+        """Removes all chunks of an upload"""
+        self._send_upload("DELETE", upload_id, (204, 404))
 
     def mkdir(self, folder):
         if isinstance(folder, NextCloudFolder):
@@ -53,22 +177,88 @@ class NextCloudClient(Client):
         else:
             super(NextCloudClient, self).mkdir(folder)
             folder = NextCloudFolder(folder)
+        self.invalidate_listings()
         return folder
 
     def ls(self, remote_path=""):
-        headers = {"Depth": "1"}
-        response = self._send("PROPFIND", remote_path, expected_code=207, headers=headers)
-
-        tree = xml.fromstring(response.content)
-        # The bit below is adjusted to take the new constructs into account
-        resources = [self.construct_nextcloud_resource(dav_node) for dav_node in tree.findall("{DAV:}response")]
+        resources = self.propfind(remote_path)
         # It also returns the folder itself, which is redundant, so remove it from the results
         return list(filter(lambda r: r.name != remote_path, resources))
 
+    def propfind(self, remote_path="", depth="1", use_cache=True):
+        """
+        Lists the resources at the given path in a single request. Listings are cached for
+        `listing_cache_timeout` seconds, or until a resource is modified through this client.
+        :param remote_path: The path of the folder to list
+        :param depth: "0" for the folder itself, "1" to include its contents, or "infinity" to include
+        all nested contents (which may be disabled on the server)
+        :param use_cache: Whether a cached listing can be used
+        :return: The listed resources, including the folder itself
+        """
+        cache_key = self._get_listing_cache_key(remote_path, depth) if self.listing_cache_timeout else None
+        if use_cache and cache_key is not None:
+            resources = cache.get(cache_key)
+            if resources is not None:
+                return list(resources)
+
+        headers = {"Depth": depth}
+        response = self._send("PROPFIND", remote_path, expected_code=207, headers=headers, stream=True)
+        try:
+            resources = list(self._iter_multistatus(response))
+        finally:
+            response.close()
+
+        if cache_key is not None:
+            cache.set(cache_key, resources, timeout=self.listing_cache_timeout)
+        return list(resources)
+
+    def _iter_multistatus(self, response):
+        """Parses the resources in a multistatus response while it is being received, so that large
+        listings are never held in memory as a whole (neither as text, nor as an XML tree)
+        """
+        parser = xml.XMLPullParser(events=("end",))
+        for chunk in response.iter_content(chunk_size=self.MULTISTATUS_CHUNK_SIZE):
+            parser.feed(chunk)
+            yield from self._read_multistatus_events(parser)
+        parser.close()
+        yield from self._read_multistatus_events(parser)
+
+    def _read_multistatus_events(self, parser):
+        for _, element in parser.read_events():
+            if element.tag == "{DAV:}response":
+                # The bit below is adjusted to take the new constructs into account
+                yield self.construct_nextcloud_resource(element)
+                element.clear()
+
+    def _get_listing_cache_key(self, remote_path, depth):
+        return f"nextcloud_listing:{self._get_listing_version()}:{depth}:{self._hash_url(remote_path)}"
+
+    def _hash_url(self, remote_path=""):
+        return hashlib.sha1(self._get_url(remote_path).encode()).hexdigest()
+
+    def _get_listing_version(self):
+        """Gets the current version of the cached listings. Listings of other versions are outdated."""
+        key = f"nextcloud_listing_version:{self._hash_url()}"
+        version = cache.get(key)
+        if version is None:
+            # Start at an arbitrary version, so listings from before the version was lost are never reused
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def invalidate_listings(self):
+        """Marks all cached listings as outdated, e.g. after a resource was modified"""
+        try:
+            cache.incr(f"nextcloud_listing_version:{self._hash_url()}")
+        except ValueError:
+            # Version expired or was evicted, so listings are already unreachable
+            pass
+
     def mv(self, file: NextCloudFile, to_folder: NextCloudFolder):
         new_path = self._get_url(to_folder.path).strip("/") + "/" + file.path.split("/")[-1]
         headers = {"DESTINATION": new_path}
         self._send("MOVE", file.path, expected_code=201, headers=headers)
+        self.invalidate_listings()
         file.path = new_path
 
     def exists(self, resource: NextCloudResource = None, path: str = None):
@@ -110,7 +300,34 @@ class NextCloudClient(Client):
             )
 
 
+class SizedStream:
+    """Wraps a file-like object of which only the first `length` bytes should be read. Ensures that
+    requests sends it with a Content-Length instead of chunked transfer encoding.
+    """
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
 def construct_client():
+    """Gets the NextCloudClient shared by the entire process, so that its connections to Nextcloud are reused"""
+    global _client
     try:
         host = settings.NEXTCLOUD_HOST
         username = settings.NEXTCLOUD_USERNAME
@@ -118,13 +335,28 @@ def construct_client():
     except AttributeError:
         raise ClientNotImplemented()
     else:
-        return NextCloudClient(
-            host=host,
-            username=username,
-            password=password,
-            protocol="https",
-            path=getattr(settings, "NEXTCLOUD_URL", ""),  # Local url is optional
-        )
+        with _client_lock:
+            if _client is None:
+                _client = NextCloudClient(
+                    host=host,
+                    username=username,
+                    password=password,
+                    protocol="https",
+                    path=getattr(settings, "NEXTCLOUD_URL", ""),  # Local url is optional
+                    timeout=settings.NEXTCLOUD_TIMEOUT,
+                    pool_size=settings.NEXTCLOUD_POOL_SIZE,
+                    listing_cache_timeout=settings.NEXTCLOUD_LISTING_CACHE_TIMEOUT,
+                )
+            return _client
+
+
+@receiver(setting_changed)
+def reset_client(setting=None, **kwargs):
+    """Constructs a new client once the Nextcloud settings change (e.g. in tests)"""
+    global _client
+    if setting is None or setting.startswith("NEXTCLOUD_"):
+        with _client_lock:
+            _client = None
 
 
 # Append OperationFailed operations with additional methods
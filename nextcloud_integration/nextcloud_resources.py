@@ -2,6 +2,9 @@ __all__ = ["NextCloudFile", "NextCloudFolder"]
 
 
 class NextCloudResource(object):
+    # Large directory listings contain many resources
+    __slots__ = ("path", "name")
+
     def __init__(self, path, name=None):
         # Take the last bit with the name of the folder
         self.path = path
@@ -12,6 +15,8 @@ class NextCloudResource(object):
 
 
 class NextCloudFile(NextCloudResource):
+    __slots__ = ("last_modified", "content_type")
+
     def __init__(self, path, last_modified=None, content_type=None, **kwargs):
         super(NextCloudFile, self).__init__(path, **kwargs)
         self.last_modified = last_modified
@@ -25,6 +30,8 @@ class NextCloudFile(NextCloudResource):
 
 
 class NextCloudFolder(NextCloudResource):
+    __slots__ = ()
+
     def __init__(self, path, name=None):
         if name is None:
             name = path.split("/")[-1]
@@ -0,0 +1,124 @@
+// Uploads a file to Nextcloud through Squire in chunks. Chunks are uploaded in parallel, and
+//  interrupted uploads are resumed by skipping the chunks that were already uploaded.
+$(function() {
+    const form = $('#upload_file_form');
+    const chunkSize = parseInt(form.data('chunk-size'));
+    const maxParallelChunks = parseInt(form.data('max-parallel-chunks'));
+    const csrfToken = form.find('input[name="csrfmiddlewaretoken"]').val();
+    const progressBar = $('#upload_progress .progress-bar');
+
+    function showErrors(errors) {
+        let messages = [];
+        if (typeof errors === 'string') {
+            messages.push(errors);
+        } else {
+            $.each(errors, function(field, fieldErrors) {
+                messages.push(fieldErrors.join(' '));
+            });
+        }
+        $('#upload_errors').text(messages.join(' ')).removeClass('d-none');
+    }
+
+    async function post(data) {
+        data.append('csrfmiddlewaretoken', csrfToken);
+        const response = await fetch(window.location.href, {method: 'POST', body: data, credentials: 'same-origin'});
+        const content = await response.json().catch(() => ({errors: 'Something went wrong while uploading.'}));
+        if (!response.ok) {
+            throw content;
+        }
+        return content;
+    }
+
+    function getFormData(file, action) {
+        const data = new FormData();
+        data.append('action', action);
+        data.append('display_name', form.find('[name="display_name"]').val());
+        data.append('description', form.find('[name="description"]').val());
+        data.append('file_name', file.name);
+        data.append('file_size', file.size);
+        return data;
+    }
+
+    async function startUpload(file, storageKey) {
+        // Resume an upload of the same file, if one exists
+        const previousUploadId = window.localStorage.getItem(storageKey);
+        if (previousUploadId !== null) {
+            const data = getFormData(file, 'status');
+            data.append('upload_id', previousUploadId);
+            try {
+                return await post(data);
+            } catch (error) {
+                window.localStorage.removeItem(storageKey);
+            }
+        }
+        const upload = await post(getFormData(file, 'start'));
+        window.localStorage.setItem(storageKey, upload.upload_id);
+        return upload;
+    }
+
+    async function uploadChunks(file, upload) {
+        const numChunks = Math.ceil(file.size / chunkSize);
+        let pending = [];
+        for (let index = 1; index <= numChunks; index++) {
+            const start = (index - 1) * chunkSize;
+            const end = Math.min(start + chunkSize, file.size);
+            if (upload.chunks[index] !== end - start) {
+                pending.push({index: index, start: start, end: end});
+            }
+        }
+
+        let uploadedChunks = numChunks - pending.length;
+        progressBar.css('width', (100 * uploadedChunks / numChunks) + '%');
+        async function worker() {
+            while (pending.length > 0) {
+                const chunk = pending.shift();
+                const url = new URL(window.location.href);
+                url.searchParams.set('upload_id', upload.upload_id);
+                url.searchParams.set('chunk', chunk.index);
+                const response = await fetch(url, {
+                    method: 'PUT',
+                    body: file.slice(chunk.start, chunk.end),
+                    headers: {'X-CSRFToken': csrfToken, 'Content-Type': 'application/octet-stream'},
+                    credentials: 'same-origin',
+                });
+                if (!response.ok) {
+                    throw {errors: 'Could not upload the file. Try again to resume the upload.'};
+                }
+                uploadedChunks++;
+                progressBar.css('width', (100 * uploadedChunks / numChunks) + '%');
+            }
+        }
+
+        let workers = [];
+        for (let i = 0; i < maxParallelChunks; i++) {
+            workers.push(worker());
+        }
+        await Promise.all(workers);
+    }
+
+    form.on('submit', async function(event) {
+        event.preventDefault();
+        const file = $('#upload_file_input')[0].files[0];
+        if (file === undefined) {
+            return;
+        }
+        const storageKey = ['nextcloud_upload', form.data('folder'), file.name, file.size, file.lastModified].join(':');
+
+        $('#upload_errors').addClass('d-none');
+        $('#upload_file_button').prop('disabled', true);
+        $('#upload_progress').removeClass('d-none');
+        try {
+            const upload = await startUpload(file, storageKey);
+            await uploadChunks(file, upload);
+
+            const data = getFormData(file, 'finish');
+            data.append('upload_id', upload.upload_id);
+            const result = await post(data);
+            window.localStorage.removeItem(storageKey);
+            window.location.href = result.redirect_url;
+        } catch (error) {
+            showErrors(error.errors || 'Something went wrong while uploading.');
+            $('#upload_file_button').prop('disabled', false);
+        }
+    });
+});
@@ -1,16 +1,18 @@
 from django.contrib import messages
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.views.generic import TemplateView, ListView, View
 
 from unittest.mock import patch
 
 from committees.mixins import AssociationGroupMixin
+from core.tests.util import suppress_warnings
 from committees.tests.committee_pages.utils import AssocationGroupTestingMixin
 from utils.testing.view_test_utils import ViewValidityMixin, TestMixinMixin
 
-from nextcloud_integration.models import SquireNextCloudFolder
+from nextcloud_integration.models import SquireNextCloudFile, SquireNextCloudFolder
 from nextcloud_integration.tests import patch_construction
+from nextcloud_integration.tests.fake_webdav import FakeWebDAV, FakeWebDAVServer
 from nextcloud_integration.views import (
     NextcloudConnectionViewMixin,
     FolderMixin,
@@ -190,3 +192,136 @@ class CloudFolderRefreshViewTestCase(TestFolderMixin, TestCase):
         mock.return_value = False
         response = self.client.post(self.get_base_url(), data={}, follow=True)
         self.assertHasMessage(response, level=messages.WARNING, text="folder has one or more missing files")
+
+
+@override_settings(NEXTCLOUD_UPLOAD_CHUNK_SIZE=4)
+class CloudFileUploadViewTestCase(TestFolderMixin, TestCase):
+    url_name = "nextcloud:folder_upload_file"
+    group_permissions_required = (
+        "nextcloud_integration.change_squirenextcloudfolder",
+        "nextcloud_integration.sync_squirenextcloudfile",
+    )
+
+    def setUp(self):
+        super(CloudFileUploadViewTestCase, self).setUp()
+        self.webdav = FakeWebDAV("example_user")
+        server = FakeWebDAVServer(self.webdav).start()
+        self.addCleanup(server.stop)
+        client_patcher = patch("nextcloud_integration.views.construct_client", return_value=server.construct_client())
+        client_patcher.start()
+        self.addCleanup(client_patcher.stop)
+
+    def start_upload(self, file_name="upload.txt", file_size=10):
+        response = self.client.post(
+            self.get_base_url(),
+            data={
+                "action": "start",
+                "display_name": "Uploaded file",
+                "description": "random description",
+                "file_name": file_name,
+                "file_size": file_size,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["upload_id"]
+
+    def put_chunk(self, upload_id, index, content):
+        url = f"{self.get_base_url()}?upload_id={upload_id}&chunk={index}"
+        return self.client.put(url, data=content, content_type="application/octet-stream")
+
+    def test_fixed_values(self):
+        self.assertTrue(issubclass(CloudFileUploadView, AssociationGroupMixin))
+        self.assertTrue(issubclass(CloudFileUploadView, NextcloudConnectionViewMixin))
+        self.assertTrue(issubclass(CloudFileUploadView, FolderMixin))
+        self.assertEqual(
+            CloudFileUploadView.template_name, "nextcloud_integration/committees/committee_cloud_folder_upload.html"
+        )
+        self.assertEqual(CloudFileUploadView.permission_required, "nextcloud_integration.sync_squirenextcloudfile")
+
+    def test_successful_get(self):
+        response = self.assertValidGetResponse()
+        self.assertEqual(response.context["chunk_size"], 4)
+
+    @suppress_warnings
+    def test_no_sync_permission(self):
+        """Tests that members without the permission to sync files cannot upload files"""
+        self.association_group.permissions.remove(
+            self._get_perm_by_name("nextcloud_integration.sync_squirenextcloudfile")
+        )
+        self.assertPermissionDenied()
+        response = self.client.post(self.get_base_url(), data={"action": "start"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.webdav.uploads, {})
+
+    @suppress_warnings
+    def test_upload(self):
+        """Tests uploading a file in chunks"""
+        upload_id = self.start_upload()
+        self.assertIn(upload_id, self.webdav.uploads)
+
+        self.assertEqual(self.put_chunk(upload_id, 3, b"ij").status_code, 200)
+        self.assertEqual(self.put_chunk(upload_id, 1, b"abcd").status_code, 200)
+        response = self.client.post(self.get_base_url(), data={"action": "status", "upload_id": upload_id})
+        self.assertEqual(response.json()["chunks"], {"1": 4, "3": 2})
+        self.assertEqual(self.put_chunk(upload_id, 2, b"efgh").status_code, 200)
+
+        response = self.client.post(
+            self.get_base_url(),
+            data={
+                "action": "finish",
+                "upload_id": upload_id,
+                "display_name": "Uploaded file",
+                "description": "random description",
+                "file_name": "upload.txt",
+                "file_size": 10,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["redirect_url"],
+            reverse("committees:nextcloud:cloud_overview", kwargs={"group_id": self.association_group.id}),
+        )
+        self.assertEqual(self.webdav.files["/TestFolder/upload.txt"], b"abcdefghij")
+
+        nc_file = self.folder.files.get(slug="uploaded-file")
+        self.assertEqual(nc_file.file_name, "upload.txt")
+        self.assertEqual(nc_file.connection, SquireNextCloudFile.CONNECTION_SQUIRE_UPLOAD)
+        # The upload can no longer be continued
+        self.assertEqual(self.put_chunk(upload_id, 1, b"abcd").status_code, 404)
+
+    @suppress_warnings
+    def test_invalid_chunk(self):
+        upload_id = self.start_upload()
+        # Chunks other than the last must have the configured chunk size
+        self.assertEqual(self.put_chunk(upload_id, 1, b"abc").status_code, 400)
+        self.assertEqual(self.put_chunk(upload_id, 3, b"ijk").status_code, 400)
+        # Chunk out of range
+        self.assertEqual(self.put_chunk(upload_id, 4, b"a").status_code, 400)
+        self.assertEqual(self.webdav.uploads[upload_id], {})
+
+    @suppress_warnings
+    def test_unknown_upload(self):
+        self.assertEqual(self.put_chunk("squire-upload-foo", 1, b"abcd").status_code, 404)
+        response = self.client.post(self.get_base_url(), data={"action": "status", "upload_id": "squire-upload-foo"})
+        self.assertEqual(response.status_code, 404)
+
+    @suppress_warnings
+    def test_invalid_start(self):
+        # A file with this name already exists in the folder
+        file_name = self.folder.files.first().file_name
+        response = self.client.post(
+            self.get_base_url(),
+            data={"action": "start", "display_name": "Foo", "file_name": file_name, "file_size": 10},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("file_name", response.json()["errors"])
+        self.assertEqual(self.webdav.uploads, {})
+
+    @suppress_warnings
+    def test_cancel(self):
+        upload_id = self.start_upload()
+        self.put_chunk(upload_id, 1, b"abcd")
+        response = self.client.delete(f"{self.get_base_url()}?upload_id={upload_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(upload_id, self.webdav.uploads)
+        self.assertEqual(self.put_chunk(upload_id, 2, b"efgh").status_code, 404)
@@ -0,0 +1,151 @@
+import re
+import threading
+from socketserver import ThreadingMixIn
+from typing import Dict, Optional
+from urllib.parse import unquote, urlparse
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+from xml.sax.saxutils import escape
+
+from nextcloud_integration.nextcloud_client import NextCloudClient
+
+##################################################################################
+# A local, in-memory stand-in for Nextcloud's WebDAV API. Implements the (subset of
+#   the) routes needed for chunked uploads (v2).
+##################################################################################
+
+
+class FakeWebDAV:
+    """A WSGI application mimicking Nextcloud's chunked upload (v2) WebDAV routes for a single user"""
+
+    def __init__(self, username: str):
+        self.username = username
+        self.files: Dict[str, bytes] = {}
+        self.uploads: Dict[str, Dict[str, bytes]] = {}
+        # Largest number of bytes read from a request body at once
+        self.max_read_size = 0
+        self._lock = threading.Lock()
+        self._files_prefix = f"/remote.php/dav/files/{username}"
+        self._uploads_regex = re.compile(
+            rf"/remote\.php/dav/uploads/{re.escape(username)}/(?P<upload>[^/]+)/?(?P<name>[^/]*)"
+        )
+
+    def _read_body(self, environ) -> bytes:
+        remaining = int(environ.get("CONTENT_LENGTH") or 0)
+        body = b""
+        while remaining > 0:
+            data = environ["wsgi.input"].read(min(remaining, 8192))
+            if not data:
+                break
+            self.max_read_size = max(self.max_read_size, len(data))
+            body += data
+            remaining -= len(data)
+        return body
+
+    def _get_destination(self, environ) -> str:
+        path = unquote(urlparse(environ.get("HTTP_DESTINATION", "")).path)
+        return path[len(self._files_prefix) :] if path.startswith(self._files_prefix) else None
+
+    def _propfind(self, upload_id: str) -> bytes:
+        responses = "".join(
+            f"<d:response><d:href>/remote.php/dav/uploads/{self.username}/{upload_id}/{escape(name)}</d:href>"
+            f"<d:propstat><d:prop><d:getcontentlength>{len(content)}</d:getcontentlength></d:prop>"
+            f"<d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+            for name, content in self.uploads[upload_id].items()
+        )
+        return (
+            f'<?xml version="1.0"?><d:multistatus xmlns:d="DAV:">'
+            f"<d:response><d:href>/remote.php/dav/uploads/{self.username}/{upload_id}/</d:href></d:response>"
+            f"{responses}</d:multistatus>"
+        ).encode()
+
+    def _handle(self, environ):
+        method = environ["REQUEST_METHOD"]
+        match = self._uploads_regex.fullmatch(environ["PATH_INFO"])
+        if match is None:
+            return "404 Not Found", b""
+        upload_id, name = match.group("upload"), match.group("name")
+
+        with self._lock:
+            if method == "MKCOL" and not name:
+                if upload_id in self.uploads:
+                    return "405 Method Not Allowed", b""
+                self.uploads[upload_id] = {}
+                return "201 Created", b""
+
+            if upload_id not in self.uploads:
+                return "404 Not Found", b""
+
+            if method == "PUT" and name.isdigit():
+                self.uploads[upload_id][name] = self._read_body(environ)
+                return "201 Created", b""
+            elif method == "PROPFIND" and not name:
+                return "207 Multi-Status", self._propfind(upload_id)
+            elif method == "MOVE" and name == ".file":
+                destination = self._get_destination(environ)
+                if destination is None:
+                    return "400 Bad Request", b""
+                if destination in self.files and environ.get("HTTP_OVERWRITE") == "F":
+                    return "412 Precondition Failed", b""
+                chunks = self.uploads[upload_id]
+                content = b"".join(chunks[name] for name in sorted(chunks, key=int))
+                if len(content) != int(environ.get("HTTP_OC_TOTAL_LENGTH", len(content))):
+                    return "400 Bad Request", b""
+                self.files[destination] = content
+                del self.uploads[upload_id]
+                return "201 Created", b""
+            elif method == "DELETE" and not name:
+                del self.uploads[upload_id]
+                return "204 No Content", b""
+        return "405 Method Not Allowed", b""
+
+    def __call__(self, environ, start_response):
+        status, content = self._handle(environ)
+        start_response(status, [("Content-Type", "application/xml"), ("Content-Length", str(len(content)))])
+        return [content]
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeWebDAVServer:
+    """Serves a `FakeWebDAV` on a local port in a background thread. Can be used as a context manager."""
+
+    def __init__(self, app: FakeWebDAV):
+        self.app = app
+        self._server = make_server(
+            "127.0.0.1", 0, app, server_class=_ThreadingWSGIServer, handler_class=_QuietWSGIRequestHandler
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    def construct_client(self) -> NextCloudClient:
+        """Constructs a client that connects to this server"""
+        return NextCloudClient(
+            host="127.0.0.1",
+            port=self._server.server_address[1],
+            username=self.app.username,
+            password="password",
+            protocol="http",
+        )
+
+    def start(self) -> "FakeWebDAVServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeWebDAVServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
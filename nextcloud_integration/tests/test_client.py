@@ -1,11 +1,18 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import threading
+from xml.etree.ElementTree import ParseError
+
+from django.core.cache import cache
 from django.test import TestCase
 from os.path import exists as file_exists
+from easywebdav import OperationFailed
 from requests.models import Response
 
 from unittest.mock import patch
 
 from nextcloud_integration.nextcloud_client import NextCloudClient as Client
-from nextcloud_integration.nextcloud_client import construct_client
+from nextcloud_integration.nextcloud_client import SizedStream, construct_client
 from nextcloud_integration.nextcloud_resources import (
     NextCloudFolder,
     NextCloudFile,
@@ -20,6 +27,7 @@ from nextcloud_integration.nextcloud_resources import (
     PowerpointFileType,
     TextFileType,
 )
+from nextcloud_integration.tests.fake_webdav import FakeWebDAV, FakeWebDAVServer
 
 
 class NextCloudClientTestCase(TestCase):
@@ -43,8 +51,9 @@ class NextCloudClientTestCase(TestCase):
         file_name = file_name or "non_existent.dat"
         file_path = f"nextcloud_integration/tests/files/{file_name}"
         if file_name is not None and file_exists(file_path):
-            with open(file_path, "r") as file:
+            with open(file_path, "rb") as file:
                 resp._content = file.read()
+            resp._content_consumed = True
         resp.status_code = status_code or 200
         return resp
 
@@ -66,6 +75,7 @@ class NextCloudClientTestCase(TestCase):
             self.assertEqual(mock.call_args.args[0], "PROPFIND")
             self.assertEqual(mock.call_args.kwargs["expected_code"], 207)
             self.assertEqual(mock.call_args.kwargs["headers"]["Depth"], "1")
+            self.assertTrue(mock.call_args.kwargs["stream"])
 
             # Test responses
             nc_folders = {}
@@ -138,6 +148,62 @@ class NextCloudClientTestCase(TestCase):
             self.assertEqual(mock.call_args.args[1], "TestNewFolder/FolderInstance")
             self.assertEqual(mock.call_args.args[2], 201)
 
+    def test_listing_cache(self):
+        """Tests that listings are cached until they expire, or until resources are modified"""
+        cache.clear()
+        client = Client(host="example.com", username="example_user", password="pw", listing_cache_timeout=30)
+        side_effect = lambda *args, **kwargs: self._construct_send_response(
+            file_name="ls_response.xml", status_code=207
+        )
+        with patch("nextcloud_integration.nextcloud_client.NextCloudClient._send", side_effect=side_effect) as mock:
+            names = [resource.name for resource in client.ls()]
+            self.assertEqual([resource.name for resource in client.ls()], names)
+            mock.assert_called_once()
+
+            # Other paths are listed separately
+            client.ls("Some Folder/")
+            self.assertEqual(mock.call_count, 2)
+
+            # Listings can be bypassed
+            client.propfind(use_cache=False)
+            self.assertEqual(mock.call_count, 3)
+
+            # Modifications invalidate listings
+            client.mkdir("new_folder")
+            mock.reset_mock()
+            client.ls()
+            mock.assert_called_once()
+            client.mv(NextCloudFile("/new_file.txt"), NextCloudFolder("/new_folder/"))
+            mock.reset_mock()
+            client.ls()
+            mock.assert_called_once()
+
+            # Listings expire
+            with patch("nextcloud_integration.nextcloud_client.cache.get", return_value=None):
+                client.ls()
+            self.assertEqual(mock.call_count, 2)
+
+    def test_propfind_closes_response(self):
+        """Tests that streamed listings are closed, even if they cannot be parsed"""
+        response = self._construct_send_response(file_name="ls_response.xml", status_code=207)
+        with self._patch_send(side_effect=[response]):
+            with patch.object(response, "close") as mock_close:
+                self.client.propfind(use_cache=False)
+                mock_close.assert_called_once()
+
+        response = self._construct_send_response(file_name="ls_response.xml", status_code=207)
+        response._content = b"<d:multistatus"
+        with self._patch_send(side_effect=[response]):
+            with patch.object(response, "close") as mock_close:
+                with self.assertRaises(ParseError):
+                    self.client.propfind(use_cache=False)
+                mock_close.assert_called_once()
+
+    def test_resources_slots(self):
+        """Tests that resources do not have a __dict__, to keep large listings small"""
+        self.assertFalse(hasattr(NextCloudFile("/file.txt"), "__dict__"))
+        self.assertFalse(hasattr(NextCloudFolder("/folder/"), "__dict__"))
+
     def test_download_stream(self):
         with self._patch_send(status_code=201) as mock:
             file = NextCloudFolder("files/testfile.txt")
@@ -147,6 +213,17 @@ class NextCloudClientTestCase(TestCase):
             self.assertEqual(mock.call_args.args[1], "files/testfile.txt")
             self.assertEqual(mock.call_args.args[2], 200)
             self.assertEqual(mock.call_args.kwargs.get("stream", None), True)
+            # Content should not be re-encoded
+            self.assertEqual(mock.call_args.kwargs["headers"], {"Accept-Encoding": "identity"})
+
+    def test_download_range(self):
+        with self._patch_send(status_code=206) as mock:
+            file = NextCloudFile("files/testfile.txt")
+            self.client.download(file, headers={"Range": "bytes=0-99"})
+
+            self.assertEqual(mock.call_args.args[2], [200, 206, 416])
+            self.assertEqual(mock.call_args.kwargs["headers"]["Range"], "bytes=0-99")
+            self.assertEqual(mock.call_args.kwargs.get("stream", None), True)
 
     @patch("nextcloud_integration.nextcloud_client.NextCloudClient")
     def test_constructor(self, mock_client):
@@ -162,6 +239,7 @@ class NextCloudClientTestCase(TestCase):
             self.assertEqual(mock_client.call_args.kwargs["password"], "user_password")
             self.assertEqual(mock_client.call_args.kwargs["protocol"], "https")
             self.assertEqual(mock_client.call_args.kwargs["path"], None)
+            self.assertEqual(mock_client.call_args.kwargs["timeout"], (5, 30))
 
         with self.settings(
             NEXTCLOUD_HOST="test.nl",
@@ -172,6 +250,92 @@ class NextCloudClientTestCase(TestCase):
             construct_client()
             self.assertEqual(mock_client.call_args.kwargs["path"], "local_url/")
 
+    def test_shared_client(self):
+        """Tests that the same client is used throughout the process, until the settings change"""
+        with self.settings(NEXTCLOUD_HOST="test.nl", NEXTCLOUD_USERNAME="user", NEXTCLOUD_PASSWORD="pw"):
+            client = construct_client()
+            self.assertIs(construct_client(), client)
+            self.assertEqual(client.timeout, (5, 30))
+
+            with self.settings(NEXTCLOUD_TIMEOUT=(1, 2)):
+                self.assertIsNot(construct_client(), client)
+                self.assertEqual(construct_client().timeout, (1, 2))
+
+    def test_connection_reuse(self):
+        """Tests that connections are kept alive between requests"""
+
+        class PropfindHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_PROPFIND(self):
+                with open("nextcloud_integration/tests/files/ls_response.xml", "rb") as file:
+                    content = file.read()
+                self.send_response(207)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), PropfindHandler)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        client = Client(
+            host="127.0.0.1", port=server.server_address[1], username="example_user", password="pw", protocol="http"
+        )
+        self.assertEqual(client.connection_count, 0)
+        for _ in range(3):
+            self.assertEqual(len(client.ls()), 5)
+        self.assertEqual(client.connection_count, 1)
+
+    def test_chunked_upload(self):
+        """Tests uploading a file in several chunks, and resuming an upload"""
+        app = FakeWebDAV("example_user")
+        server = FakeWebDAVServer(app).start()
+        self.addCleanup(server.stop)
+        client = server.construct_client()
+
+        upload_id = client.start_upload("/folder/foo.txt")
+        self.assertIn(upload_id, app.uploads)
+        # Chunks can be uploaded in any order
+        client.upload_chunk(upload_id, 2, BytesIO(b"def!"), 4, "/folder/foo.txt", 10)
+        # Only the given length is read from the stream
+        client.upload_chunk(upload_id, 1, BytesIO(b"abcdef"), 6, "/folder/foo.txt", 10)
+        self.assertEqual(client.get_uploaded_chunks(upload_id), {1: 6, 2: 4})
+
+        file = client.finish_upload(upload_id, "/folder/foo.txt", 10)
+        self.assertIsInstance(file, NextCloudFile)
+        self.assertEqual(file.path, "/folder/foo.txt")
+        self.assertEqual(app.files["/folder/foo.txt"], b"abcdefdef!")
+        self.assertNotIn(upload_id, app.uploads)
+
+        # Existing files are not overwritten
+        upload_id = client.start_upload("/folder/foo.txt")
+        client.upload_chunk(upload_id, 1, BytesIO(b"x"), 1, "/folder/foo.txt", 1)
+        with self.assertRaises(OperationFailed):
+            client.finish_upload(upload_id, "/folder/foo.txt", 1)
+        self.assertEqual(app.files["/folder/foo.txt"], b"abcdefdef!")
+
+        # Cancelling removes the chunks; cancelling twice is harmless
+        client.cancel_upload(upload_id)
+        self.assertNotIn(upload_id, app.uploads)
+        client.cancel_upload(upload_id)
+        with self.assertRaises(OperationFailed):
+            client.get_uploaded_chunks(upload_id)
+
+    def test_sized_stream(self):
+        """Tests that a SizedStream does not read beyond its length"""
+        stream = BytesIO(b"abcdef")
+        sized_stream = SizedStream(stream, 4)
+        self.assertEqual(len(sized_stream), 4)
+        self.assertEqual(sized_stream.read(3), b"abc")
+        self.assertEqual(sized_stream.read(), b"d")
+        self.assertEqual(sized_stream.read(), b"")
+        self.assertEqual(stream.read(), b"ef")
+
     def test_baseurl(self):
         """Test functioning of the client base_url being adjusted if a special path is given"""
         client = Client(
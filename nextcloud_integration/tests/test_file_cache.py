@@ -0,0 +1,103 @@
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase, override_settings
+from requests.models import Response
+from unittest.mock import patch
+
+from nextcloud_integration.file_cache import NextCloudFileCache, get_file_cache
+
+
+class NextCloudFileCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.file_cache = NextCloudFileCache(cache_dir.name, max_size=20, max_file_size=10)
+
+    @staticmethod
+    def _construct_response(content: bytes, etag='"abc"', status_code=200):
+        resp = Response()
+        resp._content = content
+        resp._content_consumed = True
+        resp.status_code = status_code
+        resp.headers["Content-Length"] = str(len(content))
+        resp.headers["Content-Type"] = "text/plain"
+        if etag is not None:
+            resp.headers["ETag"] = etag
+        return resp
+
+    def test_store(self):
+        self.assertIsNone(self.file_cache.get("foo.txt"))
+        cached_file = self.file_cache.store("foo.txt", self._construct_response(b"foo"))
+        self.assertEqual(self.file_cache.get("foo.txt"), cached_file)
+        self.assertEqual(cached_file.etag, '"abc"')
+        self.assertEqual(cached_file.content_type, "text/plain")
+        self.assertEqual(cached_file.size, 3)
+        with open(cached_file.data_path, "rb") as data_file:
+            self.assertEqual(data_file.read(), b"foo")
+
+        # Replacing the file removes its old contents
+        new_cached_file = self.file_cache.store("foo.txt", self._construct_response(b"new foo", etag='"def"'))
+        self.assertEqual(self.file_cache.get("foo.txt").etag, '"def"')
+        self.assertFalse(os.path.exists(cached_file.data_path))
+        self.assertTrue(os.path.exists(new_cached_file.data_path))
+
+    def test_can_store(self):
+        self.assertTrue(self.file_cache.can_store(self._construct_response(b"foo")))
+        # File too large
+        self.assertFalse(self.file_cache.can_store(self._construct_response(b"foo" * 4)))
+        # No ETag to revalidate with
+        self.assertFalse(self.file_cache.can_store(self._construct_response(b"foo", etag=None)))
+        # Partial content
+        self.assertFalse(self.file_cache.can_store(self._construct_response(b"foo", status_code=206)))
+
+    def test_evict(self):
+        """Tests that the least recently used files are evicted"""
+        for name in ("a", "b"):
+            cached_file = self.file_cache.store(name, self._construct_response(b"x" * 8))
+            # Ensure different access times
+            os.utime(cached_file.data_path, (time.time() - 10, time.time() - 10))
+        # a was used recently
+        self.file_cache.touch(self.file_cache.get("a"))
+
+        self.file_cache.store("c", self._construct_response(b"x" * 8))
+        self.assertIsNotNone(self.file_cache.get("a"))
+        self.assertIsNone(self.file_cache.get("b"))
+        self.assertIsNotNone(self.file_cache.get("c"))
+
+    def test_store_failed(self):
+        """Tests that no files are left behind if a file cannot be stored"""
+        with patch("nextcloud_integration.file_cache.json.dump", side_effect=OSError("Disk full")):
+            with self.assertRaises(OSError):
+                self.file_cache.store("foo.txt", self._construct_response(b"foo"))
+        self.assertListEqual(os.listdir(self.file_cache.directory), [])
+
+    def test_evict_leftovers(self):
+        """Tests that metadata of evicted files and temporary files of interrupted writes are removed"""
+        for name in ("a", "b", "c"):
+            self.file_cache.store(name, self._construct_response(b"x" * 8))
+        self.assertEqual(len([name for name in os.listdir(self.file_cache.directory) if name.endswith(".json")]), 2)
+
+        old_tmp_path = os.path.join(self.file_cache.directory, "old.tmp")
+        new_tmp_path = os.path.join(self.file_cache.directory, "new.tmp")
+        for tmp_path in (old_tmp_path, new_tmp_path):
+            open(tmp_path, "w").close()
+        stale_time = time.time() - NextCloudFileCache.STALE_TMP_AGE - 10
+        os.utime(old_tmp_path, (stale_time, stale_time))
+        self.file_cache.evict()
+        self.assertFalse(os.path.exists(old_tmp_path))
+        # Temporary files may still be written to
+        self.assertTrue(os.path.exists(new_tmp_path))
+
+    def test_clear(self):
+        self.file_cache.store("foo.txt", self._construct_response(b"foo"))
+        self.file_cache.clear()
+        self.assertIsNone(self.file_cache.get("foo.txt"))
+
+    def test_get_file_cache(self):
+        with override_settings(NEXTCLOUD_CACHE_DIR=None):
+            self.assertIsNone(get_file_cache())
+        with override_settings(NEXTCLOUD_CACHE_DIR="/tmp/foo", NEXTCLOUD_CACHE_MAX_SIZE=100):
+            self.assertEqual(get_file_cache().directory, "/tmp/foo")
+            self.assertEqual(get_file_cache().max_size, 100)
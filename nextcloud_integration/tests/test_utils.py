@@ -1,12 +1,27 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from easywebdav import OperationFailed
 
-from nextcloud_integration.models import SquireNextCloudFolder
-from nextcloud_integration.nextcloud_resources import NextCloudFolder
-from nextcloud_integration.utils import refresh_status
+from nextcloud_integration.models import SquireNextCloudFolder, SquireNextCloudFile
+from nextcloud_integration.nextcloud_resources import NextCloudFile, NextCloudFolder
+from nextcloud_integration.utils import refresh_status, scan_folders
 
 from . import patch_construction
 
 
+def mock_propfind(paths):
+    """Mocks a PROPFIND request listing the given paths. Folders not in it do not exist."""
+
+    def fake_propfind(remote_path="", depth="1", use_cache=True):
+        if remote_path not in paths and depth != "infinity":
+            raise OperationFailed(method="PROPFIND", path=remote_path, expected_code=207, actual_code=404)
+        return [NextCloudFolder(path=path) if path.endswith("/") else NextCloudFile(path=path) for path in paths]
+
+    return fake_propfind
+
+
 @patch_construction("utils")
 class RefreshStatusTestCase(TestCase):
     fixtures = ["nextcloud_integration/nextcloud_fixtures"]
@@ -15,14 +30,15 @@ class RefreshStatusTestCase(TestCase):
         self.folder = SquireNextCloudFolder.objects.get(id=1)
 
     def test_succesful(self, mock):
-        mock.return_value.exists.return_value = True
+        mock.return_value.propfind.side_effect = mock_propfind(
+            ["/TestFolder/", "/TestFolder/testfile.md", "/TestFolder/otherfile.md"]
+        )
         self.assertEqual(refresh_status(self.folder), True)
+        # A single request is made
+        mock.return_value.propfind.assert_called_once_with("/TestFolder/", depth="1", use_cache=False)
 
     def test_fail_folder(self, mock):
-        def mock_exists(resource=None):
-            return not isinstance(resource, NextCloudFolder)
-
-        mock.return_value.exists.side_effect = mock_exists
+        mock.return_value.propfind.side_effect = mock_propfind([])
 
         self.assertEqual(refresh_status(self.folder), False)
         self.folder.refresh_from_db()
@@ -30,12 +46,79 @@ class RefreshStatusTestCase(TestCase):
         self.assertEqual(self.folder.files.first().is_missing, False)
 
     def test_fail_file(self, mock):
-        def mock_exists(resource=None):
-            return isinstance(resource, NextCloudFolder)
-
-        mock.return_value.exists.side_effect = mock_exists
+        mock.return_value.propfind.side_effect = mock_propfind(["/TestFolder/", "/TestFolder/otherfile.md"])
 
         self.assertEqual(refresh_status(self.folder), False)
         self.folder.refresh_from_db()
         self.assertEqual(self.folder.is_missing, False)
-        self.assertEqual(self.folder.files.first().is_missing, True)
+        self.assertEqual(self.folder.files.get(file_name="testfile.md").is_missing, True)
+        self.assertEqual(self.folder.files.get(file_name="otherfile.md").is_missing, False)
+
+    def test_restored(self, mock):
+        """Tests that folders and files that reappeared are no longer missing"""
+        self.folder.is_missing = True
+        self.folder.save()
+        self.folder.files.update(is_missing=True)
+        # Paths are URL-encoded by Nextcloud
+        SquireNextCloudFile.objects.filter(file_name="otherfile.md").update(file_name="other file.md")
+        mock.return_value.propfind.side_effect = mock_propfind(
+            ["/TestFolder/", "/TestFolder/testfile.md", "/TestFolder/other%20file.md"]
+        )
+
+        self.assertEqual(refresh_status(self.folder), True)
+        self.folder.refresh_from_db()
+        self.assertEqual(self.folder.is_missing, False)
+        self.assertFalse(self.folder.files.filter(is_missing=True).exists())
+
+
+@patch_construction("utils")
+class ScanFoldersTestCase(TestCase):
+    fixtures = ["nextcloud_integration/nextcloud_fixtures"]
+
+    def test_scan_folders(self, mock):
+        mock.return_value.propfind.side_effect = mock_propfind(
+            ["/TestFolder/", "/TestFolder/testfile.md", "/private/", "/private/foryoureyesonly.avi"]
+        )
+        missing_folders, missing_files = scan_folders()
+
+        # One request per folder
+        self.assertEqual(mock.return_value.propfind.call_count, SquireNextCloudFolder.objects.count())
+        self.assertIn(SquireNextCloudFolder.objects.get(path="/test2/"), missing_folders)
+        self.assertNotIn(SquireNextCloudFolder.objects.get(path="/TestFolder/"), missing_folders)
+        self.assertEqual([file.file_name for file in missing_files], ["otherfile.md"])
+        self.assertEqual(set(SquireNextCloudFolder.objects.filter(is_missing=True)), set(missing_folders))
+
+    def test_scan_folders_depth_infinity(self, mock):
+        mock.return_value.propfind.side_effect = mock_propfind(
+            ["/TestFolder/", "/TestFolder/testfile.md", "/private/", "/private/foryoureyesonly.avi"]
+        )
+        missing_folders, missing_files = scan_folders(depth_infinity=True)
+
+        # A single request for all folders
+        mock.return_value.propfind.assert_called_once_with("", depth="infinity", use_cache=False)
+        self.assertIn(SquireNextCloudFolder.objects.get(path="/test2/"), missing_folders)
+        self.assertEqual([file.file_name for file in missing_files], ["otherfile.md"])
+
+    def test_command(self, mock):
+        mock.return_value.propfind.side_effect = mock_propfind(
+            ["/TestFolder/", "/TestFolder/testfile.md", "/private/", "/private/foryoureyesonly.avi"]
+        )
+        out = StringIO()
+        call_command("scan_nextcloud", stdout=out)
+        self.assertIn("Missing folder: Non overview folder (/test2/)", out.getvalue())
+        self.assertIn("Missing file: Secondary file (/TestFolder/otherfile.md)", out.getvalue())
+
+        mock.return_value.propfind.side_effect = mock_propfind(
+            [
+                "/TestFolder/",
+                "/TestFolder/testfile.md",
+                "/TestFolder/otherfile.md",
+                "/private/",
+                "/private/foryoureyesonly.avi",
+                "/test2/",
+                "/test2/quoties.docx",
+            ]
+        )
+        out = StringIO()
+        call_command("scan_nextcloud", depth_infinity=True, stdout=out)
+        self.assertIn("All folders and files are present on Nextcloud", out.getvalue())
@@ -1,10 +1,16 @@
 from django.contrib.auth.models import User, Permission
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.test import TestCase
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import FileResponse
 from django.urls import reverse
 from django.views.generic import ListView, FormView
 from easywebdav.client import OperationFailed
-from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectionError, ReadTimeout
 from requests.models import Response
 from unittest.mock import Mock, patch
 
@@ -15,6 +21,7 @@ from membership_file.util import user_is_current_member
 from nextcloud_integration.forms import *
 from nextcloud_integration.models import SquireNextCloudFolder, SquireNextCloudFile
 from nextcloud_integration.nextcloud_resources import NextCloudFolder, NextCloudFile
+from nextcloud_integration.utils import scan_folders
 from nextcloud_integration.views import (
     NextcloudConnectionViewMixin,
     FolderMixin,
@@ -42,6 +49,16 @@ class NextCloudConnectionMixinTestCase(TestMixinMixin, TestCase):
         self.assertEqual(response.template_name, "nextcloud_integration/failed_nextcloud_link.html")
         self.assertIsInstance(response.context_data["error"], ConnectionError)
 
+    def test_catch_timeout(self):
+        class ThrowTimeout:
+            def dispatch(self, *args, **kwargs):
+                raise ReadTimeout()
+
+        response = self._build_get_response(post_inherit_class=ThrowTimeout)
+        self.assertEqual(response.status_code, 424)
+        self.assertEqual(response.template_name, "nextcloud_integration/failed_nextcloud_link.html")
+        self.assertIsInstance(response.context_data["error"], ReadTimeout)
+
     def test_catch_operation_failed(self):
         class ThrowConnectionError:
             def dispatch(self, *args, **kwargs):
@@ -100,6 +117,13 @@ class FileBrowserViewTestCase(ViewValidityMixin, TestCase):
         self.assertEqual(response.template_name, "nextcloud_integration/browser_not_exist.html")
         self.assertEqual(response.context["path"], "does-not-exist/")
 
+    @suppress_warnings
+    def test_timeout(self, mock: Mock):
+        mock.return_value.ls.side_effect = ReadTimeout()
+        response = self.client.get(self.get_base_url(path="plain/"))
+        self.assertEqual(response.status_code, 424)
+        self.assertEqual(response.template_name, "nextcloud_integration/failed_nextcloud_link.html")
+
     def test_requires_permission(self, mock: Mock):
         self.assertRequiresPermission()
 
@@ -108,13 +132,67 @@ class SiteDownloadViewTestCase(ViewValidityMixin, TestCase):
     fixtures = ["test_users", "test_groups", "test_members.json", "nextcloud_integration/nextcloud_fixtures"]
     base_user_id = 100
 
+    def setUp(self):
+        super(SiteDownloadViewTestCase, self).setUp()
+        # Rendered listings may remain cached after other tests' changes are rolled back
+        cache.clear()
+
     def get_base_url(self):
         return reverse("nextcloud:site_downloads")
 
+    def get_folder_queries(self):
+        """Performs a GET request and returns the queries involving folders or files"""
+        with CaptureQueriesContext(connection) as context:
+            self.assertValidGetResponse()
+        return [query["sql"] for query in context.captured_queries if "nextcloud_integration_" in query["sql"]]
+
     def test_successful_get(self):
         response = self.client.get(self.get_base_url(), data={})
         self.assertEqual(response.status_code, 200)
 
+    def test_prefetched_files(self):
+        """Tests that the number of queries does not depend on the number of files"""
+        num_queries = len(self.get_folder_queries())
+        self.assertEqual(num_queries, 2)
+        for i in range(5):
+            SquireNextCloudFile.objects.create(
+                display_name=f"Extra file {i}", file_name=f"extra_{i}.txt", folder_id=1 + i % 2
+            )
+        self.assertEqual(len(self.get_folder_queries()), num_queries)
+
+    def test_cached_listing(self):
+        """Tests that the listing is rendered once per membership state"""
+        self.assertNotEqual(self.get_folder_queries(), [])
+        self.assertEqual(self.get_folder_queries(), [])
+        response = self.client.get(self.get_base_url())
+        self.assertContains(response, "Private file")
+        self.assertContains(
+            response,
+            reverse("nextcloud:file_dl", kwargs={"folder_slug": "initial_folder", "file_slug": "initial_file"}),
+        )
+
+        # Non-members are shown a different listing
+        self.client.force_login(User.objects.get(id=2))
+        response = self.client.get(self.get_base_url())
+        self.assertNotContains(response, "Private file")
+        self.assertContains(response, "Initial file")
+
+    def test_cached_listing_invalidation(self):
+        """Tests that the cached listing is refreshed when folders or files change"""
+        self.assertValidGetResponse()
+        nc_file = SquireNextCloudFile.objects.get(id=1)
+        nc_file.display_name = "Renamed file"
+        nc_file.save()
+        self.assertContains(self.client.get(self.get_base_url()), "Renamed file")
+
+        SquireNextCloudFolder.objects.get(id=2).delete()
+        self.assertNotContains(self.client.get(self.get_base_url()), "Private file")
+
+        # Bulk updates when checking the folders' status on Nextcloud
+        with patch("nextcloud_integration.utils._list_existing_paths", return_value={"/TestFolder/"}):
+            scan_folders(SquireNextCloudFolder.objects.filter(id=1), client=Mock())
+        self.assertContains(self.client.get(self.get_base_url()), "Missing")
+
     def test_template_context(self):
         response = self.client.get(self.get_base_url(), data={})
         context = response.context
@@ -289,25 +367,41 @@ class SyncFileToFolderViewTestCase(ViewValidityMixin, TestCase):
         mock_save.assert_called()
 
 
-@patch_construction("views")
-class DownloadFileViewTestCase(ViewValidityMixin, TestCase):
+class DownloadFileTestMixin:
+    """Sets up a file to download, and mocks its download from Nextcloud"""
+
     fixtures = ["test_users", "test_members", "nextcloud_integration/nextcloud_fixtures"]
     base_user_id = 100
 
     def setUp(self):
         self.file = SquireNextCloudFile.objects.get(id=1)
-        super(DownloadFileViewTestCase, self).setUp()
+        super(DownloadFileTestMixin, self).setUp()
 
     def mock_download(self, mock):
         file_path = f"nextcloud_integration/tests/files/test_download_file.txt"
 
-        def fake_download(nc_file=None):
+        def fake_download(nc_file=None, headers=None):
             resp = Response()
-            with open(file_path, "r") as file:
+            with open(file_path, "rb") as file:
                 resp._content = file.read()
+            resp._content_consumed = True
             resp.status_code = 200
+            resp.headers["Content-Type"] = "text/plain"
+            resp.headers["Content-Length"] = str(len(resp._content))
+            resp.headers["ETag"] = '"abc123"'
             resp.cookies = {"fake_cookie": "this_should_not_be_shared"}
 
+            if headers and headers.get("If-None-Match") == resp.headers["ETag"]:
+                resp._content = b""
+                resp.status_code = 304
+            elif headers and "Range" in headers:
+                # Only supports ranges in the form of bytes=<start>-<end>
+                start, end = map(int, headers["Range"].removeprefix("bytes=").split("-"))
+                resp.headers["Content-Range"] = f"bytes {start}-{end}/{len(resp._content)}"
+                resp._content = resp._content[start : end + 1]
+                resp.headers["Content-Length"] = str(len(resp._content))
+                resp.status_code = 206
+
             return resp
 
         mock.return_value.download.side_effect = fake_download
@@ -317,6 +411,14 @@ class DownloadFileViewTestCase(ViewValidityMixin, TestCase):
             file = self.file
         return reverse("nextcloud:file_dl", kwargs={"folder_slug": file.folder.slug, "file_slug": file.slug})
 
+    @staticmethod
+    def fail_download(*args, actual_code=404, **kwargs):
+        raise OperationFailed(method="GET", path="/", expected_code=200, actual_code=actual_code)
+
+
+@override_settings(NEXTCLOUD_CACHE_DIR=None)
+@patch_construction("views")
+class DownloadFileViewTestCase(DownloadFileTestMixin, ViewValidityMixin, TestCase):
     def test_fixed_values(self, mock):
         self.assertTrue(issubclass(DownloadFileview, NextcloudConnectionViewMixin))
         self.assertEqual(DownloadFileview.template_name, "nextcloud_integration/file_download_test.html")
@@ -326,6 +428,41 @@ class DownloadFileViewTestCase(ViewValidityMixin, TestCase):
         self.mock_download(mock)
         self.assertValidGetResponse()
 
+    def test_streamed_content(self, mock):
+        """Tests that the file is streamed to the client, along with its (relevant) headers"""
+        self.mock_download(mock)
+        response = self.client.get(self.get_base_url())
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), b"Download file :D\n")
+        self.assertEqual(response["Content-Type"], "text/plain")
+        self.assertEqual(response["Content-Length"], "17")
+        self.assertEqual(response["ETag"], '"abc123"')
+        self.assertEqual(response["Content-Disposition"], f'attachment; filename="{self.file.file_name}"')
+        self.assertNotIn("fake_cookie", response.cookies)
+        # No range was requested
+        self.assertEqual(mock.return_value.download.call_args.kwargs["headers"], {})
+
+    def test_range_request(self, mock):
+        """Tests that Range requests are passed on to Nextcloud"""
+        self.mock_download(mock)
+        response = self.client.get(self.get_base_url(), HTTP_RANGE="bytes=0-7", HTTP_IF_RANGE='"abc123"')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"Download")
+        self.assertEqual(response["Content-Range"], "bytes 0-7/17")
+        self.assertEqual(response["Content-Length"], "8")
+        self.assertEqual(
+            mock.return_value.download.call_args.kwargs["headers"], {"Range": "bytes=0-7", "If-Range": '"abc123"'}
+        )
+
+    def test_upstream_closed(self, mock):
+        """Tests that the connection to Nextcloud is released once the response is closed"""
+        self.mock_download(mock)
+        with patch.object(Response, "close") as mock_close:
+            response = self.client.get(self.get_base_url())
+            next(iter(response.streaming_content))
+            response.close()
+            mock_close.assert_called_once()
+
     @suppress_warnings()
     def test_file_not_found(self, mock):
         response = self.client.get(
@@ -346,23 +483,14 @@ class DownloadFileViewTestCase(ViewValidityMixin, TestCase):
         self.client.force_login(self.user)
         self.assertPermissionDenied(url=self.get_base_url(nc_file))
 
-    @staticmethod
-    def fail_download(*args, actual_code=404, **kwargs):
-        raise OperationFailed(method="GET", path="/", expected_code=200, actual_code=actual_code)
-
     def test_disconnected_file(self, mock):
         """Test that a download failing due to a disconnected file adjusts database state"""
         self.assertEqual(self.file.is_missing, False)
         # Ensure that an exception is created
         mock.return_value.download.side_effect = self.fail_download
 
-        # Adjust the exist method
-        def exists(resource=None):
-            if isinstance(resource, NextCloudFile):
-                return False
-            return True
-
-        mock.return_value.exists.side_effect = exists
+        # Folder exists, but without the file
+        mock.return_value.propfind.return_value = [NextCloudFolder(path="/TestFolder/")]
 
         response = self.client.get(self.get_base_url(), follow=True)
         self.file.refresh_from_db()
@@ -376,13 +504,8 @@ class DownloadFileViewTestCase(ViewValidityMixin, TestCase):
         # Ensure that an exception is created
         mock.return_value.download.side_effect = self.fail_download
 
-        # Adjust the exist method
-        def exists(resource=None):
-            if isinstance(resource, NextCloudFolder):
-                return False
-            return True
-
-        mock.return_value.exists.side_effect = exists
+        # Folder does not exist
+        mock.return_value.propfind.side_effect = self.fail_download
 
         response = self.client.get(self.get_base_url(), follow=True)
         self.file.folder.refresh_from_db()
@@ -413,3 +536,89 @@ class DownloadFileViewTestCase(ViewValidityMixin, TestCase):
         response = self.client.get(self.get_base_url(), follow=True)
         self.assertHasMessage(response, "ERROR", "File could not be retrieved")
         self.assertEqual(response.request["PATH_INFO"], reverse("nextcloud:site_downloads"))
+
+
+@patch_construction("views")
+class DownloadFileViewCacheTestCase(DownloadFileTestMixin, ViewValidityMixin, TestCase):
+    """Tests downloading files through the local file cache"""
+
+    def setUp(self):
+        super(DownloadFileViewCacheTestCase, self).setUp()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(NEXTCLOUD_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_cached_content(self, mock):
+        """Tests that files are cached, and revalidated on subsequent downloads"""
+        self.mock_download(mock)
+        response = self.client.get(self.get_base_url())
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(b"".join(response.streaming_content), b"Download file :D\n")
+        self.assertEqual(response["Content-Type"], "text/plain")
+        self.assertEqual(response["ETag"], '"abc123"')
+        self.assertEqual(response["Content-Disposition"], f'attachment; filename="{self.file.file_name}"')
+        self.assertEqual(mock.return_value.download.call_args.kwargs["headers"], {})
+        response.close()
+
+        # File is revalidated with its ETag, and served from the cache
+        mock.return_value.download.reset_mock()
+        response = self.client.get(self.get_base_url())
+        self.assertEqual(mock.return_value.download.call_args.kwargs["headers"], {"If-None-Match": '"abc123"'})
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(b"".join(response.streaming_content), b"Download file :D\n")
+        response.close()
+
+    def test_cached_content_outdated(self, mock):
+        """Tests that outdated cached files are replaced"""
+        self.mock_download(mock)
+        self.client.get(self.get_base_url()).close()
+
+        # File changed on Nextcloud
+        fake_download = mock.return_value.download.side_effect
+
+        def changed_download(nc_file=None, headers=None):
+            resp = fake_download(nc_file=nc_file)
+            resp._content = b"Changed file"
+            resp.headers["Content-Length"] = str(len(resp._content))
+            resp.headers["ETag"] = '"def456"'
+            return resp
+
+        mock.return_value.download.side_effect = changed_download
+        response = self.client.get(self.get_base_url())
+        self.assertEqual(b"".join(response.streaming_content), b"Changed file")
+        self.assertEqual(response["ETag"], '"def456"')
+        response.close()
+
+    @suppress_warnings(logger_name="nextcloud_integration.views")
+    def test_nextcloud_unreachable(self, mock):
+        """Tests that cached files are still served if Nextcloud cannot be reached"""
+        self.mock_download(mock)
+        self.client.get(self.get_base_url()).close()
+
+        mock.return_value.download.side_effect = ConnectionError()
+        response = self.client.get(self.get_base_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"Download file :D\n")
+        response.close()
+
+        mock.return_value.download.side_effect = lambda *args, **kwargs: self.fail_download(actual_code=503)
+        response = self.client.get(self.get_base_url())
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+        # Nextcloud is too slow to respond
+        mock.return_value.download.side_effect = ReadTimeout()
+        response = self.client.get(self.get_base_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"Download file :D\n")
+        response.close()
+
+    @override_settings(NEXTCLOUD_CACHE_MAX_FILE_SIZE=8)
+    def test_large_file(self, mock):
+        """Tests that files that are too large are streamed instead"""
+        self.mock_download(mock)
+        response = self.client.get(self.get_base_url())
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(b"".join(response.streaming_content), b"Download file :D\n")
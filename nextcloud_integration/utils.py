@@ -1,26 +1,90 @@
-from nextcloud_integration.models import SquireNextCloudFolder
+from typing import Iterable, List, Set, Tuple
+from urllib.parse import unquote
+
+from django.db.models import QuerySet
+from easywebdav import OperationFailed
+
+from nextcloud_integration.models import SquireNextCloudFolder, SquireNextCloudFile, invalidate_downloads_cache
 from nextcloud_integration.nextcloud_client import construct_client
 
 
-def refresh_status(folder: SquireNextCloudFolder):
-    """Refreshes the status of the folder and it's contents
-    :param folder: The nextcloud folder validated
-    :return True if all files were present on Squire
+def _normalize_path(path: str) -> str:
+    """Normalizes a Nextcloud path so that paths from Squire and Nextcloud can be compared"""
+    return unquote(path or "").strip("/")
+
+
+def _list_existing_paths(client, folders: List[SquireNextCloudFolder], depth_infinity=False) -> Set[str]:
+    """Lists the (normalized) paths of all resources on Nextcloud in the given folders. Uses a single
+    PROPFIND request per folder, or a single request in total if `depth_infinity` is True.
     """
-    client = construct_client()
+    if depth_infinity:
+        return {_normalize_path(resource.path) for resource in client.propfind("", depth="infinity", use_cache=False)}
 
-    if not client.exists(resource=folder.folder):
-        folder.is_missing = True
-        folder.save()
-        return False
+    existing_paths = set()
+    for folder in folders:
+        try:
+            resources = client.propfind(folder.path, depth="1", use_cache=False)
+        except OperationFailed as error:
+            if error.actual_code != 404:
+                raise
+            # Folder does not exist
+            continue
+        existing_paths.update(_normalize_path(resource.path) for resource in resources)
+    return existing_paths
 
-    folder.files.update(is_missing=False)
 
-    all_ok = True
-    for file in folder.files.all():
-        if not client.exists(resource=file.file):
-            file.is_missing = True
-            file.save()
-            all_ok = False
+def scan_folders(
+    folders: Iterable[SquireNextCloudFolder] = None, depth_infinity=False, client=None
+) -> Tuple[List[SquireNextCloudFolder], List[SquireNextCloudFile]]:
+    """Checks whether the given folders (all folders by default) and their files exist on Nextcloud, and
+    updates their `is_missing` status accordingly. Files in missing folders are left as they are.
+    :param folders: The folders to check
+    :param depth_infinity: Whether to list all of Nextcloud in a single request, rather than one request per folder
+    :param client: The NextCloudClient to use
+    :return: The missing folders and the missing files
+    """
+    if folders is None:
+        folders = SquireNextCloudFolder.objects.all()
+    if isinstance(folders, QuerySet):
+        folders = folders.prefetch_related("files")
+    folders = list(folders)
+    client = client or construct_client()
+    existing_paths = _list_existing_paths(client, folders, depth_infinity=depth_infinity)
 
-    return all_ok
+    missing_folders, missing_files = [], []
+    found_folder_ids, found_file_ids = [], []
+    for folder in folders:
+        if _normalize_path(folder.path) not in existing_paths:
+            missing_folders.append(folder)
+            continue
+        found_folder_ids.append(folder.id)
+        for file in folder.files.all():
+            if _normalize_path(file.path) in existing_paths:
+                found_file_ids.append(file.id)
+            else:
+                missing_files.append(file)
+
+    # Only rows whose status changed are updated
+    missing_folder_ids = [folder.id for folder in missing_folders]
+    missing_file_ids = [file.id for file in missing_files]
+    updated_count = (
+        SquireNextCloudFolder.objects.filter(id__in=missing_folder_ids, is_missing=False).update(is_missing=True)
+        + SquireNextCloudFolder.objects.filter(id__in=found_folder_ids, is_missing=True).update(is_missing=False)
+        + SquireNextCloudFile.objects.filter(id__in=missing_file_ids, is_missing=False).update(is_missing=True)
+        + SquireNextCloudFile.objects.filter(id__in=found_file_ids, is_missing=True).update(is_missing=False)
+    )
+    if updated_count:
+        # Bulk updates do not send signals
+        invalidate_downloads_cache()
+    return missing_folders, missing_files
+
+
+def refresh_status(folder: SquireNextCloudFolder, client=None):
+    """Refreshes the status of the folder and it's contents
+    :param folder: The nextcloud folder validated
+    :param client: The NextCloudClient to use
+    :return True if all files were present on Squire
+    """
+    missing_folders, missing_files = scan_folders([folder], client=client)
+    folder.is_missing = bool(missing_folders)
+    return not missing_folders and not missing_files
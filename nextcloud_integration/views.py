@@ -1,4 +1,8 @@
-from django.http.response import HttpResponse, HttpResponseRedirect
+import logging
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http.response import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.contrib.messages import error as error_msg
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.template.response import TemplateResponse
@@ -8,15 +12,16 @@ from django.views.generic.detail import SingleObjectMixin
 from django.views.generic import ListView, FormView
 from django.shortcuts import get_object_or_404
 
-from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectionError, Timeout
 from easywebdav import OperationFailed
 
 from membership_file.util import user_is_current_member, MembershipRequiredMixin
 
+from nextcloud_integration.file_cache import CachedFile, get_file_cache
 from nextcloud_integration.nextcloud_client import construct_client
+from nextcloud_integration.utils import scan_folders
 from nextcloud_integration.forms import *
-from nextcloud_integration.models import SquireNextCloudFolder, SquireNextCloudFile
-
+from nextcloud_integration.models import SquireNextCloudFolder, SquireNextCloudFile, get_downloads_cache_version
 
 __all__ = [
     "SiteDownloadView",
@@ -29,9 +34,13 @@ __all__ = [
     "NextcloudConnectionViewMixin",
 ]
 
+logger = logging.getLogger(__name__)
+
 
 class NextcloudConnectionViewMixin:
-    """Mixin that catches ConnectionErrors from the requests module and throws a 424 (Failed Dependency) instead"""
+    """Mixin that catches ConnectionErrors and Timeouts from the requests module and throws a 424 (Failed Dependency)
+    instead
+    """
 
     failed_connection_template = "nextcloud_integration/failed_nextcloud_link.html"
     _client = None
@@ -39,7 +48,7 @@ class NextcloudConnectionViewMixin:
     def dispatch(self, request, *args, **kwargs):
         try:
             return super(NextcloudConnectionViewMixin, self).dispatch(request, *args, **kwargs)
-        except ConnectionError as error:
+        except (ConnectionError, Timeout) as error:
             return self.nextcloud_connection_failed(error)
         except OperationFailed as error:
             return self.nextcloud_operation_failed(error)
@@ -66,12 +75,12 @@ class FileBrowserView(NextcloudConnectionViewMixin, PermissionRequiredMixin, Lis
     permission_required = "nextcloud_integration.view_squirenextcloudfolder"
     context_object_name = "nextcloud_resources"
 
-    def nextcloud_connection_failed(self, error):
+    def nextcloud_operation_failed(self, error):
         if error.actual_code == 404:
             return TemplateResponse(
                 self.request, "nextcloud_integration/browser_not_exist.html", {"path": self.kwargs.get("path", "")}
             )
-        return super(FileBrowserView, self).nextcloud_connection_failed(error)
+        return super(FileBrowserView, self).nextcloud_operation_failed(error)
 
     def get_queryset(self):
         return construct_client().ls(remote_path=self.kwargs.get("path", ""))
@@ -81,18 +90,27 @@ class FileBrowserView(NextcloudConnectionViewMixin, PermissionRequiredMixin, Lis
 
 
 class SiteDownloadView(ListView):
+    """Lists the files available for download. The rendered listing is cached per membership state,
+    until a folder or file changes."""
+
     template_name = "nextcloud_integration/site_downloads.html"
     model = SquireNextCloudFolder
     context_object_name = "folders"
 
+    def setup(self, request, *args, **kwargs):
+        super(SiteDownloadView, self).setup(request, *args, **kwargs)
+        self.is_current_member = user_is_current_member(self.request.user)
+
     def get_queryset(self):
         queryset = super(SiteDownloadView, self).get_queryset()
         queryset = queryset.filter(on_overview_page=True)
+        files = SquireNextCloudFile.objects.filter(folder__on_overview_page=True)
 
-        if not user_is_current_member(self.request.user):
+        if not self.is_current_member:
             queryset = queryset.filter(requires_membership=False)
+            files = files.filter(folder__requires_membership=False)
 
-        return queryset
+        return queryset.prefetch_related(Prefetch("files", queryset=files))
 
     def get_context_data(self, *args, **kwargs):
         context = super(SiteDownloadView, self).get_context_data(*args, **kwargs)
@@ -106,7 +124,7 @@ class SiteDownloadView(ListView):
                     "btn_url": reverse_lazy("core:user_accounts/login"),
                 }
             )
-        elif not user_is_current_member(self.request.user):
+        elif not self.is_current_member:
             unique_messages.append(
                 {
                     "msg_text": "You are currently not a member. Not all files might be available to you.",
@@ -115,6 +133,9 @@ class SiteDownloadView(ListView):
             )
 
         context["unique_messages"] = unique_messages
+        context["is_current_member"] = self.is_current_member
+        context["cache_timeout"] = settings.NEXTCLOUD_DOWNLOADS_CACHE_TIMEOUT
+        context["cache_version"] = get_downloads_cache_version()
         return context
 
 
@@ -181,6 +202,12 @@ class DownloadFileview(MembershipRequiredMixin, NextcloudConnectionViewMixin, Si
     slug_url_kwarg = "file_slug"
     slug_field = "slug"
     context_object_name = "file"
+    # Size of the chunks in which files are streamed from Nextcloud to the client
+    chunk_size = 64 * 1024
+    # Headers passed on to Nextcloud, allowing clients to resume downloads
+    forwarded_request_headers = ["Range", "If-Range"]
+    # Headers passed on from Nextcloud to the client
+    forwarded_response_headers = ["Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Last-Modified"]
 
     def dispatch(self, request, *args, **kwargs):
         self.file = get_object_or_404(
@@ -201,29 +228,85 @@ class DownloadFileview(MembershipRequiredMixin, NextcloudConnectionViewMixin, Si
             error_msg(self.request, "File could not be retrieved as it missing on the cloud.")
             return HttpResponseRedirect(reverse_lazy("nextcloud:site_downloads"))
 
-        file_data = self.get_file(self.file)
-        response = HttpResponse(file_data.content, content_type="application/vnd.ms-excel")
+        file_cache = get_file_cache()
+        if file_cache is not None and "Range" not in request.headers:
+            return self.get_cached_response(file_cache)
+        return self.get_streaming_response(self.get_file(self.file))
+
+    def get_streaming_response(self, file_response):
+        """Streams the downloaded file from Nextcloud to the client"""
+        response = StreamingHttpResponse(
+            self.stream_file(file_response),
+            status=file_response.status_code,
+            content_type=file_response.headers.get("Content-Type", "application/octet-stream"),
+        )
+        for header in self.forwarded_response_headers:
+            if header in file_response.headers:
+                response[header] = file_response.headers[header]
         response["Content-Disposition"] = f'attachment; filename="{self.file.file_name}"'
 
         return response
 
+    def get_cached_response(self, file_cache):
+        """Serves the file from the local file cache, after revalidating it with Nextcloud. The cached file is
+        also served if Nextcloud cannot be reached.
+        """
+        cached_file = file_cache.get(self.file.file.path)
+        headers = {"If-None-Match": cached_file.etag} if cached_file is not None else {}
+        try:
+            file_response = self.client.download(self.file.file, headers=headers)
+        except (ConnectionError, Timeout, OperationFailed) as error:
+            if cached_file is None or (isinstance(error, OperationFailed) and error.actual_code < 500):
+                raise
+            logger.warning(f"Serving cached {self.file.file.path}, as Nextcloud could not be reached: {error}")
+        else:
+            if file_response.status_code == 304:
+                file_response.close()
+            elif file_cache.can_store(file_response):
+                cached_file = file_cache.store(self.file.file.path, file_response, chunk_size=self.chunk_size)
+            else:
+                # E.g. the file is too large to be cached
+                return self.get_streaming_response(file_response)
+
+        file_cache.touch(cached_file)
+        return self.get_file_response(cached_file)
+
+    def get_file_response(self, cached_file: CachedFile):
+        """Serves a file from the local file cache"""
+        response = FileResponse(open(cached_file.data_path, "rb"), content_type=cached_file.content_type)
+        response["ETag"] = cached_file.etag
+        if cached_file.last_modified:
+            response["Last-Modified"] = cached_file.last_modified
+        response["Content-Disposition"] = f'attachment; filename="{self.file.file_name}"'
+        return response
+
     def get_file(self, file):
-        return self.client.download(file)
+        headers = {
+            header: self.request.headers[header]
+            for header in self.forwarded_request_headers
+            if header in self.request.headers
+        }
+        return self.client.download(file, headers=headers)
+
+    def stream_file(self, file_response):
+        """Yields the file's content in chunks, so that the file is never fully loaded in memory"""
+        try:
+            yield from file_response.iter_content(chunk_size=self.chunk_size)
+        finally:
+            # Release the connection to Nextcloud, even if the client aborted the download
+            file_response.close()
 
     def nextcloud_operation_failed(self, error: OperationFailed):
         msg = None
         if error.actual_code == 404:
-            if not self.client.exists(self.file.folder.folder):
-                # Set folder
-                self.file.folder.is_missing = True
-                self.file.folder.save(update_fields=["is_missing"])
+            # Check the folder and its files in a single request
+            missing_folders, missing_files = scan_folders([self.file.folder], client=self.client)
+            if missing_folders:
                 msg = (
                     "The file could not be retrieved as its folder has been moved or renamed. "
                     "It is unknown when it will be fixed as it needs to be addressed manually."
                 )
-            elif not self.client.exists(self.file.file):
-                self.file.is_missing = True
-                self.file.save(update_fields=["is_missing"])
+            elif self.file.id in [file.id for file in missing_files]:
                 msg = (
                     "The file could not be retrieved as it has been moved or renamed. "
                     "It is unknown when it will be fixed as it needs to be addressed manually."
@@ -1,7 +1,7 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.contrib.auth.models import Permission
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse, reverse_lazy
 from django.views.generic import DetailView, UpdateView, ListView
 
@@ -180,3 +180,25 @@ class TestDownloadDigitalItemView(ViewValidityMixin, TestCase):
         # Make sure that the file name is equal to the in the instance defined filename
         file_name = content_disposition.split("filename=")[1].split("; ")[0]
         self.assertEqual(file_name, f'"{item.local_file_name}.txt"')
+        self.assertEqual(b"".join(response.streaming_content).strip(), b"Test file results")
+
+    @override_settings(PROTECTED_FILES_BACKEND="nginx", PROTECTED_FILES_NGINX_LOCATION="/protected-media/")
+    def test_digital_file_offloaded(self):
+        # Tests that the web server can be made to send the file
+        item = RoleplayingItem.objects.get(id=2)
+        url = reverse("roleplaying:download_roleplay_item", kwargs={"item_id": item.id})
+        response = self.client.get(url, data={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/roleplaying/this-is-a-test-file.txt")
+        self.assertEqual(response["Content-Type"], "text/plain")
+        self.assertIn(f'filename="{item.local_file_name}.txt"', response["Content-Disposition"])
+
+    @override_settings(PROTECTED_FILES_BACKEND="nginx")
+    def test_digital_file_offloaded_requires_membership(self):
+        # Access is still checked before the file is offloaded
+        self.client.logout()
+        url = reverse("roleplaying:download_roleplay_item", kwargs={"item_id": 2})
+        response = self.client.get(url, data={})
+        self.assertNotEqual(response.status_code, 200)
+        self.assertNotIn("X-Accel-Redirect", response)
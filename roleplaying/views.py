@@ -3,12 +3,13 @@ import os
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.contrib.contenttypes.models import ContentType
-from django.http import Http404, FileResponse
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils.text import slugify
 from django.views.generic import ListView, View, DetailView, UpdateView
 
+from utils.protected_files import get_protected_file_response
 from utils.views import SearchFormMixin
 from membership_file.views import MembershipRequiredMixin
 
@@ -55,7 +56,7 @@ class SystemDetailView(MembershipRequiredMixin, DetailView):
                 "can_maintain_ownership": self.request.user.has_perm(
                     f"roleplaying.maintain_ownerships_for_{item_class_name}"
                 ),
-                "owned_items": system.items.get_all_in_possession(),
+                "owned_items": system.items.get_all_in_possession().with_ownership_flags(self.request.member),
             }
         )
         return context
@@ -106,5 +107,4 @@ class DownloadDigitalItemView(MembershipRequiredMixin, RoleplayingItemMixin, Vie
         filename, _ = os.path.splitext(filename)
         _, extension = os.path.splitext(self.roleplay_item.local_file.name)
 
-        response = FileResponse(self.roleplay_item.local_file, as_attachment=True, filename=filename + extension)
-        return response
+        return get_protected_file_response(self.roleplay_item.local_file, filename=filename + extension)
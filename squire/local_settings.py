@@ -0,0 +1,3 @@
+# This file contains local attributes of the settings file you wish to define or override
+# This file is not synched with git and thus can contain personal attributes to destinguish your
+# local version from the default version, e.g. because you use a different database.
\ No newline at end of file
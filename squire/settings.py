@@ -147,6 +147,19 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#   Some cached data is shared between Squire's processes, such as snapshots of Mailcow's aliases and
+#   the compiled permission preferences. Django's default local-memory cache is per-process, so deployments
+#   that run multiple worker processes should configure a shared backend in local_settings.py, e.g. the
+#   database cache (create its table first by running `python manage.py createcachetable`):
+#   CACHES = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "squire_cache"}}
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 # Default primary key field field type to use for models that don't have a field with primary_key=True
 #   This changed to BigAutoField in Django 3.2, but migrating to it doesn't work properly
 #   for ManyToManyFields that do _not_ have an explicit `through` attribute set.
@@ -268,6 +281,14 @@ STATIC_ROOT = os.path.join(BASE_DIR, "htdocs", "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "htdocs", "media")
 
+# How media files that require access checks (e.g. digital roleplaying items) are delivered:
+#   "django": Squire sends the file itself
+#   "nginx": nginx sends the file from PROTECTED_FILES_NGINX_LOCATION (X-Accel-Redirect)
+#   "sendfile": the web server sends the file from MEDIA_ROOT (X-Sendfile; Apache's mod_xsendfile, lighttpd)
+PROTECTED_FILES_BACKEND = "django"
+# Internal nginx location serving MEDIA_ROOT, e.g. `location /protected-media/ { internal; alias <MEDIA_ROOT>/; }`
+PROTECTED_FILES_NGINX_LOCATION = "/protected-media/"
+
 # Additional places to look for static files
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "core", "static_compiled"),
@@ -401,9 +422,40 @@ MARTOR_ALTERNATIVE_JQUERY_JS_FILE = None
 #   If MAILCOW_HOST is None, no API connection is established
 MAILCOW_HOST = None
 MAILCOW_API_KEY = None
+# (connect, read) timeout in seconds for requests made to the Mailcow API
+MAILCOW_API_TIMEOUT = (5, 30)
+# Number of times failed GET requests to the Mailcow API are retried
+MAILCOW_API_MAX_RETRIES = 3
+# Maximum number of concurrent requests made to the Mailcow API when updating many aliases
+MAILCOW_API_MAX_WORKERS = 4
+# Number of seconds snapshots of Mailcow's aliases and mailboxes are shared between processes
+MAILCOW_STATE_CACHE_TIMEOUT = 300
+# Maximum age in seconds of the Mailcow data shown on the admin status page
+MAILCOW_STATUS_MAX_AGE = 10
 MEMBER_ALIASES = {}
 COMMITTEE_CONFIGS = {"archive_addresses": [], "global_addresses": [], "global_archive_addresses": []}
 
+####################################################################
+# Nextcloud
+#   NEXTCLOUD_HOST, NEXTCLOUD_USERNAME, and NEXTCLOUD_PASSWORD should be defined to connect to Nextcloud
+# (connect, read) timeout in seconds for requests made to Nextcloud
+NEXTCLOUD_TIMEOUT = (5, 30)
+# Maximum number of connections to Nextcloud that are kept alive per process
+NEXTCLOUD_POOL_SIZE = 10
+# Number of seconds Nextcloud directory listings are cached. Listings are also refreshed when Squire modifies them
+NEXTCLOUD_LISTING_CACHE_TIMEOUT = 30
+# Size in bytes of the chunks in which files are uploaded to Nextcloud. Should be between 5 MB and 5 GB
+NEXTCLOUD_UPLOAD_CHUNK_SIZE = 10 * 1024 * 1024
+# Number of seconds the rendered download overview is cached. It is also refreshed when a folder or file changes
+NEXTCLOUD_DOWNLOADS_CACHE_TIMEOUT = 60 * 60
+# Directory in which files downloaded from Nextcloud are cached. If None, files are not cached
+#   Set this in local_settings.py to a directory outside of the deployed code
+NEXTCLOUD_CACHE_DIR = None
+# Maximum total size in bytes of the cached files. The least recently used files are evicted first
+NEXTCLOUD_CACHE_MAX_SIZE = 512 * 1024 * 1024
+# Files larger than this (in bytes) are streamed from Nextcloud without being cached
+NEXTCLOUD_CACHE_MAX_FILE_SIZE = 64 * 1024 * 1024
+
 ####################################################################
 # Other Settings
 # Non-native Django setting
@@ -0,0 +1,55 @@
+import mimetypes
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.fields.files import FieldFile
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+##################################################################################
+# Delivery of protected (media) files. Access to these files is checked by Squire,
+#   after which the file itself is either sent by Squire, or by the web server
+#   in front of it (so that no Python worker is tied up during the transfer).
+##################################################################################
+
+BACKEND_DJANGO = "django"
+BACKEND_NGINX = "nginx"
+BACKEND_SENDFILE = "sendfile"
+
+
+def get_protected_file_response(file: FieldFile, filename: str = None, as_attachment=True) -> HttpResponse:
+    """
+    Constructs a response that delivers the given (media) file, as configured by PROTECTED_FILES_BACKEND:
+    "django" streams the file through Squire, "nginx" sets an X-Accel-Redirect header pointing to the file
+    in PROTECTED_FILES_NGINX_LOCATION, and "sendfile" sets an X-Sendfile header (Apache, lighttpd) containing
+    the file's path. Access to the file should be checked beforehand.
+    :param file: The file to deliver
+    :param filename: The name the file is presented with, defaults to the name of the file itself
+    :param as_attachment: Whether the file should be downloaded rather than displayed in the browser
+    :return: The response
+    """
+    backend = settings.PROTECTED_FILES_BACKEND
+    if backend == BACKEND_DJANGO:
+        return FileResponse(file, as_attachment=as_attachment, filename=filename)
+
+    filename = filename or file.name.rsplit("/", 1)[-1]
+    content_type, encoding = mimetypes.guess_type(filename)
+    response = HttpResponse(content_type=content_type or "application/octet-stream")
+    if encoding is not None:
+        # Same as FileResponse: do not let browsers decompress the file
+        response.headers["Content-Type"] = {
+            "bzip2": "application/x-bzip",
+            "gzip": "application/gzip",
+            "xz": "application/x-xz",
+        }.get(encoding, response.headers["Content-Type"])
+    response.headers["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+
+    if backend == BACKEND_NGINX:
+        location = settings.PROTECTED_FILES_NGINX_LOCATION.rstrip("/")
+        response.headers["X-Accel-Redirect"] = quote(f"{location}/{file.name}")
+    elif backend == BACKEND_SENDFILE:
+        response.headers["X-Sendfile"] = file.path
+    else:
+        raise ImproperlyConfigured(f"Unknown PROTECTED_FILES_BACKEND '{backend}'")
+    return response
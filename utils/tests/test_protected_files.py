@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+from django.http import FileResponse
+from django.test import SimpleTestCase, override_settings
+
+from utils.protected_files import get_protected_file_response
+
+
+class ProtectedFileResponseTestCase(SimpleTestCase):
+    """Tests the delivery of protected files through Squire, or offloaded to the web server"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        os.makedirs(os.path.join(media_root.name, "files"))
+        with open(os.path.join(media_root.name, "files", "some file.pdf"), "wb") as file:
+            file.write(b"%PDF")
+        self.storage = FileSystemStorage(location=media_root.name)
+
+    def get_file(self, name="files/some file.pdf"):
+        return FieldFile(None, FileField(storage=self.storage), name)
+
+    @override_settings(PROTECTED_FILES_BACKEND="django")
+    def test_django(self):
+        response = get_protected_file_response(self.get_file(), filename="download.pdf")
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="download.pdf"')
+        self.assertNotIn("X-Accel-Redirect", response)
+        self.assertNotIn("X-Sendfile", response)
+
+    @override_settings(PROTECTED_FILES_BACKEND="nginx", PROTECTED_FILES_NGINX_LOCATION="/protected/")
+    def test_nginx(self):
+        response = get_protected_file_response(self.get_file(), filename="download.pdf")
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected/files/some%20file.pdf")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="download.pdf"')
+
+    @override_settings(PROTECTED_FILES_BACKEND="sendfile")
+    def test_sendfile(self):
+        response = get_protected_file_response(self.get_file(), as_attachment=False)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.storage.location, "files", "some file.pdf"))
+        # Defaults to the name of the file itself
+        self.assertEqual(response["Content-Disposition"], 'inline; filename="some file.pdf"')
+
+    @override_settings(PROTECTED_FILES_BACKEND="sendfile")
+    def test_content_type(self):
+        with open(os.path.join(self.storage.location, "files", "archive.tar.gz"), "wb"):
+            pass
+        response = get_protected_file_response(self.get_file("files/archive.tar.gz"))
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        with open(os.path.join(self.storage.location, "files", "unknown"), "wb"):
+            pass
+        response = get_protected_file_response(self.get_file("files/unknown"))
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+
+    @override_settings(PROTECTED_FILES_BACKEND="foo")
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_protected_file_response(self.get_file())